@@ -1,24 +1,135 @@
+import json
+import time
+
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_db
-from app.schemas.forecast import ForecastResponse
+from app.schemas.forecast import (
+    BatchForecastError,
+    BatchForecastRequest,
+    ForecastJobRequest,
+    ForecastJobStatus,
+    ForecastResponse,
+)
+from app.services.forecast_formats import packb, sse_event, to_batch_item, to_columnar
+from app.services.forecast_jobs import JobQueueFullError, forecast_jobs
 from app.services.forecast_service import ForecastService
+from app.services.worker_pool import WorkerPoolFullError
 
 router = APIRouter()
 
 
+@router.post("/forecast/batch")
+async def batch_forecast(
+    request: BatchForecastRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream one record per region as each forecast completes.
+
+    ``json`` and ``columnar`` stream NDJSON lines; ``msgpack`` streams
+    concatenated MessagePack maps.
+    """
+    service = ForecastService(db)
+    region_ids = None if request.region_ids == "all" else request.region_ids
+
+    async def records():
+        async for result in service.generate_batch(region_ids, request.days, request.model):
+            if request.format == "msgpack":
+                yield packb(to_batch_item(result, "columnar"))
+            else:
+                yield json.dumps(to_batch_item(result, request.format)) + "\n"
+
+    media_type = "application/msgpack" if request.format == "msgpack" else "application/x-ndjson"
+    return StreamingResponse(records(), media_type=media_type)
+
+
+@router.get("/forecast/stream")
+async def stream_forecasts(
+    regions: str = Query(default="all", pattern=r"^(all|\d+(,\d+)*)$"),
+    days: int = Query(default=30, ge=7, le=365),
+    model: str = Query(default="fourier", pattern="^(prophet|arima|hybrid|fourier)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Server-sent events: one ``forecast`` (columnar) or ``error`` event per
+    region as soon as it is ready, then a ``summary`` event.
+
+    ``regions`` is ``all`` or a comma-separated list of region IDs.
+    """
+    service = ForecastService(db)
+    region_ids = None if regions == "all" else [int(r) for r in regions.split(",")]
+
+    async def events():
+        started = time.monotonic()
+        done = failed = 0
+        async for result in service.generate_batch(region_ids, days, model):
+            if isinstance(result, BatchForecastError):
+                failed += 1
+                yield sse_event("error", result.model_dump(mode="json"))
+            else:
+                done += 1
+                yield sse_event("forecast", to_columnar(result))
+        yield sse_event(
+            "summary",
+            {"regions_done": done, "regions_failed": failed, "elapsed_s": round(time.monotonic() - started, 2)},
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Stop reverse proxies from buffering the stream until it ends
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/forecast/jobs", status_code=202, response_model=ForecastJobStatus)
+async def submit_forecast_job(request: ForecastJobRequest):
+    """Queue a forecast run and return its job id without waiting for the fits."""
+    region_ids = None if request.region_ids == "all" else request.region_ids
+    try:
+        job = forecast_jobs.submit(region_ids, request.days, request.model)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return job.status(include_results=False)
+
+
+@router.get("/forecast/jobs/{job_id}", response_model=ForecastJobStatus)
+async def get_forecast_job(job_id: str):
+    """Job progress, plus the results gathered so far."""
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Forecast job {job_id} not found or expired")
+    return job.status()
+
+
 @router.get("/forecast/{region_id}", response_model=ForecastResponse)
 async def get_forecast(
     region_id: int,
     days: int = Query(default=30, ge=7, le=365),
-    model: str = Query(default="prophet", pattern="^(prophet|arima|hybrid)$"),
+    model: str = Query(default="fourier", pattern="^(prophet|arima|hybrid|fourier)$"),
+    format: str = Query(default="json", pattern="^(json|columnar|msgpack)$"),
     db: AsyncSession = Depends(get_db),
 ):
+    """Forecast one region.
+
+    ``format=columnar`` returns ``dates``/``predicted``/``lower``/``upper``
+    as parallel arrays instead of a list of points; ``format=msgpack`` is
+    the same columnar payload MessagePack-encoded.
+    """
     service = ForecastService(db)
     try:
-        return await service.generate_forecast(region_id, days, model)
+        forecast = await service.generate_forecast(region_id, days, model)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except WorkerPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+    if format == "json":
+        return forecast.to_response()
+    # Returned as-is: no point objects are built for the compact formats
+    if format == "columnar":
+        return JSONResponse(to_columnar(forecast))
+    return Response(packb(to_columnar(forecast)), media_type="application/msgpack")
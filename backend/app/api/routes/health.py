@@ -3,6 +3,9 @@ from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_db
+from app.services.arima_service import r_circuit
+from app.services.r_worker_pool import r_worker_pool
+from app.services.worker_pool import cpu_pool
 
 router = APIRouter()
 
@@ -19,4 +22,14 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         "status": "healthy",
         "database": db_status,
         "version": "1.0.0",
+        "workers": cpu_pool.stats(),
+    }
+
+
+@router.get("/health/r")
+async def r_health():
+    """State of the R ARIMA circuit breaker and worker pool."""
+    return {
+        "circuit": r_circuit.stats(),
+        "workers": r_worker_pool.stats(),
     }
@@ -185,6 +185,36 @@ MIGRATIONS = [
         END $$;
         """,
     ),
+    (
+        "005_forecast_runs",
+        """
+        ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS requested_model VARCHAR(20);
+        ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS horizon INTEGER;
+        ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS data_through DATE;
+        ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS data_rows INTEGER;
+        CREATE INDEX IF NOT EXISTS idx_forecasts_run ON forecasts (region_id, requested_model, horizon);
+        """,
+    ),
+    (
+        "006_arima_orders",
+        """
+        CREATE TABLE IF NOT EXISTS arima_orders (
+            region_id INTEGER PRIMARY KEY REFERENCES regions(id) ON DELETE CASCADE,
+            p INTEGER NOT NULL,
+            d INTEGER NOT NULL,
+            q INTEGER NOT NULL,
+            aic FLOAT,
+            params JSON NOT NULL,
+            selected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+        );
+        """,
+    ),
+    (
+        "007_forecast_resolution",
+        """
+        ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS resolution VARCHAR(10) NOT NULL DEFAULT 'daily';
+        """,
+    ),
 ]
 
 
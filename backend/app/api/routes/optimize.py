@@ -1,9 +1,17 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.dependencies import get_db
-from app.schemas.optimize import OptimizationRequest, OptimizationResponse
+from app.schemas.optimize import (
+    OptimizationRequest,
+    OptimizationResponse,
+    OptimizationSweepRequest,
+    OptimizationSweepResponse,
+    PlanRequest,
+    PlanResponse,
+)
 from app.services.optimizer_service import OptimizerService
+from app.services.worker_pool import WorkerPoolFullError
 
 router = APIRouter()
 
@@ -14,4 +22,35 @@ async def optimize_budget(
     db: AsyncSession = Depends(get_db),
 ):
     service = OptimizerService(db)
-    return await service.optimize(request)
+    try:
+        return await service.optimize(request)
+    except WorkerPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.post("/optimize/sweep", response_model=OptimizationSweepResponse)
+async def optimize_sweep(
+    request: OptimizationSweepRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Cases prevented against budget for evenly spaced budgets in one call."""
+    service = OptimizerService(db)
+    try:
+        return await service.sweep(request)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/optimize/plan", response_model=PlanResponse)
+async def optimize_plan(
+    request: PlanRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Allocate a budget per region per month, driven by the forecasts."""
+    service = OptimizerService(db)
+    try:
+        return await service.plan(request)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except WorkerPoolFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
@@ -0,0 +1,29 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.security import verify_api_key
+from app.services.precompute import precompute_job
+
+router = APIRouter()
+
+# Keep a reference so the manually triggered run isn't garbage collected
+_manual_run: asyncio.Task | None = None
+
+
+@router.get("/precompute/status")
+async def precompute_status():
+    """Progress of the current or most recent forecast precompute run."""
+    return precompute_job.status()
+
+
+@router.post("/precompute/run", status_code=202, dependencies=[Depends(verify_api_key)])
+async def trigger_precompute():
+    """Start a precompute run in the background."""
+    global _manual_run
+    if precompute_job.running:
+        raise HTTPException(status_code=409, detail="Precompute is already running")
+    _manual_run = asyncio.create_task(precompute_job.run())
+    # Let the run take its lock before responding, so status reads "running"
+    await asyncio.sleep(0)
+    return precompute_job.status()
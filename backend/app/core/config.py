@@ -9,6 +9,41 @@ class Settings(BaseSettings):
 
     r_timeout: int = 300
     r_script_path: str = "./app/r_scripts"
+    r_workers: int = 2
+    r_worker_command: str = ""
+    r_health_interval: int = 60
+    r_breaker_failures: int = 3
+    r_breaker_cooldown: int = 300
+
+    arima_refit_hours: int = 168
+    arima_drift_threshold: float = 9.0
+    arima_max_p: int = 3
+    arima_max_d: int = 2
+    arima_max_q: int = 3
+    arima_order_max_age_days: int = 30
+
+    forecast_cache_max_entries: int = 256
+    forecast_cache_max_mb: int = 64
+
+    cpu_workers: int = 0
+    cpu_queue_depth: int = 32
+    cpu_job_timeout: int = 120
+    cpu_pool_processes: bool = True
+    hybrid_timeout: int = 150
+    forecast_max_horizon: int = 365
+    forecast_lookback_days: dict[str, int] = {"prophet": 1095, "arima": 730, "hybrid": 1095, "fourier": 1095}
+    forecast_weekly_after_days: int = 0
+
+    forecast_job_workers: int = 2
+    forecast_job_max_active: int = 50
+    forecast_job_ttl: int = 3600
+
+    precompute_time: str = ""
+    precompute_on_startup: bool = False
+    precompute_days: int = 30
+    precompute_models: str = "arima,fourier"
+    precompute_concurrency: int = 2
+    geojson_cache_ttl: int = 3600
 
     nlp_model: str = "facebook/bart-large-cnn"
     nlp_max_length: int = 130
@@ -1,11 +1,16 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import forecast, health, migrate, optimize, regions, reports
+from app.api.routes import forecast, health, migrate, optimize, precompute, regions, reports
 from app.core.config import settings
+from app.services.forecast_jobs import forecast_jobs
+from app.services.precompute import parse_run_time, precompute_job
+from app.services.r_worker_pool import r_worker_pool
+from app.services.worker_pool import cpu_pool
 
 logging.basicConfig(level=getattr(logging, settings.log_level.upper()))
 logger = logging.getLogger(__name__)
@@ -14,8 +19,18 @@ logger = logging.getLogger(__name__)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("VCOM-TZ API starting up")
+    background = [asyncio.create_task(r_worker_pool.run_health_checks(settings.r_health_interval))]
+    if settings.precompute_time:
+        background.append(asyncio.create_task(precompute_job.run_daily(parse_run_time(settings.precompute_time))))
+    if settings.precompute_on_startup:
+        background.append(asyncio.create_task(precompute_job.run()))
     yield
     logger.info("VCOM-TZ API shutting down")
+    for task in background:
+        task.cancel()
+    forecast_jobs.shutdown()
+    await r_worker_pool.shutdown()
+    cpu_pool.shutdown()
 
 
 app = FastAPI(
@@ -42,4 +57,5 @@ app.include_router(regions.router, prefix="/api/v1", tags=["Regions"])
 app.include_router(forecast.router, prefix="/api/v1", tags=["Forecast"])
 app.include_router(optimize.router, prefix="/api/v1", tags=["Optimization"])
 app.include_router(reports.router, prefix="/api/v1", tags=["Reports"])
+app.include_router(precompute.router, prefix="/api/v1", tags=["Precompute"])
 app.include_router(migrate.router, prefix="/api/v1", tags=["Migration"])
@@ -2,5 +2,6 @@ from app.models.region import Region
 from app.models.surveillance import SurveillanceData
 from app.models.forecast import Forecast
 from app.models.optimization import OptimizationResult
+from app.models.arima_order import ARIMAOrder
 
-__all__ = ["Region", "SurveillanceData", "Forecast", "OptimizationResult"]
+__all__ = ["Region", "SurveillanceData", "Forecast", "OptimizationResult", "ARIMAOrder"]
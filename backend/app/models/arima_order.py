@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer
+
+from app.models.database import Base
+
+
+class ARIMAOrder(Base):
+    __tablename__ = "arima_orders"
+
+    region_id = Column(Integer, ForeignKey("regions.id", ondelete="CASCADE"), primary_key=True)
+    p = Column(Integer, nullable=False)
+    d = Column(Integer, nullable=False)
+    q = Column(Integer, nullable=False)
+    aic = Column(Float)
+    params = Column(JSON, nullable=False)
+    selected_at = Column(DateTime(timezone=True), default=datetime.utcnow)
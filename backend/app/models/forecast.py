@@ -1,16 +1,25 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, DateTime, Float, ForeignKey, Index, Integer, String
 
 from app.models.database import Base
 
 
 class Forecast(Base):
     __tablename__ = "forecasts"
+    __table_args__ = (
+        Index("idx_forecasts_region", "region_id", "forecast_date"),
+        Index("idx_forecasts_run", "region_id", "requested_model", "horizon"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     region_id = Column(Integer, ForeignKey("regions.id", ondelete="CASCADE"), nullable=False)
     model_type = Column(String(20), nullable=False, default="prophet")
+    requested_model = Column(String(20))
+    horizon = Column(Integer)
+    resolution = Column(String(10), nullable=False, default="daily")
+    data_through = Column(Date)
+    data_rows = Column(Integer)
     forecast_date = Column(Date, nullable=False)
     predicted_density = Column(Float, nullable=False)
     lower_ci = Column(Float)
@@ -1,6 +1,8 @@
-from datetime import date
+from datetime import date, datetime
 
-from pydantic import BaseModel
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 
 class ForecastPoint(BaseModel):
@@ -18,3 +20,35 @@ class ForecastResponse(BaseModel):
     model_type: str
     forecast_days: int
     points: list[ForecastPoint]
+
+
+class BatchForecastRequest(BaseModel):
+    region_ids: list[int] | Literal["all"] = Field(..., description='Region IDs to forecast, or "all"')
+    days: int = Field(default=30, ge=7, le=365)
+    model: str = Field(default="fourier", pattern="^(prophet|arima|hybrid|fourier)$")
+    format: str = Field(default="json", pattern="^(json|columnar|msgpack)$")
+
+
+class BatchForecastError(BaseModel):
+    region_id: int
+    detail: str
+
+
+class ForecastJobRequest(BaseModel):
+    region_ids: list[int] | Literal["all"] = Field(..., description='Region IDs to forecast, or "all"')
+    days: int = Field(default=30, ge=7, le=365)
+    model: str = Field(default="fourier", pattern="^(prophet|arima|hybrid|fourier)$")
+
+
+class ForecastJobStatus(BaseModel):
+    job_id: str
+    state: str
+    model: str
+    days: int
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    regions_done: int = 0
+    regions_failed: int = 0
+    error: str | None = None
+    results: list[ForecastResponse | BatchForecastError] | None = None
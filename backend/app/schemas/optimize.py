@@ -1,9 +1,23 @@
-from pydantic import BaseModel, Field
+from datetime import date
+
+from pydantic import BaseModel, Field, model_validator
 
 
 class OptimizationRequest(BaseModel):
     budget_usd: float = Field(..., gt=0, description="Total budget in USD")
     region_ids: list[int] = Field(..., min_length=1, description="List of region IDs to optimize for")
+    rebalance_regions: bool = Field(
+        default=False,
+        description="Let each region's spend move within the flex band of its density share",
+    )
+    objective: str = Field(
+        default="point",
+        pattern="^(point|expected|cvar)$",
+        description="point: use the efficacy/cost estimates; expected or cvar: optimize over sampled scenarios",
+    )
+    scenarios: int = Field(default=2000, ge=100, le=20000, description="Scenarios sampled for robust objectives")
+    cvar_alpha: float = Field(default=0.1, gt=0, le=0.5, description="Worst-case share of scenarios for cvar")
+    seed: int = Field(default=0, description="Scenario sampling seed")
 
 
 class RegionAllocation(BaseModel):
@@ -16,8 +30,86 @@ class RegionAllocation(BaseModel):
     cases_prevented: float
 
 
+class RiskSummary(BaseModel):
+    objective: str
+    scenarios: int
+    cvar_alpha: float
+    expected_cases_prevented: float
+    cvar_cases_prevented: float
+    percentiles: dict[str, float]
+
+
 class OptimizationResponse(BaseModel):
     total_budget: float
     total_cost: float
     total_cases_prevented: float
+    weighted_cases_prevented: float
+    allocations: list[RegionAllocation]
+    risk: RiskSummary | None = None
+
+
+class OptimizationSweepRequest(BaseModel):
+    budget_min: float = Field(..., gt=0, description="Smallest budget in USD")
+    budget_max: float = Field(..., gt=0, description="Largest budget in USD")
+    steps: int = Field(default=20, ge=2, le=500, description="Number of evenly spaced budgets")
+    region_ids: list[int] = Field(..., min_length=1, description="List of region IDs to optimize for")
+    rebalance_regions: bool = False
+
+    @model_validator(mode="after")
+    def check_range(self):
+        if self.budget_max < self.budget_min:
+            raise ValueError("budget_max must be at least budget_min")
+        return self
+
+
+class SweepPoint(BaseModel):
+    budget: float
+    total_cost: float
+    total_cases_prevented: float
+    marginal_cases_per_usd: float | None = None
+
+
+class OptimizationSweepResponse(BaseModel):
+    region_ids: list[int]
+    points: list[SweepPoint]
+
+
+class PlanRequest(BaseModel):
+    budget_usd: float = Field(..., gt=0, description="Total budget in USD across all periods")
+    region_ids: list[int] = Field(..., min_length=1, description="List of region IDs to plan for")
+    periods: int = Field(default=6, ge=1, le=12, description="Number of 30-day periods")
+    period_weights: list[float] | None = Field(
+        default=None, description="Relative funding released each period (default: even)"
+    )
+    model: str = Field(default="fourier", pattern="^(prophet|arima|hybrid|fourier)$")
+
+    @model_validator(mode="after")
+    def check_weights(self):
+        if self.period_weights is not None:
+            if len(self.period_weights) != self.periods:
+                raise ValueError("period_weights needs one entry per period")
+            if min(self.period_weights) < 0 or sum(self.period_weights) <= 0:
+                raise ValueError("period_weights must be non-negative with a positive sum")
+        return self
+
+
+class PlanPeriod(BaseModel):
+    period: int
+    start_date: date
+    end_date: date
+    funding: float
+    cost: float
+    cases_prevented: float
     allocations: list[RegionAllocation]
+
+
+class PlanResponse(BaseModel):
+    total_budget: float
+    total_cost: float
+    total_cases_prevented: float
+    forecast_model: str
+    forecast_sources: dict[str, int]
+    refit_regions: list[int] = Field(
+        default=[], description="Regions fitted with Fourier because no forecast of the requested model was stored"
+    )
+    periods: list[PlanPeriod]
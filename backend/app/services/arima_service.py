@@ -1,115 +1,435 @@
 import asyncio
-import json
 import logging
-import os
+import time
+import warnings
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
 
 import numpy as np
 import pandas as pd
 
 from app.core.config import settings
-from app.schemas.forecast import ForecastPoint
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.forecast_series import ForecastSeries
+from app.services.r_worker_pool import RWorkerError, r_worker_pool
+from app.services.single_flight import SingleFlight
+from app.services.worker_pool import WorkerPoolFullError, cpu_pool
 
 logger = logging.getLogger(__name__)
 
+# Trips on infrastructure failures (R missing, worker crashes, timeouts), not
+# on R rejecting a particular series
+r_circuit = CircuitBreaker(
+    "r-arima",
+    failure_threshold=settings.r_breaker_failures,
+    cooldown=settings.r_breaker_cooldown,
+)
+
+
+@dataclass(frozen=True)
+class ARIMAState:
+    """Estimated parameters plus the Kalman filter state at the last observation.
+
+    ``anchor`` is the index of the last observation the state has seen;
+    ``predicted_state``/``predicted_cov`` are the filter's prediction for
+    that observation, so it can be filtered again together with new ones.
+    The anchor is found again by date, so a training window that slides
+    forward as data arrives does not force a refit.
+    """
+
+    order: tuple[int, int, int]
+    params: np.ndarray
+    fitted_at: float
+    anchor: int = -1
+    anchor_date: pd.Timestamp | None = None
+    anchor_value: float | None = None
+    predicted_state: np.ndarray | None = None
+    predicted_cov: np.ndarray | None = None
+
+    def locate(self, values: np.ndarray, dates: pd.Series) -> int | None:
+        """Index of the anchor observation in this history, or None if it was rewritten."""
+        if self.anchor_date is None:
+            return None
+        anchor = int(dates.searchsorted(self.anchor_date))
+        if (
+            anchor >= len(values)
+            or dates.iloc[anchor] != self.anchor_date
+            or float(values[anchor]) != self.anchor_value
+        ):
+            return None
+        return anchor
+
+    def advance(self, fitted, offset: int, values: np.ndarray, dates: pd.Series) -> "ARIMAState":
+        """State after ``fitted``, which was filtered over ``values[offset:]``."""
+        last = len(values) - 1 - offset
+        filter_results = fitted.filter_results
+        return replace(
+            self,
+            anchor=len(values) - 1,
+            anchor_date=dates.iloc[-1],
+            anchor_value=float(values[-1]),
+            predicted_state=filter_results.predicted_state[:, last].copy(),
+            predicted_cov=filter_results.predicted_state_cov[:, :, last].copy(),
+        )
+
+
+def _extend_arima_state(state: ARIMAState, values: np.ndarray, dates: pd.Series):
+    """Filter the observations since ``state`` with its fixed parameters.
+
+    Returns the filter results, or None when a full refit is needed: the
+    history was rewritten, or the new observations are too surprising for
+    the current parameters (mean squared standardized error above the
+    drift threshold).
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    anchor = state.locate(values, dates)
+    if anchor is None:
+        return None
+
+    model = ARIMA(values[anchor:], order=state.order)
+    model.initialize_known(state.predicted_state, state.predicted_cov)
+    fitted = model.filter(state.params)
+
+    # The anchor observation was already seen by the previous fit
+    errors = fitted.filter_results.standardized_forecasts_error[0, 1:]
+    if len(errors) and float(np.nanmean(errors ** 2)) > settings.arima_drift_threshold:
+        logger.info("ARIMA drift detected over %d new observations, refitting", len(errors))
+        return None
+    return fitted
+
+
+# Fitted statsmodels ARIMA state per region, for incremental updates
+arima_states: dict[int, ARIMAState] = {}
+
+
+@dataclass(frozen=True)
+class OrderChoice:
+    """ARIMA order picked by the AIC search, with its fitted parameters as start values."""
+
+    order: tuple[int, int, int]
+    params: list[float]
+    aic: float | None
+    selected_at: datetime
+
+
+class OrderRegistry:
+    """Chosen ARIMA order per region.
+
+    ForecastService loads entries from the ``arima_orders`` table before
+    fitting and saves the newly selected ones afterwards; ARIMAService only
+    reads and records here, so it never needs a database session.
+    """
+
+    def __init__(self):
+        self._orders: dict[int, OrderChoice] = {}
+        self._unsaved: set[int] = set()
+
+    def get(self, key: int) -> OrderChoice | None:
+        choice = self._orders.get(key)
+        if choice is None:
+            return None
+        if datetime.utcnow() - choice.selected_at > timedelta(days=settings.arima_order_max_age_days):
+            return None
+        return choice
+
+    def load(self, key: int, choice: OrderChoice) -> None:
+        if key not in self._unsaved:
+            self._orders[key] = choice
+
+    def record(self, key: int, choice: OrderChoice) -> None:
+        self._orders[key] = choice
+        self._unsaved.add(key)
+
+    def take_unsaved(self) -> dict[int, OrderChoice]:
+        unsaved = {key: self._orders[key] for key in self._unsaved}
+        self._unsaved.clear()
+        return unsaved
+
+    def clear(self) -> None:
+        self._orders.clear()
+        self._unsaved.clear()
+
+
+arima_orders = OrderRegistry()
+order_flights = SingleFlight("arima-order")
+
 
 class ARIMAService:
     def __init__(self):
-        self.r_script = os.path.join(settings.r_script_path, "arima_forecast.R")
         self.timeout = settings.r_timeout
 
-    async def forecast(self, df: pd.DataFrame, days: int) -> list[ForecastPoint]:
-        """Try R-based ARIMA first, fall back to Python statsmodels."""
+    async def forecast(self, df: pd.DataFrame, days: int, key: int | None = None) -> ForecastSeries:
+        """Try R-based ARIMA first, fall back to Python statsmodels.
+
+        ``key`` identifies the series (the region id) so the statsmodels
+        fallback can update its previous fit instead of starting over.
+        """
+        if not r_circuit.allow():
+            logger.debug("R ARIMA circuit open, using Python statsmodels fallback")
+            return await self._python_forecast(df, days, key)
+
         try:
-            return await self._r_forecast(df, days)
-        except (RuntimeError, FileNotFoundError, OSError) as e:
+            series = await self._r_forecast(df, days)
+        except asyncio.CancelledError:
+            # The caller went away (client disconnect, hybrid deadline); says nothing about R
+            r_circuit.release_trial()
+            raise
+        except RWorkerError as e:
+            r_circuit.record_failure()
             logger.warning("R ARIMA unavailable (%s), using Python statsmodels fallback", e)
-            return await self._python_forecast(df, days)
+            return await self._python_forecast(df, days, key)
+        except (RuntimeError, FileNotFoundError, OSError) as e:
+            # R answered but could not fit this series, so it is reachable
+            r_circuit.record_success()
+            logger.warning("R ARIMA failed (%s), using Python statsmodels fallback", e)
+            return await self._python_forecast(df, days, key)
 
-    async def _r_forecast(self, df: pd.DataFrame, days: int) -> list[ForecastPoint]:
-        input_data = {
+        r_circuit.record_success()
+        return series
+
+    @staticmethod
+    def _series_payload(df: pd.DataFrame) -> dict:
+        return {
             "dates": [d.isoformat() if hasattr(d, "isoformat") else str(d) for d in df["ds"]],
             "values": df["y"].tolist(),
-            "horizon": days,
         }
 
+    @staticmethod
+    def _parse_series(rows: list[dict]) -> ForecastSeries:
         try:
-            process = await asyncio.create_subprocess_exec(
-                "Rscript", self.r_script,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
+            return ForecastSeries.of(
+                [point["date"] for point in rows],
+                [point["forecast"] for point in rows],
+                [point["lower"] for point in rows],
+                [point["upper"] for point in rows],
             )
+        except (KeyError, TypeError, ValueError) as e:
+            raise RuntimeError(f"Unexpected R ARIMA output: {e}")
 
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(input=json.dumps(input_data).encode()),
-                timeout=self.timeout,
-            )
+    async def _r_forecast(self, df: pd.DataFrame, days: int) -> ForecastSeries:
+        input_data = {**self._series_payload(df), "horizon": days}
+
+        result = await r_worker_pool.submit(input_data, timeout=self.timeout)
+        if "error" in result:
+            logger.error("R ARIMA error: %s", result["error"])
+            raise RuntimeError(f"R ARIMA failed: {str(result['error'])[:500]}")
+        if "forecasts" not in result:
+            raise RuntimeError("Unexpected R ARIMA output: missing forecasts")
+        return self._parse_series(result["forecasts"])
+
+    async def _r_forecast_batch(
+        self, histories: dict[int, pd.DataFrame], days: int
+    ) -> tuple[dict[int, ForecastSeries], dict[int, str]]:
+        """Forecast several series in one R job. Returns (forecasts, per-key errors)."""
+        input_data = {
+            "series": {str(key): self._series_payload(df) for key, df in histories.items()},
+            "horizon": days,
+        }
+        result = await r_worker_pool.submit(input_data, timeout=self.timeout)
+        if "error" in result:
+            raise RuntimeError(f"R ARIMA failed: {str(result['error'])[:500]}")
 
-            if process.returncode != 0:
-                logger.error("R ARIMA error: %s", stderr.decode())
-                raise RuntimeError(f"R ARIMA failed: {stderr.decode()[:500]}")
+        # jsonlite encodes an empty named list as [], hence the "or {}"
+        forecasts = {int(key): self._parse_series(rows) for key, rows in (result.get("forecasts") or {}).items()}
+        errors = {int(key): str(message) for key, message in (result.get("errors") or {}).items()}
+        return forecasts, errors
 
-            result = json.loads(stdout.decode())
+    async def forecast_many(
+        self, histories: dict[int, pd.DataFrame], days: int, concurrency: int | None = None
+    ) -> dict[int, ForecastSeries]:
+        """Forecast many series (e.g. every region) with as few R jobs as possible.
 
-            return [
-                ForecastPoint(
-                    date=point["date"],
-                    predicted_density=max(0, round(point["forecast"], 2)),
-                    lower_ci=max(0, round(point["lower"], 2)),
-                    upper_ci=max(0, round(point["upper"], 2)),
+        Series are split into one batch job per R worker, so a national run
+        pays for one job per worker instead of one per region. Any series R
+        cannot fit goes through the statsmodels fallback individually, at
+        most ``concurrency`` at a time (default: the CPU pool size). Series
+        the fallback cannot fit either are left out of the result, so the
+        caller can retry or report just those.
+        """
+        results: dict[int, ForecastSeries] = {}
+        if histories and r_circuit.allow():
+            keys = list(histories)
+            chunk_count = max(1, min(r_worker_pool.size, len(keys)))
+            chunks = [keys[i::chunk_count] for i in range(chunk_count)]
+            try:
+                outcomes = await asyncio.gather(
+                    *[self._r_forecast_batch({k: histories[k] for k in chunk}, days) for chunk in chunks],
+                    return_exceptions=True,
                 )
-                for point in result["forecasts"]
-            ]
-
-        except FileNotFoundError:
-            logger.error("Rscript not found. Ensure R is installed and in PATH.")
-            raise RuntimeError("Rscript not found. R is not installed or not in PATH.")
-        except OSError as e:
-            logger.error("OS error running R ARIMA: %s", e)
-            raise RuntimeError(f"Failed to run R ARIMA subprocess: {e}")
-        except asyncio.TimeoutError:
-            raise RuntimeError(f"R ARIMA timed out after {self.timeout}s")
-        except json.JSONDecodeError as e:
-            raise RuntimeError(f"Failed to parse R output: {e}")
-
-    async def _python_forecast(self, df: pd.DataFrame, days: int) -> list[ForecastPoint]:
-        """Pure Python ARIMA forecast using statsmodels."""
+            except asyncio.CancelledError:
+                r_circuit.release_trial()
+                raise
+
+            worker_failed = False
+            for outcome in outcomes:
+                if isinstance(outcome, RWorkerError):
+                    worker_failed = True
+                    logger.warning("R ARIMA batch unavailable (%s), using statsmodels fallback", outcome)
+                elif isinstance(outcome, Exception):
+                    logger.warning("R ARIMA batch failed (%s), using statsmodels fallback", outcome)
+                else:
+                    forecasts, errors = outcome
+                    results.update(forecasts)
+                    for key, message in errors.items():
+                        logger.warning("R ARIMA failed for series %s: %s", key, message)
+            if worker_failed:
+                r_circuit.record_failure()
+            else:
+                r_circuit.record_success()
+
+        remaining = [key for key in histories if key not in results]
+        if remaining:
+            slots = asyncio.Semaphore(min(concurrency or cpu_pool.max_workers, cpu_pool.max_workers))
+
+            async def fallback(key: int) -> ForecastSeries:
+                async with slots:
+                    return await self._python_forecast(histories[key], days, key)
+
+            fitted = await asyncio.gather(*[fallback(key) for key in remaining], return_exceptions=True)
+            for key, outcome in zip(remaining, fitted):
+                if isinstance(outcome, Exception):
+                    logger.warning("statsmodels ARIMA failed for series %s: %s", key, outcome)
+                else:
+                    results[key] = outcome
+        return results
+
+    async def _python_forecast(
+        self, df: pd.DataFrame, days: int, key: int | None = None
+    ) -> ForecastSeries:
+        """Pure Python ARIMA forecast using statsmodels, run on the CPU worker pool.
+
+        With a ``key`` (the region id) the region's order is chosen once by
+        AIC search and reused, and the fitted state is kept between calls so
+        new days are filtered in with the existing parameters; a full refit
+        happens after ``ARIMA_REFIT_HOURS`` or when the new days drift away
+        from what the model expects.
+        """
+        choice = None
+        state = None
+        if key is not None:
+            choice = await self._get_order(key, df)
+            state = arima_states.get(key)
+            if state is not None and (
+                time.time() - state.fitted_at > settings.arima_refit_hours * 3600
+                or (choice is not None and state.order != choice.order)
+            ):
+                state = None
+        series, state = await cpu_pool.run(self._fit_statsmodels_arima, df, days, state, choice)
+        if key is not None:
+            arima_states[key] = state
+        return series
+
+    async def _get_order(self, key: int, df: pd.DataFrame) -> OrderChoice | None:
+        choice = arima_orders.get(key)
+        if choice is not None:
+            return choice
+        try:
+            choice = await order_flights.do(key, lambda: self.select_order(df))
+        except WorkerPoolFullError:
+            raise
+        except Exception as e:
+            logger.warning("ARIMA order search failed for series %s: %s", key, e)
+            return None
+        arima_orders.record(key, choice)
+        return choice
+
+    async def select_order(self, df: pd.DataFrame) -> OrderChoice:
+        """Pick (p, d, q) for a series: d by KPSS test, then p and q by AIC.
+
+        The whole search is one CPU pool job, like a single fit: callers
+        already fit up to ``max_workers`` regions at once, and fanning the
+        candidates out as well would overrun the pool queue. A rejected
+        search raises WorkerPoolFullError rather than choosing from a
+        partial grid.
+        """
+        values = df["y"].values.astype(float)
+        order, aic, params, tried = await cpu_pool.run(
+            self._search_order, values, settings.arima_max_d, settings.arima_max_p, settings.arima_max_q
+        )
+        logger.info("Selected ARIMA%s (AIC %.1f) from %d candidates", order, aic, tried)
+        return OrderChoice(order=order, params=params, aic=aic, selected_at=datetime.utcnow())
+
+    @staticmethod
+    def _search_order(values: np.ndarray, max_d: int, max_p: int, max_q: int):
+        """Returns (order, aic, params, candidates tried) for the lowest-AIC order."""
+        d = ARIMAService._choose_differencing(values, max_d)
+        candidates = [(p, d, q) for p in range(max_p + 1) for q in range(max_q + 1)]
+        fitted = [
+            outcome
+            for outcome in (ARIMAService._fit_order_candidate(values, order) for order in candidates)
+            if outcome is not None
+        ]
+        if not fitted:
+            raise RuntimeError(f"No ARIMA order could be fitted (tried {len(candidates)})")
+        order, aic, params = min(fitted, key=lambda o: o[1])
+        return order, aic, params, len(candidates)
+
+    @staticmethod
+    def _choose_differencing(values: np.ndarray, max_d: int) -> int:
+        """Smallest d for which KPSS does not reject stationarity (as auto.arima's ndiffs)."""
+        from statsmodels.tsa.stattools import kpss
+
+        series = values
+        for d in range(max_d + 1):
+            if len(series) < 10 or np.ptp(series) == 0:
+                return d
+            with warnings.catch_warnings():
+                # p-values outside the lookup table range only trigger a warning
+                warnings.simplefilter("ignore")
+                p_value = kpss(series, regression="c", nlags="auto")[1]
+            if p_value >= 0.05:
+                return d
+            series = np.diff(series)
+        return max_d
+
+    @staticmethod
+    def _fit_order_candidate(values: np.ndarray, order: tuple[int, int, int]):
+        """Returns (order, aic, params), or None if the order cannot be fitted."""
         from statsmodels.tsa.arima.model import ARIMA
 
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._fit_statsmodels_arima, df, days)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                fitted = ARIMA(values, order=order).fit()
+        except Exception:
+            return None
+        if not np.isfinite(fitted.aic):
+            return None
+        return order, float(fitted.aic), [float(v) for v in fitted.params]
 
     @staticmethod
-    def _fit_statsmodels_arima(df: pd.DataFrame, days: int) -> list[ForecastPoint]:
+    def _fit_statsmodels_arima(
+        df: pd.DataFrame, days: int, state: ARIMAState | None = None, choice: OrderChoice | None = None
+    ) -> tuple[ForecastSeries, ARIMAState]:
         from statsmodels.tsa.arima.model import ARIMA
-        from datetime import timedelta
 
         values = df["y"].values.astype(float)
-        last_date = pd.to_datetime(df["ds"].iloc[-1])
+        dates = pd.to_datetime(df["ds"])
+        last_date = dates.iloc[-1]
 
-        try:
-            model = ARIMA(values, order=(2, 1, 2))
-            fitted = model.fit()
-            forecast_result = fitted.get_forecast(steps=days)
-            predicted = forecast_result.predicted_mean
-            ci = forecast_result.conf_int(alpha=0.05)
-        except Exception:
-            # Fallback to simpler model if (2,1,2) fails
-            model = ARIMA(values, order=(1, 1, 1))
-            fitted = model.fit()
-            forecast_result = fitted.get_forecast(steps=days)
-            predicted = forecast_result.predicted_mean
-            ci = forecast_result.conf_int(alpha=0.05)
-
-        points = []
-        for i in range(days):
-            forecast_date = (last_date + timedelta(days=i + 1)).date()
-            points.append(
-                ForecastPoint(
-                    date=forecast_date,
-                    predicted_density=max(0, round(float(predicted[i]), 2)),
-                    lower_ci=max(0, round(float(ci[i, 0]), 2)),
-                    upper_ci=max(0, round(float(ci[i, 1]), 2)),
-                )
-            )
-        return points
+        fitted = _extend_arima_state(state, values, dates) if state is not None else None
+        if fitted is None:
+            try:
+                if choice is not None:
+                    order = choice.order
+                    fitted = ARIMA(values, order=order).fit(start_params=choice.params)
+                else:
+                    order = (2, 1, 2)
+                    fitted = ARIMA(values, order=order).fit()
+            except Exception:
+                # Fallback to simpler model if the chosen order fails
+                order = (1, 1, 1)
+                fitted = ARIMA(values, order=order).fit()
+            state = ARIMAState(order=order, params=fitted.params, fitted_at=time.time())
+            anchor = 0
+        else:
+            anchor = state.locate(values, dates)
+        state = state.advance(fitted, anchor, values, dates)
+
+        forecast_result = fitted.get_forecast(steps=days)
+        predicted = forecast_result.predicted_mean
+        ci = forecast_result.conf_int(alpha=0.05)
+
+        series = ForecastSeries.after(last_date.date(), predicted[:days], ci[:days, 0], ci[:days, 1])
+        return series, state
@@ -0,0 +1,204 @@
+"""Rolling-origin backtest of the forecast engines.
+
+Each region's history is cut at several origins; every engine is fitted on
+the data before an origin and scored on the ``horizon`` days after it.
+Reports accuracy (MAE, MAPE, 95% interval coverage) next to cost (fit
+wall time and peak memory) per engine, so a default model can be chosen
+against the latency budget and regressions show up between runs.
+
+    python -m app.services.backtest --models arima,fourier,statistical --output backtest.json
+
+Fits run on the CPU worker pool, in parallel across regions, origins and
+engines. ARIMA is the in-process statsmodels fit (default order), not the R
+worker, so timings compare like with like.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.models.database import async_session
+from app.services.arima_service import ARIMAService
+from app.services.forecast_series import ForecastSeries
+from app.services.forecast_service import MIN_HISTORY_ROWS, ForecastService
+from app.services.fourier_service import fourier_forecast
+from app.services.worker_pool import cpu_pool
+
+logger = logging.getLogger(__name__)
+
+
+def _prophet(df: pd.DataFrame, days: int) -> ForecastSeries:
+    return ForecastService._prophet_forecast(df, days)
+
+
+def _arima(df: pd.DataFrame, days: int) -> ForecastSeries:
+    return ARIMAService._fit_statsmodels_arima(df, days)[0]
+
+
+def _hybrid(df: pd.DataFrame, days: int) -> ForecastSeries:
+    # Sequential here; the API fits the two halves concurrently
+    return ForecastService._hybrid_forecast(_prophet(df, days), _arima(df, days))
+
+
+ENGINES = {
+    "prophet": _prophet,
+    "arima": _arima,
+    "hybrid": _hybrid,
+    "fourier": fourier_forecast,
+    "statistical": ForecastService._statistical_fallback,
+}
+
+
+def rolling_origins(n: int, horizon: int, folds: int) -> list[int]:
+    """Training lengths for up to ``folds`` origins, the last one ``horizon`` days from the end.
+
+    Origins are ``horizon`` days apart so the test windows don't overlap;
+    origins that would leave fewer than ``MIN_HISTORY_ROWS`` training rows
+    are dropped.
+    """
+    origins = [n - horizon * k for k in range(folds, 0, -1)]
+    return [origin for origin in origins if origin >= MIN_HISTORY_ROWS]
+
+
+def score(actual: np.ndarray, series: ForecastSeries) -> dict:
+    errors = np.abs(series.predicted - actual)
+    nonzero = actual != 0
+    return {
+        "mae": float(errors.mean()),
+        "mape": float((errors[nonzero] / np.abs(actual[nonzero])).mean() * 100) if nonzero.any() else None,
+        "coverage": float(((actual >= series.lower) & (actual <= series.upper)).mean()),
+    }
+
+
+def evaluate_fold(engine: str, train: pd.DataFrame, actual: np.ndarray, track_memory: bool) -> dict:
+    """Fit one engine on one training window and score it. Runs in a worker process."""
+    fit = ENGINES[engine]
+    started = time.perf_counter()
+    series = fit(train, len(actual))
+    result = {"fit_s": time.perf_counter() - started, **score(actual, series)}
+
+    if track_memory:
+        # A second, untimed fit: tracemalloc would inflate the timing above
+        tracemalloc.start()
+        try:
+            fit(train, len(actual))
+            result["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def summarize(runs: list[dict]) -> dict:
+    """Per-engine means of the accuracy metrics and percentiles of fit time."""
+    summary = {}
+    for engine in dict.fromkeys(run["engine"] for run in runs):
+        ok = [run for run in runs if run["engine"] == engine and "error" not in run]
+        failed = sum(1 for run in runs if run["engine"] == engine and "error" in run)
+        entry = {"folds": len(ok), "failed": failed}
+        if ok:
+            fit_s = np.array([run["fit_s"] for run in ok])
+            mapes = [run["mape"] for run in ok if run["mape"] is not None]
+            peaks = [run["peak_mb"] for run in ok if "peak_mb" in run]
+            entry.update({
+                "mae": float(np.mean([run["mae"] for run in ok])),
+                "mape": float(np.mean(mapes)) if mapes else None,
+                "coverage": float(np.mean([run["coverage"] for run in ok])),
+                "fit_s_median": float(np.median(fit_s)),
+                "fit_s_p95": float(np.percentile(fit_s, 95)),
+                "peak_mb_max": float(max(peaks)) if peaks else None,
+            })
+        summary[engine] = entry
+    return summary
+
+
+async def run_backtest(
+    histories: dict[int, pd.DataFrame],
+    engines: list[str],
+    horizon: int = 30,
+    folds: int = 4,
+    track_memory: bool = True,
+) -> dict:
+    unknown = [engine for engine in engines if engine not in ENGINES]
+    if unknown:
+        raise ValueError(f"Unknown engine(s): {', '.join(unknown)}")
+
+    # Keep submissions within the pool's capacity so none are rejected
+    slots = asyncio.Semaphore(cpu_pool.max_workers)
+
+    async def run_fold(engine: str, region_id: int, origin: int) -> dict:
+        df = histories[region_id]
+        train = df.iloc[:origin].reset_index(drop=True)
+        actual = df["y"].to_numpy(dtype=float)[origin:origin + horizon]
+        run = {
+            "engine": engine,
+            "region_id": region_id,
+            "origin": pd.to_datetime(df["ds"].iloc[origin]).date().isoformat(),
+        }
+        async with slots:
+            try:
+                run.update(await cpu_pool.run(evaluate_fold, engine, train, actual, track_memory))
+            except Exception as e:
+                run["error"] = str(e)[:300]
+        return run
+
+    tasks = [
+        run_fold(engine, region_id, origin)
+        for region_id, df in histories.items()
+        for origin in rolling_origins(len(df), horizon, folds)
+        for engine in engines
+    ]
+    started = time.perf_counter()
+    runs = await asyncio.gather(*tasks)
+    return {
+        "generated_at": datetime.utcnow().isoformat(),
+        "horizon": horizon,
+        "folds": folds,
+        "regions": len(histories),
+        "wall_s": time.perf_counter() - started,
+        "engines": summarize(runs),
+        "runs": runs,
+    }
+
+
+async def main(argv: list[str] | None = None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--models", default="prophet,arima,hybrid,fourier,statistical", help="comma-separated engines")
+    parser.add_argument("--horizon", type=int, default=30)
+    parser.add_argument("--folds", type=int, default=4)
+    parser.add_argument("--regions", default="", help="comma-separated region IDs (default: all)")
+    parser.add_argument("--output", default="backtest_results.json")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak-memory measurement fits")
+    args = parser.parse_args(argv)
+
+    engines = [m.strip() for m in args.models.split(",") if m.strip()]
+    async with async_session() as session:
+        service = ForecastService(session)
+        region_ids = (
+            [int(r) for r in args.regions.split(",")] if args.regions else list(await service._get_region_names())
+        )
+        histories = await service._get_historical_data_many(region_ids)
+
+    try:
+        report = await run_backtest(histories, engines, args.horizon, args.folds, not args.no_memory)
+    finally:
+        cpu_pool.shutdown()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    for engine, entry in report["engines"].items():
+        logger.info("%-12s %s", engine, json.dumps(entry))
+    logger.info("Wrote %d runs to %s", len(report["runs"]), args.output)
+    return report
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=getattr(logging, settings.log_level.upper()))
+    asyncio.run(main())
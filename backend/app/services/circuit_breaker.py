@@ -0,0 +1,100 @@
+import logging
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open circuit breaker for an unreliable dependency.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    callers skip the dependency for ``cooldown`` seconds. The first call
+    after the cooldown is let through as a trial (half-open): success closes
+    the circuit, failure opens it for another cooldown. A trial that ends
+    without an outcome (e.g. cancelled) must be released so the next call
+    can try again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int,
+        cooldown: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self.reset()
+
+    def reset(self) -> None:
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self.total_failures = 0
+        self.short_circuited = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._trial_in_flight = False
+        return self._state
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        self.short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        if self._state != CLOSED:
+            logger.info("Circuit %s closed", self.name)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give up an allowed call without recording a success or failure."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self.total_failures += 1
+        self._trial_in_flight = False
+        if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != OPEN:
+                logger.warning(
+                    "Circuit %s opened after %d failures, skipping for %ss",
+                    self.name, self._failures, self.cooldown,
+                )
+            self._state = OPEN
+            self._opened_at = self._clock()
+
+    def stats(self) -> dict:
+        state = self.state
+        retry_in = None
+        if state == OPEN:
+            retry_in = round(max(0.0, self.cooldown - (self._clock() - self._opened_at)), 1)
+        return {
+            "name": self.name,
+            "state": state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "cooldown_seconds": self.cooldown,
+            "retry_in_seconds": retry_in,
+            "total_failures": self.total_failures,
+            "short_circuited": self.short_circuited,
+        }
@@ -0,0 +1,116 @@
+import logging
+from collections import OrderedDict
+from datetime import date
+
+from app.core.config import settings
+from app.services.forecast_series import RegionForecast
+
+logger = logging.getLogger(__name__)
+
+# In-memory footprint of one forecast day (a datetime64 and three float64
+# array entries); array and object headers are in the entry overhead. Used
+# to keep the cache under its memory budget.
+POINT_SIZE_BYTES = 32
+ENTRY_OVERHEAD_BYTES = 1024
+
+Watermark = tuple[date | None, int]
+
+
+class ForecastCache:
+    """In-process LRU cache of region forecasts.
+
+    Entries are keyed on (region_id, model_type, days, resolution,
+    watermark), where ``days`` is the fitted horizon (shorter requests are
+    sliced from it by the caller), ``resolution`` is "daily" or "weekly"
+    and the watermark is the latest surveillance date and row count for the region.
+    When a region is seen with a new watermark, every entry fitted on the old
+    data is dropped.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, tuple[RegionForecast, int]] = OrderedDict()
+        self._watermarks: dict[int, Watermark] = {}
+        self._bytes = 0
+
+    @staticmethod
+    def _entry_size(forecast: RegionForecast) -> int:
+        return ENTRY_OVERHEAD_BYTES + POINT_SIZE_BYTES * len(forecast.series)
+
+    def _observe_watermark(self, region_id: int, watermark: Watermark) -> None:
+        previous = self._watermarks.get(region_id)
+        if previous is not None and previous != watermark:
+            logger.info(
+                "New surveillance data for region %s (%s -> %s), invalidating cached forecasts",
+                region_id, previous, watermark,
+            )
+            self.invalidate_region(region_id)
+        self._watermarks[region_id] = watermark
+
+    def get(
+        self, region_id: int, model_type: str, days: int, resolution: str, watermark: Watermark
+    ) -> RegionForecast | None:
+        self._observe_watermark(region_id, watermark)
+        key = (region_id, model_type, days, resolution, watermark)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(
+        self,
+        region_id: int,
+        model_type: str,
+        days: int,
+        resolution: str,
+        watermark: Watermark,
+        forecast: RegionForecast,
+    ) -> None:
+        self._observe_watermark(region_id, watermark)
+        key = (region_id, model_type, days, resolution, watermark)
+        size = self._entry_size(forecast)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._bytes -= self._entries.pop(key)[1]
+        self._entries[key] = (forecast, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+
+    def invalidate_region(self, region_id: int) -> None:
+        for key in [k for k in self._entries if k[0] == region_id]:
+            self._bytes -= self._entries.pop(key)[1]
+        self._watermarks.pop(region_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._watermarks.clear()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+forecast_cache = ForecastCache(
+    max_entries=settings.forecast_cache_max_entries,
+    max_bytes=settings.forecast_cache_max_mb * 1024 * 1024,
+)
@@ -0,0 +1,48 @@
+"""Compact encodings of forecasts for bulk consumers.
+
+The default JSON response is an array of per-day point objects. The
+columnar form carries the same data as four parallel arrays, read straight
+from the arrays the engines produce, and can be MessagePack-encoded.
+"""
+
+import json
+
+import msgpack
+import numpy as np
+
+from app.schemas.forecast import BatchForecastError
+from app.services.forecast_series import RegionForecast
+
+FORMATS = ("json", "columnar", "msgpack")
+
+
+def to_columnar(forecast: RegionForecast) -> dict:
+    """Plain dict with ``dates``/``predicted``/``lower``/``upper`` as parallel lists."""
+    series = forecast.series
+    return {
+        "region_id": forecast.region_id,
+        "region_name": forecast.region_name,
+        "model_type": forecast.model_type,
+        "forecast_days": forecast.forecast_days,
+        "dates": np.datetime_as_string(series.dates, unit="D").tolist(),
+        "predicted": series.predicted.tolist(),
+        "lower": series.lower.tolist(),
+        "upper": series.upper.tolist(),
+    }
+
+
+def to_batch_item(result: RegionForecast | BatchForecastError, fmt: str) -> dict:
+    if isinstance(result, BatchForecastError):
+        return result.model_dump(mode="json")
+    if fmt == "json":
+        return result.to_response().model_dump(mode="json")
+    return to_columnar(result)
+
+
+def sse_event(event: str, data: dict) -> str:
+    """One server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def packb(payload: dict) -> bytes:
+    return msgpack.packb(payload, use_bin_type=True)
@@ -0,0 +1,148 @@
+"""Background forecast jobs for runs that outlive HTTP proxy timeouts.
+
+``POST /forecast/jobs`` returns a job id immediately and the forecasts run
+in the background with their own DB session. Job state lives in this
+process, so with several uvicorn workers a client must poll the worker that
+accepted the job (e.g. with sticky sessions); finished jobs are kept for
+``FORECAST_JOB_TTL`` seconds and then dropped.
+"""
+
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from app.core.config import settings
+from app.models.database import async_session
+from app.schemas.forecast import BatchForecastError, ForecastJobStatus
+from app.services.forecast_series import RegionForecast
+from app.services.forecast_service import ForecastService
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many forecast jobs are queued or running."""
+
+
+@dataclass
+class ForecastJob:
+    id: str
+    region_ids: list[int] | None
+    days: int
+    model_type: str
+    state: str = QUEUED
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    results: list[RegionForecast | BatchForecastError] = field(default_factory=list)
+    regions_failed: int = 0
+    error: str | None = None
+
+    @property
+    def active(self) -> bool:
+        return self.state in (QUEUED, RUNNING)
+
+    def status(self, include_results: bool = True) -> ForecastJobStatus:
+        results = None
+        if include_results:
+            results = [
+                result if isinstance(result, BatchForecastError) else result.to_response()
+                for result in self.results
+            ]
+        return ForecastJobStatus(
+            job_id=self.id,
+            state=self.state,
+            model=self.model_type,
+            days=self.days,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            regions_done=len(self.results) - self.regions_failed,
+            regions_failed=self.regions_failed,
+            error=self.error,
+            results=results,
+        )
+
+
+class ForecastJobStore:
+    """Runs forecast jobs in the background and keeps their results for a while.
+
+    At most ``workers`` jobs run at once (each still fits through the shared
+    CPU pool); the rest wait in submission order. Expired jobs are purged
+    whenever the store is accessed.
+    """
+
+    def __init__(self, workers: int, max_active: int, ttl: int):
+        self.max_active = max_active
+        self.ttl = ttl
+        self._slots = asyncio.Semaphore(workers)
+        self._jobs: dict[str, ForecastJob] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def submit(self, region_ids: list[int] | None, days: int, model_type: str) -> ForecastJob:
+        self.purge_expired()
+        if sum(job.active for job in self._jobs.values()) >= self.max_active:
+            raise JobQueueFullError(f"{self.max_active} forecast jobs already queued or running")
+
+        job = ForecastJob(id=uuid.uuid4().hex, region_ids=region_ids, days=days, model_type=model_type)
+        self._jobs[job.id] = job
+        self._tasks[job.id] = asyncio.create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> ForecastJob | None:
+        self.purge_expired()
+        return self._jobs.get(job_id)
+
+    def purge_expired(self, now: datetime | None = None) -> None:
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=self.ttl)
+        for job_id in [
+            job.id for job in self._jobs.values() if job.finished_at is not None and job.finished_at < cutoff
+        ]:
+            del self._jobs[job_id]
+
+    async def _run(self, job: ForecastJob) -> None:
+        try:
+            async with self._slots:
+                job.state = RUNNING
+                job.started_at = datetime.utcnow()
+                async with async_session() as session:
+                    service = ForecastService(session)
+                    async for result in service.generate_batch(job.region_ids, job.days, job.model_type):
+                        if isinstance(result, BatchForecastError):
+                            job.regions_failed += 1
+                        job.results.append(result)
+                job.state = FINISHED
+        except asyncio.CancelledError:
+            job.state = FAILED
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            logger.error("Forecast job %s failed: %s", job.id, e)
+            job.state = FAILED
+            job.error = str(e)[:300]
+        finally:
+            job.finished_at = datetime.utcnow()
+            self._tasks.pop(job.id, None)
+
+    def shutdown(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+
+    def clear(self) -> None:
+        self.shutdown()
+        self._jobs.clear()
+        self._tasks.clear()
+
+
+forecast_jobs = ForecastJobStore(
+    workers=settings.forecast_job_workers,
+    max_active=settings.forecast_job_max_active,
+    ttl=settings.forecast_job_ttl,
+)
@@ -0,0 +1,95 @@
+"""Forecasts as parallel arrays, the shape every engine fits them in.
+
+Forecasts stay as numpy arrays through slicing, caching, storage and the
+columnar/MessagePack encodings; ``ForecastPoint`` models are only built
+when a forecast is returned in the default JSON format.
+"""
+
+from dataclasses import dataclass, replace
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.schemas.forecast import ForecastPoint, ForecastResponse
+
+
+def _clean(values) -> np.ndarray:
+    # Densities are reported to 2 decimals and never negative
+    return np.maximum(np.round(np.asarray(values, dtype=float), 2), 0)
+
+
+@dataclass(frozen=True, eq=False)
+class ForecastSeries:
+    dates: np.ndarray
+    predicted: np.ndarray
+    lower: np.ndarray
+    upper: np.ndarray
+
+    @classmethod
+    def of(cls, dates, predicted, lower, upper) -> "ForecastSeries":
+        """Series from raw model output: dates as days, values rounded and clipped at zero."""
+        return cls(
+            dates=np.array(dates, dtype="datetime64[D]"),
+            predicted=_clean(predicted),
+            lower=_clean(lower),
+            upper=_clean(upper),
+        )
+
+    @classmethod
+    def after(cls, last_date: date, predicted, lower, upper) -> "ForecastSeries":
+        """Series for consecutive days after ``last_date``."""
+        first = np.datetime64(last_date + timedelta(days=1), "D")
+        return cls.of(first + np.arange(len(predicted)), predicted, lower, upper)
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ForecastSeries):
+            return NotImplemented
+        return all(
+            np.array_equal(a, b)
+            for a, b in (
+                (self.dates, other.dates),
+                (self.predicted, other.predicted),
+                (self.lower, other.lower),
+                (self.upper, other.upper),
+            )
+        )
+
+    def head(self, days: int) -> "ForecastSeries":
+        return ForecastSeries(self.dates[:days], self.predicted[:days], self.lower[:days], self.upper[:days])
+
+    def to_points(self) -> list[ForecastPoint]:
+        return [
+            ForecastPoint(date=day, predicted_density=predicted, lower_ci=lower, upper_ci=upper)
+            for day, predicted, lower, upper in zip(
+                self.dates.tolist(), self.predicted.tolist(), self.lower.tolist(), self.upper.tolist()
+            )
+        ]
+
+
+@dataclass(frozen=True)
+class RegionForecast:
+    """One region's forecast as returned by ForecastService."""
+
+    region_id: int
+    region_name: str
+    model_type: str
+    forecast_days: int
+    series: ForecastSeries
+
+    def head(self, days: int) -> "RegionForecast":
+        """The first ``days`` of a forecast fitted for a longer horizon."""
+        if self.forecast_days == days:
+            return self
+        return replace(self, forecast_days=days, series=self.series.head(days))
+
+    def to_response(self) -> ForecastResponse:
+        return ForecastResponse(
+            region_id=self.region_id,
+            region_name=self.region_name,
+            model_type=self.model_type,
+            forecast_days=self.forecast_days,
+            points=self.series.to_points(),
+        )
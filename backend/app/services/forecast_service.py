@@ -1,40 +1,206 @@
+import asyncio
 import logging
-from datetime import date, timedelta
+from collections.abc import AsyncIterator
+from datetime import date, datetime, timezone
 
 import numpy as np
 import pandas as pd
-from sqlalchemy import select
+from sqlalchemy import Date, Integer, and_, cast, delete, func, insert, literal, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.models.arima_order import ARIMAOrder
+from app.models.forecast import Forecast
 from app.models.region import Region
 from app.models.surveillance import SurveillanceData
-from app.schemas.forecast import ForecastPoint, ForecastResponse
-from app.services.arima_service import ARIMAService
+from app.schemas.forecast import BatchForecastError
+from app.services.arima_service import ARIMAService, OrderChoice, arima_orders
+from app.services.forecast_cache import Watermark, forecast_cache
+from app.services.forecast_series import ForecastSeries, RegionForecast
+from app.services.fourier_service import fourier_forecast, fourier_forecast_many
+from app.services.single_flight import SingleFlight
+from app.services.training_window import (
+    DAILY,
+    WEEK_SHIFT,
+    TrainingWindow,
+    fill_gaps,
+    fit_resolution,
+    training_window,
+    week_start,
+)
+from app.services.worker_pool import WorkerPoolFullError, cpu_pool
 
 logger = logging.getLogger(__name__)
 
+MIN_HISTORY_ROWS = 10
+MODEL_TYPES = ("prophet", "arima", "hybrid", "fourier")
+
+SMOOTHING_ALPHA = 0.3
+
+forecast_flights = SingleFlight("forecast")
+
+
+def statistical_fallback_batch(
+    history: np.ndarray, days: int, alpha: float = SMOOTHING_ALPHA
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Decay-to-mean forecast for every row of a (regions, history days) matrix.
+
+    Each row's forecast decays from its last observation toward its mean
+    with weight ``(1 - alpha) ** step``; bands are +/-1.96 standard
+    deviations of the history. Rows may be left-padded with NaN when
+    histories differ in length. Returns (mean, lower, upper), each of shape
+    (regions, days).
+    """
+    history = np.atleast_2d(np.asarray(history, dtype=float))
+    level = history[:, -1]
+    mean = np.nanmean(history, axis=1)
+    counts = np.count_nonzero(~np.isnan(history), axis=1)
+    std = np.where(counts > 1, np.nanstd(history, axis=1), mean * 0.1)
+
+    decay = (1 - alpha) ** np.arange(1, days + 1)
+    predicted = level[:, None] * decay + mean[:, None] * (1 - decay)
+    band = 1.96 * std[:, None]
+    return predicted, predicted - band, predicted + band
+
+
+def statistical_fallback_many(histories: dict[int, pd.DataFrame], days: int) -> dict[int, ForecastSeries]:
+    """Exponential smoothing fallback for many regions in one array operation."""
+    keys = list(histories)
+    longest = max(len(histories[key]) for key in keys)
+    matrix = np.full((len(keys), longest), np.nan)
+    for row, key in enumerate(keys):
+        values = histories[key]["y"].to_numpy(dtype=float)
+        matrix[row, longest - len(values):] = values
+
+    mean, lower, upper = statistical_fallback_batch(matrix, days)
+    return {
+        key: ForecastSeries.after(
+            pd.to_datetime(histories[key]["ds"].iloc[-1]).date(), mean[row], lower[row], upper[row]
+        )
+        for row, key in enumerate(keys)
+    }
+
+
+def fit_horizon(days: int) -> int:
+    """Horizon actually fitted for a request of ``days``.
+
+    Every model's forecast for day N is independent of how far past N it is
+    asked to run, so requests are served by slicing one fit per resolution:
+    daily requests from a fit capped at ``forecast_weekly_after_days`` (when
+    set), weekly ones from a fit at ``forecast_max_horizon``. Only requests
+    longer than that are fitted at their own length.
+    """
+    horizon = settings.forecast_max_horizon
+    if fit_resolution(days) == DAILY and settings.forecast_weekly_after_days > 0:
+        horizon = min(horizon, settings.forecast_weekly_after_days)
+    return max(days, horizon)
+
+
+def is_degraded(model_type: str, forecast: RegionForecast) -> bool:
+    """Whether a forecast came from a fallback, so it shouldn't be kept until the next data change."""
+    if forecast.model_type == "statistical":
+        return True
+    if model_type == "hybrid":
+        # One half failed or missed the deadline; the next request should retry both
+        return forecast.model_type != "hybrid"
+    return forecast.model_type == "fourier" and model_type != "fourier"
+
 
 class ForecastService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def _get_historical_data(self, region_id: int) -> pd.DataFrame:
+    async def _get_historical_data(
+        self, region_id: int, window: TrainingWindow | None = None, latest: date | None = None
+    ) -> pd.DataFrame:
+        histories = await self._get_historical_data_many(
+            [region_id], window, {region_id: latest} if latest else None
+        )
+        df = histories.get(region_id)
+        rows = 0 if df is None else len(df)
+        if rows < MIN_HISTORY_ROWS:
+            raise ValueError(f"Insufficient data for region {region_id}: {rows} rows (need 10+)")
+        return df
+
+    def _day_number(self):
+        """SQL expression for the surveillance date as days since 1970-01-01."""
+        if self.db.get_bind().dialect.name == "sqlite":
+            return cast(func.julianday(SurveillanceData.date) - 2440587.5, Integer)
+        return SurveillanceData.date - literal(date(1970, 1, 1), Date)
+
+    async def _get_historical_data_many(
+        self,
+        region_ids: list[int],
+        window: TrainingWindow | None = None,
+        latest: dict[int, date] | None = None,
+    ) -> dict[int, pd.DataFrame]:
+        """Load several regions' histories with one query, grouped by region.
+
+        The query keeps only each region's training window (counted back
+        from its ``latest`` date) and averages readings per day, or per
+        week for weekly windows; remaining gaps are interpolated.
+        """
+        window = window or TrainingWindow()
+        if window.weekly:
+            period = ((self._day_number() + WEEK_SHIFT) // 7).label("period")
+        else:
+            period = SurveillanceData.date.label("period")
+
+        # Regions mostly share a latest date, so this is usually one clause
+        by_cutoff: dict[date | None, list[int]] = {}
+        for region_id in region_ids:
+            cutoff = window.cutoff((latest or {}).get(region_id))
+            by_cutoff.setdefault(cutoff, []).append(region_id)
+        scope = or_(*(
+            and_(SurveillanceData.region_id.in_(ids), SurveillanceData.date >= cutoff)
+            if cutoff is not None
+            else SurveillanceData.region_id.in_(ids)
+            for cutoff, ids in by_cutoff.items()
+        ))
+
         query = (
-            select(SurveillanceData.date, SurveillanceData.mosquito_density)
-            .where(SurveillanceData.region_id == region_id)
-            .order_by(SurveillanceData.date)
+            select(
+                SurveillanceData.region_id,
+                period,
+                func.avg(SurveillanceData.mosquito_density).label("y"),
+            )
+            .where(scope)
+            .group_by(SurveillanceData.region_id, period)
+            .order_by(SurveillanceData.region_id, period)
         )
         result = await self.db.execute(query)
-        rows = result.all()
+        df = pd.DataFrame(result.all(), columns=["region_id", "ds", "y"])
+        if df.empty:
+            return {}
 
-        if len(rows) < 10:
-            raise ValueError(f"Insufficient data for region {region_id}: {len(rows)} rows (need 10+)")
+        df["ds"] = week_start(df["ds"]) if window.weekly else pd.to_datetime(df["ds"])
+        df["y"] = df["y"].astype(float)
+        return {
+            int(region_id): fill_gaps(group[["ds", "y"]].reset_index(drop=True), window.weekly)
+            for region_id, group in df.groupby("region_id", sort=False)
+        }
 
-        df = pd.DataFrame(
-            [{"ds": row.date, "y": float(row.mosquito_density)} for row in rows]
+    async def _get_data_watermark(self, region_id: int) -> Watermark:
+        """Latest surveillance date and row count; changes whenever new rows arrive."""
+        query = select(
+            func.max(SurveillanceData.date), func.count(SurveillanceData.id)
+        ).where(SurveillanceData.region_id == region_id)
+        result = await self.db.execute(query)
+        latest, count = result.one()
+        return latest, count
+
+    async def _get_data_watermarks(self, region_ids: list[int]) -> dict[int, Watermark]:
+        query = (
+            select(
+                SurveillanceData.region_id,
+                func.max(SurveillanceData.date).label("latest"),
+                func.count(SurveillanceData.id).label("rows"),
+            )
+            .where(SurveillanceData.region_id.in_(region_ids))
+            .group_by(SurveillanceData.region_id)
         )
-        df["ds"] = pd.to_datetime(df["ds"])
-        return df
+        result = await self.db.execute(query)
+        return {row.region_id: (row.latest, row.rows) for row in result.all()}
 
     async def _get_region_name(self, region_id: int) -> str:
         result = await self.db.execute(select(Region.name).where(Region.id == region_id))
@@ -43,7 +209,153 @@ class ForecastService:
             raise ValueError(f"Region {region_id} not found")
         return name
 
-    def _prophet_forecast(self, df: pd.DataFrame, days: int) -> list[ForecastPoint]:
+    async def _get_region_names(self, region_ids: list[int] | None = None) -> dict[int, str]:
+        query = select(Region.id, Region.name).order_by(Region.id)
+        if region_ids is not None:
+            query = query.where(Region.id.in_(region_ids))
+        result = await self.db.execute(query)
+        return {row.id: row.name for row in result.all()}
+
+    async def _load_stored(
+        self,
+        region_ids: list[int],
+        model_type: str,
+        days: int,
+        resolution: str,
+        watermarks: dict[int, Watermark],
+    ) -> dict[int, tuple[str, ForecastSeries]]:
+        """Stored forecasts for these regions that were fitted on their current data.
+
+        Returns region_id -> (model used, series). A region whose stored run
+        has a different watermark (or is incomplete) is left out.
+        """
+        query = (
+            select(
+                Forecast.region_id,
+                Forecast.model_type,
+                Forecast.data_through,
+                Forecast.data_rows,
+                Forecast.forecast_date,
+                Forecast.predicted_density,
+                Forecast.lower_ci,
+                Forecast.upper_ci,
+            )
+            .where(
+                Forecast.region_id.in_(region_ids),
+                Forecast.requested_model == model_type,
+                Forecast.horizon == days,
+                Forecast.resolution == resolution,
+            )
+            .order_by(Forecast.region_id, Forecast.forecast_date, Forecast.id.desc())
+        )
+        result = await self.db.execute(query)
+
+        runs: dict[int, tuple[str, dict[date, tuple[float, float, float]]]] = {}
+        for row in result.all():
+            if (row.data_through, row.data_rows) != watermarks.get(row.region_id):
+                continue
+            model_used, values = runs.setdefault(row.region_id, (row.model_type, {}))
+            # Two API workers may have stored the same run; keep the newest row per date
+            values.setdefault(row.forecast_date, (row.predicted_density, row.lower_ci, row.upper_ci))
+        return {
+            region_id: (model_used, ForecastSeries.of(list(values), *zip(*values.values())))
+            for region_id, (model_used, values) in runs.items()
+            if len(values) == days
+        }
+
+    async def _store_forecasts(
+        self, model_type: str, days: int, resolution: str, runs: list[tuple[Watermark, RegionForecast]]
+    ) -> None:
+        """Replace the stored runs for these regions with one bulk insert.
+
+        Persistence is best-effort: a failed write is logged and the freshly
+        fitted forecasts are still returned.
+        """
+        runs = [(watermark, forecast) for watermark, forecast in runs if not is_degraded(model_type, forecast)]
+        if not runs:
+            return
+
+        rows = [
+            {
+                "region_id": forecast.region_id,
+                "model_type": forecast.model_type,
+                "requested_model": model_type,
+                "horizon": days,
+                "resolution": resolution,
+                "data_through": watermark[0],
+                "data_rows": watermark[1],
+                "forecast_date": day,
+                "predicted_density": predicted,
+                "lower_ci": lower,
+                "upper_ci": upper,
+            }
+            for watermark, forecast in runs
+            for day, predicted, lower, upper in zip(
+                forecast.series.dates.tolist(),
+                forecast.series.predicted.tolist(),
+                forecast.series.lower.tolist(),
+                forecast.series.upper.tolist(),
+            )
+        ]
+        try:
+            await self.db.execute(
+                delete(Forecast).where(
+                    Forecast.region_id.in_([forecast.region_id for _, forecast in runs]),
+                    Forecast.requested_model == model_type,
+                    Forecast.horizon == days,
+                    Forecast.resolution == resolution,
+                )
+            )
+            await self.db.execute(insert(Forecast), rows)
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to store forecasts: %s", e)
+
+    async def _load_arima_orders(self, region_ids: list[int]) -> None:
+        """Make the stored ARIMA orders for these regions available to ARIMAService."""
+        missing = [region_id for region_id in region_ids if arima_orders.get(region_id) is None]
+        if not missing:
+            return
+        result = await self.db.execute(select(ARIMAOrder).where(ARIMAOrder.region_id.in_(missing)))
+        for row in result.scalars():
+            selected_at = row.selected_at or datetime.utcnow()
+            if selected_at.tzinfo is not None:
+                selected_at = selected_at.astimezone(timezone.utc).replace(tzinfo=None)
+            arima_orders.load(
+                row.region_id,
+                OrderChoice(order=(row.p, row.d, row.q), params=row.params, aic=row.aic, selected_at=selected_at),
+            )
+
+    async def _save_arima_orders(self) -> None:
+        """Persist ARIMA orders selected since the last save (best-effort)."""
+        unsaved = arima_orders.take_unsaved()
+        if not unsaved:
+            return
+        try:
+            await self.db.execute(delete(ARIMAOrder).where(ARIMAOrder.region_id.in_(list(unsaved))))
+            await self.db.execute(
+                insert(ARIMAOrder),
+                [
+                    {
+                        "region_id": region_id,
+                        "p": choice.order[0],
+                        "d": choice.order[1],
+                        "q": choice.order[2],
+                        "aic": choice.aic,
+                        "params": choice.params,
+                        "selected_at": choice.selected_at,
+                    }
+                    for region_id, choice in unsaved.items()
+                ],
+            )
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error("Failed to store ARIMA orders: %s", e)
+
+    @staticmethod
+    def _prophet_forecast(df: pd.DataFrame, days: int) -> ForecastSeries:
         from prophet import Prophet
 
         model = Prophet(
@@ -54,115 +366,351 @@ class ForecastService:
         )
         model.fit(df)
 
-        future = model.make_future_dataframe(periods=days)
+        # Continue at the history's spacing (daily, or weekly for long horizons)
+        future = model.make_future_dataframe(periods=days, freq=df["ds"].iloc[-1] - df["ds"].iloc[-2])
         prediction = model.predict(future)
 
         forecast_rows = prediction.tail(days)
-        return [
-            ForecastPoint(
-                date=row["ds"].date() if hasattr(row["ds"], "date") else row["ds"],
-                predicted_density=max(0, round(float(row["yhat"]), 2)),
-                lower_ci=max(0, round(float(row["yhat_lower"]), 2)),
-                upper_ci=max(0, round(float(row["yhat_upper"]), 2)),
-            )
-            for _, row in forecast_rows.iterrows()
-        ]
+        return ForecastSeries.of(
+            forecast_rows["ds"].to_numpy(),
+            forecast_rows["yhat"].to_numpy(),
+            forecast_rows["yhat_lower"].to_numpy(),
+            forecast_rows["yhat_upper"].to_numpy(),
+        )
 
-    def _statistical_fallback(self, df: pd.DataFrame, days: int) -> list[ForecastPoint]:
+    @staticmethod
+    def _statistical_fallback(df: pd.DataFrame, days: int) -> ForecastSeries:
         """Simple exponential smoothing fallback when Prophet/ARIMA fail."""
-        values = df["y"].values.astype(float)
-        last_date = pd.to_datetime(df["ds"].iloc[-1])
-
-        # Exponential weighted moving average
-        alpha = 0.3
-        level = values[-1]
-        mean_val = float(np.mean(values))
-        std_val = float(np.std(values)) if len(values) > 1 else mean_val * 0.1
-
-        points = []
-        for i in range(days):
-            forecast_date = (last_date + timedelta(days=i + 1)).date()
-            # Decay toward mean
-            predicted = level * (1 - alpha) ** (i + 1) + mean_val * (1 - (1 - alpha) ** (i + 1))
-            points.append(
-                ForecastPoint(
-                    date=forecast_date,
-                    predicted_density=max(0, round(predicted, 2)),
-                    lower_ci=max(0, round(predicted - 1.96 * std_val, 2)),
-                    upper_ci=max(0, round(predicted + 1.96 * std_val, 2)),
-                )
-            )
-        return points
+        mean, lower, upper = statistical_fallback_batch(df["y"].to_numpy(dtype=float)[None, :], days)
+        last_date = pd.to_datetime(df["ds"].iloc[-1]).date()
+        return ForecastSeries.after(last_date, mean[0], lower[0], upper[0])
 
-    async def _arima_forecast(self, df: pd.DataFrame, days: int) -> list[ForecastPoint]:
+    async def _arima_forecast(
+        self, df: pd.DataFrame, days: int, region_id: int | None = None
+    ) -> ForecastSeries:
         arima = ARIMAService()
-        return await arima.forecast(df, days)
-
-    def _hybrid_forecast(
-        self, prophet_points: list[ForecastPoint], arima_points: list[ForecastPoint]
-    ) -> list[ForecastPoint]:
-        combined = []
-        for p, a in zip(prophet_points, arima_points):
-            combined.append(
-                ForecastPoint(
-                    date=p.date,
-                    predicted_density=round((p.predicted_density + a.predicted_density) / 2, 2),
-                    lower_ci=round(min(p.lower_ci, a.lower_ci), 2),
-                    upper_ci=round(max(p.upper_ci, a.upper_ci), 2),
-                )
-            )
-        return combined
+        return await arima.forecast(df, days, key=region_id)
 
-    async def generate_forecast(
-        self, region_id: int, days: int = 30, model_type: str = "prophet"
-    ) -> ForecastResponse:
-        region_name = await self._get_region_name(region_id)
-        df = await self._get_historical_data(region_id)
+    @staticmethod
+    def _hybrid_forecast(prophet: ForecastSeries, arima: ForecastSeries) -> ForecastSeries:
+        # Mean of the two forecasts, with the wider of their bands
+        return ForecastSeries.of(
+            prophet.dates,
+            (prophet.predicted + arima.predicted) / 2,
+            np.minimum(prophet.lower, arima.lower),
+            np.maximum(prophet.upper, arima.upper),
+        )
+
+    async def _fit_hybrid_components(
+        self, df: pd.DataFrame, days: int, region_id: int | None = None
+    ) -> tuple[ForecastSeries | None, ForecastSeries | None]:
+        """Fit Prophet and ARIMA concurrently under one shared deadline.
+
+        Returns whatever finished in time; a model that failed or missed the
+        deadline comes back as None.
+        """
+        tasks = {
+            "Prophet": asyncio.ensure_future(cpu_pool.run(self._prophet_forecast, df, days)),
+            "ARIMA": asyncio.ensure_future(self._arima_forecast(df, days, region_id)),
+        }
+        await asyncio.wait(tasks.values(), timeout=settings.hybrid_timeout)
+
+        results = {}
+        pool_full = None
+        for label, task in tasks.items():
+            results[label] = None
+            if not task.done():
+                task.cancel()
+                logger.warning("%s missed the %ss hybrid deadline", label, settings.hybrid_timeout)
+            elif task.exception() is not None:
+                if isinstance(task.exception(), WorkerPoolFullError):
+                    pool_full = task.exception()
+                logger.warning("%s failed in hybrid mode: %s", label, task.exception())
+            else:
+                results[label] = task.result()
+
+        if pool_full is not None and all(result is None for result in results.values()):
+            raise pool_full
+        return results["Prophet"], results["ARIMA"]
+
+    async def _fallback(self, df: pd.DataFrame, days: int) -> tuple[str, ForecastSeries]:
+        """Fourier trend/seasonality regression, or exponential smoothing if even that fails."""
+        try:
+            return "fourier", await cpu_pool.run(fourier_forecast, df, days)
+        except WorkerPoolFullError:
+            raise
+        except Exception as e:
+            logger.warning("Fourier forecast failed: %s — falling back to statistical model", e)
+            return "statistical", await cpu_pool.run(self._statistical_fallback, df, days)
+
+    async def _fit(
+        self, df: pd.DataFrame, days: int, model_type: str, region_id: int | None = None
+    ) -> tuple[str, ForecastSeries]:
+        """Run the requested model, returning the model actually used and its forecast.
 
+        Every fit runs on the shared CPU worker pool. A saturated pool is
+        surfaced to the caller rather than masked by the fallback model.
+        """
         if model_type == "prophet":
             try:
-                points = self._prophet_forecast(df, days)
+                series = await cpu_pool.run(self._prophet_forecast, df, days)
+            except WorkerPoolFullError:
+                raise
             except Exception as e:
-                logger.warning("Prophet forecast failed: %s — falling back to statistical model", e)
-                points = self._statistical_fallback(df, days)
-                model_type = "statistical"
+                logger.warning("Prophet forecast failed: %s — falling back", e)
+                model_type, series = await self._fallback(df, days)
         elif model_type == "arima":
             try:
-                points = await self._arima_forecast(df, days)
+                series = await self._arima_forecast(df, days, region_id)
+            except WorkerPoolFullError:
+                raise
             except Exception as e:
-                logger.warning("ARIMA forecast failed: %s — falling back to statistical model", e)
-                points = self._statistical_fallback(df, days)
-                model_type = "statistical"
+                logger.warning("ARIMA forecast failed: %s — falling back", e)
+                model_type, series = await self._fallback(df, days)
         elif model_type == "hybrid":
-            prophet_points = None
-            arima_points = None
-            try:
-                prophet_points = self._prophet_forecast(df, days)
-            except Exception as e:
-                logger.warning("Prophet failed in hybrid mode: %s", e)
-            try:
-                arima_points = await self._arima_forecast(df, days)
-            except Exception as e:
-                logger.warning("ARIMA failed in hybrid mode: %s", e)
-
-            if prophet_points and arima_points:
-                points = self._hybrid_forecast(prophet_points, arima_points)
-            elif prophet_points:
-                points = prophet_points
+            prophet, arima = await self._fit_hybrid_components(df, days, region_id)
+            if prophet is not None and arima is not None:
+                series = self._hybrid_forecast(prophet, arima)
+            elif prophet is not None:
+                series = prophet
                 model_type = "prophet"
-            elif arima_points:
-                points = arima_points
+            elif arima is not None:
+                series = arima
                 model_type = "arima"
             else:
-                points = self._statistical_fallback(df, days)
-                model_type = "statistical"
+                model_type, series = await self._fallback(df, days)
+        elif model_type == "fourier":
+            model_type, series = await self._fallback(df, days)
         else:
             raise ValueError(f"Unknown model type: {model_type}")
 
-        return ForecastResponse(
-            region_id=region_id,
-            region_name=region_name,
-            model_type=model_type,
-            forecast_days=days,
-            points=points,
+        return model_type, series
+
+    async def generate_forecast(
+        self, region_id: int, days: int = 30, model_type: str = "fourier"
+    ) -> RegionForecast:
+        # Concurrent requests for any horizon served by the same fit share one lookup-and-fit
+        horizon = fit_horizon(days)
+        resolution = fit_resolution(days)
+        forecast = await forecast_flights.do(
+            (region_id, horizon, resolution, model_type),
+            lambda: self._generate_forecast(region_id, horizon, resolution, model_type),
+        )
+        return forecast.head(days)
+
+    async def _generate_forecast(
+        self, region_id: int, days: int, resolution: str, model_type: str
+    ) -> RegionForecast:
+        region_name = await self._get_region_name(region_id)
+        watermark = await self._get_data_watermark(region_id)
+        cached = forecast_cache.get(region_id, model_type, days, resolution, watermark)
+        if cached is not None:
+            return cached
+
+        stored = await self._load_stored([region_id], model_type, days, resolution, {region_id: watermark})
+        if region_id in stored:
+            model_used, series = stored[region_id]
+            forecast = RegionForecast(region_id, region_name, model_used, days, series)
+            self._cache_forecast(region_id, model_type, days, resolution, watermark, forecast)
+            return forecast
+
+        window = training_window(model_type, resolution)
+        df = await self._get_historical_data(region_id, window, watermark[0])
+        if model_type in ("arima", "hybrid"):
+            await self._load_arima_orders([region_id])
+        model_used, series = await self._fit(
+            df, window.fit_steps(days), model_type, self._series_key(region_id, window)
+        )
+        series = window.to_daily(df, watermark[0], series, days)
+        await self._save_arima_orders()
+
+        forecast = RegionForecast(region_id, region_name, model_used, days, series)
+        self._cache_forecast(region_id, model_type, days, resolution, watermark, forecast)
+        await self._store_forecasts(model_type, days, resolution, [(watermark, forecast)])
+        return forecast
+
+    @staticmethod
+    def _series_key(region_id: int, window: TrainingWindow) -> int | None:
+        # Per-region ARIMA orders and filter state belong to the daily series
+        return None if window.weekly else region_id
+
+    @staticmethod
+    def _cache_forecast(
+        region_id: int,
+        model_type: str,
+        days: int,
+        resolution: str,
+        watermark: Watermark,
+        forecast: RegionForecast,
+    ) -> None:
+        # Don't pin a degraded fallback result until the next data change
+        if not is_degraded(model_type, forecast):
+            forecast_cache.put(region_id, model_type, days, resolution, watermark, forecast)
+
+    async def lookup_forecasts(
+        self, region_ids: list[int], days: int = 30, model_type: str = "fourier"
+    ) -> dict[int, RegionForecast]:
+        """Cached or stored forecasts fitted on the regions' current data, without fitting.
+
+        Regions with no such forecast are left out.
+        """
+        horizon = fit_horizon(days)
+        resolution = fit_resolution(days)
+        names = await self._get_region_names(region_ids)
+        watermarks = await self._get_data_watermarks(list(names))
+
+        found: dict[int, RegionForecast] = {}
+        missing: list[int] = []
+        for region_id in names:
+            cached = forecast_cache.get(
+                region_id, model_type, horizon, resolution, watermarks.get(region_id, (None, 0))
+            )
+            if cached is not None:
+                found[region_id] = cached.head(days)
+            else:
+                missing.append(region_id)
+
+        if missing:
+            stored = await self._load_stored(missing, model_type, horizon, resolution, watermarks)
+            for region_id, (model_used, series) in stored.items():
+                forecast = RegionForecast(region_id, names[region_id], model_used, horizon, series)
+                self._cache_forecast(region_id, model_type, horizon, resolution, watermarks[region_id], forecast)
+                found[region_id] = forecast.head(days)
+        return found
+
+    async def generate_batch(
+        self,
+        region_ids: list[int] | None,
+        days: int = 30,
+        model_type: str = "fourier",
+        concurrency: int | None = None,
+    ) -> AsyncIterator[RegionForecast | BatchForecastError]:
+        """Forecast many regions, yielding each result as soon as it is ready.
+
+        Each region is fitted at ``fit_horizon(days)`` and sliced, sharing
+        cached and stored runs with single-region requests of any horizon.
+        Regions with a cached or stored forecast for their current data are
+        answered first. The rest have their histories loaded with one grouped
+        query and their fits fanned out across the CPU worker pool. Each
+        fitted region is stored before it is yielded, so nothing accumulates
+        over a long stream and a client that disconnects keeps what already
+        finished. ``region_ids=None``
+        forecasts every region; ``concurrency`` caps simultaneous fits below
+        the pool size (used by background precompute).
+        """
+        if model_type not in MODEL_TYPES:
+            raise ValueError(f"Unknown model type: {model_type}")
+        requested_days, days = days, fit_horizon(days)
+        resolution = fit_resolution(requested_days)
+
+        names = await self._get_region_names(region_ids)
+        requested = region_ids if region_ids is not None else list(names)
+        watermarks = await self._get_data_watermarks(list(names))
+
+        pending: list[int] = []
+        for region_id in requested:
+            if region_id not in names:
+                yield BatchForecastError(region_id=region_id, detail=f"Region {region_id} not found")
+                continue
+            watermark = watermarks.get(region_id, (None, 0))
+            if watermark[1] < MIN_HISTORY_ROWS:
+                yield BatchForecastError(
+                    region_id=region_id,
+                    detail=f"Insufficient data for region {region_id}: {watermark[1]} rows (need 10+)",
+                )
+                continue
+            cached = forecast_cache.get(region_id, model_type, days, resolution, watermark)
+            if cached is not None:
+                yield cached.head(requested_days)
+            else:
+                pending.append(region_id)
+
+        if pending:
+            stored = await self._load_stored(pending, model_type, days, resolution, watermarks)
+            for region_id, (model_used, series) in stored.items():
+                forecast = RegionForecast(region_id, names[region_id], model_used, days, series)
+                self._cache_forecast(region_id, model_type, days, resolution, watermarks[region_id], forecast)
+                yield forecast.head(requested_days)
+            pending = [region_id for region_id in pending if region_id not in stored]
+
+        if not pending:
+            return
+
+        window = training_window(model_type, resolution)
+        steps = window.fit_steps(days)
+        histories = await self._get_historical_data_many(
+            pending, window, {region_id: watermarks[region_id][0] for region_id in pending}
         )
+        # Aggregation can leave a region short of history even though its row count was fine
+        for region_id in [r for r in pending if len(histories.get(r, ())) < MIN_HISTORY_ROWS]:
+            pending.remove(region_id)
+            yield BatchForecastError(
+                region_id=region_id,
+                detail=f"Insufficient data for region {region_id}: "
+                f"{len(histories.get(region_id, ()))} rows (need 10+)",
+            )
+        if not pending:
+            return
+        if model_type in ("arima", "hybrid"):
+            await self._load_arima_orders(pending)
+
+        # ARIMA regions go to R as a few multi-series jobs rather than one each,
+        # and Fourier regions are solved together as one least-squares problem.
+        # Regions missing from the batch result are fitted one by one below.
+        # Weekly ARIMA fits skip this: forecast_many keeps per-region daily state
+        prefit: dict[int, tuple[str, ForecastSeries]] = {}
+        batched = model_type == "fourier" or (model_type == "arima" and not window.weekly)
+        if batched and len(pending) > 1:
+            group = {r: histories[r] for r in pending}
+            try:
+                if model_type == "arima":
+                    fitted = await ARIMAService().forecast_many(group, steps, concurrency)
+                else:
+                    fitted = await cpu_pool.run(fourier_forecast_many, group, steps)
+                prefit = {r: (model_type, series) for r, series in fitted.items()}
+            except Exception as e:
+                logger.warning("Batch %s failed (%s), falling back", model_type, e)
+                if model_type == "fourier":
+                    # One vectorized pass, cheap enough to run on the event loop
+                    fitted = statistical_fallback_many(group, steps)
+                    prefit = {r: ("statistical", series) for r, series in fitted.items()}
+
+        # Submit no more regions than the pool can run, so a national batch
+        # queues here instead of tripping the pool's queue limit. A hybrid
+        # region runs Prophet and ARIMA as two pool jobs at once
+        limit = min(concurrency or cpu_pool.max_workers, cpu_pool.max_workers)
+        if model_type == "hybrid":
+            limit = max(1, limit // 2)
+        slots = asyncio.Semaphore(limit)
+
+        async def fit_region(region_id: int):
+            if region_id in prefit:
+                return region_id, prefit[region_id]
+            async with slots:
+                try:
+                    return region_id, await self._fit(
+                        histories[region_id], steps, model_type, self._series_key(region_id, window)
+                    )
+                except Exception as e:
+                    return region_id, e
+
+        tasks = [asyncio.ensure_future(fit_region(region_id)) for region_id in pending]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                region_id, outcome = await next_done
+                if isinstance(outcome, Exception):
+                    logger.error("Batch forecast failed for region %s: %s", region_id, outcome)
+                    yield BatchForecastError(region_id=region_id, detail=str(outcome))
+                    continue
+
+                model_used, series = outcome
+                series = window.to_daily(histories[region_id], watermarks[region_id][0], series, days)
+                forecast = RegionForecast(region_id, names[region_id], model_used, days, series)
+                self._cache_forecast(region_id, model_type, days, resolution, watermarks[region_id], forecast)
+                await self._store_forecasts(model_type, days, resolution, [(watermarks[region_id], forecast)])
+                await self._save_arima_orders()
+                yield forecast.head(requested_days)
+        finally:
+            # Client went away mid-stream: don't leave queued fits behind
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,110 @@
+"""Piecewise-linear trend plus yearly Fourier terms, fitted for many regions at once.
+
+A lightweight stand-in for Prophet's additive model: the same kind of trend
+(linear with changepoints spread over the first 80% of the history) and
+yearly seasonality, but solved as one ridge-regularised least-squares
+problem. Regions observed on the same dates share the design matrix, so a
+whole group is one ``lstsq`` call with one right-hand-side column per region.
+"""
+
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.services.forecast_series import ForecastSeries
+
+YEARLY_PERIOD = 365.25
+MAX_FOURIER_ORDER = 10
+N_CHANGEPOINTS = 15
+CHANGEPOINT_RANGE = 0.8
+# Ridge penalties (on the max-abs scaled series): changepoint rate changes
+# are shrunk hard so the trend does not chase noise at the end of the
+# history; seasonal terms only lightly
+CHANGEPOINT_PENALTY = 10.0
+SEASONALITY_PENALTY = 0.01
+Z_95 = 1.96
+
+
+def _fourier_order(span_days: int) -> int:
+    # Need about a year of history to pin down all ten yearly harmonics
+    return int(np.clip(round(MAX_FOURIER_ORDER * span_days / YEARLY_PERIOD), 1, MAX_FOURIER_ORDER))
+
+
+def _design(
+    days: np.ndarray, start: int, span: int, changepoints: np.ndarray, order: int
+) -> np.ndarray:
+    """Columns: intercept, slope, changepoint hinges, then sin/cos pairs."""
+    t = (days - start) / span
+    hinges = np.maximum(t[:, None] - changepoints[None, :], 0.0)
+    harmonics = 2 * np.pi * np.outer(days / YEARLY_PERIOD, np.arange(1, order + 1))
+    return np.hstack([np.ones((len(t), 1)), t[:, None], hinges, np.sin(harmonics), np.cos(harmonics)])
+
+
+def fit_fourier(
+    days: np.ndarray, values: np.ndarray, horizon: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Forecast every column of ``values`` observed on the shared ``days``.
+
+    ``days`` are integer day numbers (T,), ``values`` is (T, regions).
+    Returns (mean, lower, upper) arrays of shape (regions, horizon) for the
+    ``horizon`` steps after the last observation, spaced like its last two
+    observations (one day, or a week for weekly histories).
+    """
+    days = np.asarray(days, dtype=float)
+    values = np.asarray(values, dtype=float)
+    start, span = days[0], max(days[-1] - days[0], 1.0)
+    order = _fourier_order(int(span))
+    changepoints = np.linspace(0, CHANGEPOINT_RANGE, N_CHANGEPOINTS + 1)[1:]
+
+    X = _design(days, start, span, changepoints, order)
+    step = days[-1] - days[-2] if len(days) > 1 else 1.0
+    future = days[-1] + step * np.arange(1, horizon + 1)
+    X_future = _design(future, start, span, changepoints, order)
+
+    penalties = np.concatenate([
+        np.zeros(2),
+        np.full(N_CHANGEPOINTS, CHANGEPOINT_PENALTY),
+        np.full(2 * order, SEASONALITY_PENALTY),
+    ])
+    ridge = np.diag(np.sqrt(penalties))[penalties > 0]
+
+    scale = np.abs(values).max(axis=0)
+    scale[scale == 0] = 1.0
+    scaled = values / scale
+
+    A = np.vstack([X, ridge])
+    B = np.vstack([scaled, np.zeros((len(ridge), scaled.shape[1]))])
+    coef, *_ = np.linalg.lstsq(A, B, rcond=None)
+
+    residuals = scaled - X @ coef
+    dof = max(len(days) - X.shape[1], 1)
+    sigma = np.sqrt((residuals ** 2).sum(axis=0) / dof) * scale
+
+    mean = (X_future @ coef * scale).T
+    band = Z_95 * sigma[:, None]
+    return mean, mean - band, mean + band
+
+
+def fourier_forecast_many(histories: dict[int, pd.DataFrame], days: int) -> dict[int, ForecastSeries]:
+    """Forecast many regions, one least-squares solve per set of aligned dates."""
+    groups: dict[bytes, list[int]] = {}
+    day_numbers: dict[int, np.ndarray] = {}
+    for key, df in histories.items():
+        numbers = pd.to_datetime(df["ds"]).values.astype("datetime64[D]").astype(np.int64)
+        day_numbers[key] = numbers
+        groups.setdefault(numbers.tobytes(), []).append(key)
+
+    results: dict[int, ForecastSeries] = {}
+    for keys in groups.values():
+        numbers = day_numbers[keys[0]]
+        values = np.column_stack([histories[key]["y"].to_numpy(dtype=float) for key in keys])
+        mean, lower, upper = fit_fourier(numbers, values, days)
+        last_date = date(1970, 1, 1) + timedelta(days=int(numbers[-1]))
+        for row, key in enumerate(keys):
+            results[key] = ForecastSeries.after(last_date, mean[row], lower[row], upper[row])
+    return results
+
+
+def fourier_forecast(df: pd.DataFrame, days: int) -> ForecastSeries:
+    return fourier_forecast_many({0: df}, days)[0]
@@ -11,6 +11,7 @@ from app.core.config import settings
 from app.models.region import Region
 from app.models.surveillance import SurveillanceData
 from app.schemas.report import ReportRequest, ReportResponse
+from app.services.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +19,8 @@ _pipeline = None
 
 REPORT_DIR = "/tmp/reports"
 
+report_flights = SingleFlight("report")
+
 REPORT_TEMPLATE = """\
 <!DOCTYPE html>
 <html>
@@ -86,6 +89,16 @@ def _get_pipeline():
     return _pipeline
 
 
+def warm_pipeline() -> bool:
+    """Load the summarization model ahead of the first report request."""
+    try:
+        _get_pipeline()
+        return True
+    except Exception as e:
+        logger.warning("Could not preload NLP model: %s", e)
+        return False
+
+
 class NLPService:
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -150,6 +163,9 @@ class NLPService:
             return None
 
     async def generate_report(self, request: ReportRequest) -> ReportResponse:
+        return await report_flights.do(request.model_dump_json(), lambda: self._generate_report(request))
+
+    async def _generate_report(self, request: ReportRequest) -> ReportResponse:
         context = await self._build_context(request.region_ids)
 
         if not context:
@@ -1,17 +1,31 @@
 import logging
+from datetime import date, timedelta
 
 import numpy as np
+from scipy import sparse
 from scipy.optimize import linprog
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.region import Region
 from app.models.surveillance import SurveillanceData
 from app.schemas.optimize import (
     OptimizationRequest,
     OptimizationResponse,
+    OptimizationSweepRequest,
+    OptimizationSweepResponse,
+    PlanPeriod,
+    PlanRequest,
+    PlanResponse,
     RegionAllocation,
+    RiskSummary,
+    SweepPoint,
 )
+from app.services.forecast_series import RegionForecast
+from app.services.forecast_service import ForecastService
+from app.services.single_flight import SingleFlight
+from app.services.worker_pool import cpu_pool
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +44,271 @@ CASES_PREVENTED_PER_LARVICIDE = 0.20  # Larvicide: targeted breeding sites
 MIN_ALLOCATION_PCT = 0.20
 MAX_ALLOCATION_PCT = 0.45
 
+# When rebalancing, a region's spend may move this far (as a fraction of its
+# density share of the budget) towards regions where it prevents more cases
+REGION_BUDGET_FLEX = 0.25
+
+# Spread (lognormal sigma) of the true efficacy and unit cost around the
+# point estimates above, for the robust objectives
+EFFICACY_SIGMA = 0.3
+COST_SIGMA = 0.15
+RISK_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Multi-period plans: one period per month of forecast, each spending at
+# least this fraction of the money released for it
+PLAN_PERIOD_DAYS = 30
+PERIOD_MIN_SHARE = 0.5
+
+COSTS = np.array([COST_PER_ITN, COST_PER_IRS, COST_PER_LARVICIDE])
+CASES_PREVENTED = np.array([CASES_PREVENTED_PER_ITN, CASES_PREVENTED_PER_IRS, CASES_PREVENTED_PER_LARVICIDE])
+
+optimize_flights = SingleFlight("optimize")
+
+
+def relative_density(shares: np.ndarray) -> np.ndarray:
+    """Each region's density share relative to the mean region (averages 1)."""
+    return shares * len(shares)
+
+
+def _diversification_rows(n_groups: int, unit_costs: np.ndarray) -> sparse.csr_matrix:
+    """Rows keeping each intervention at 20-45% of its group's spend (right-hand side 0)."""
+    # Cost of each variable, and each variable's group spend (block diagonal)
+    variable_cost = sparse.diags(np.tile(unit_costs, n_groups))
+    group_spend = sparse.kron(sparse.eye(n_groups), np.outer(np.ones(len(unit_costs)), unit_costs), format="csr")
+    return sparse.vstack([
+        variable_cost - MAX_ALLOCATION_PCT * group_spend,
+        MIN_ALLOCATION_PCT * group_spend - variable_cost,
+    ], format="csr")
+
+
+def _allocation_constraints(
+    shares: np.ndarray, budget: float, flex: float, unit_costs: np.ndarray
+) -> tuple[sparse.csr_matrix, np.ndarray]:
+    """Budget, region band and diversification rows over (regions x interventions) variables.
+
+    ``unit_costs`` is the dollar cost of one unit of each variable's
+    intervention (all ones when the variables are dollars).
+    """
+    n = len(shares)
+    n_vars = n * len(unit_costs)
+    # Region spend: one row per region summing its interventions' costs
+    spend = sparse.kron(sparse.eye(n), unit_costs[None, :], format="csr")
+
+    A_ub = sparse.vstack([
+        sparse.csr_matrix(np.tile(unit_costs, n)[None, :]),
+        _diversification_rows(n, unit_costs),
+        spend,
+        -spend,
+    ], format="csr")
+    b_ub = np.concatenate([
+        [budget],
+        np.zeros(2 * n_vars),
+        (1 + flex) * shares * budget,
+        -(1 - flex) * shares * budget,
+    ])
+    return A_ub, b_ub
+
+
+def solve_allocation(shares: np.ndarray, budget: float, flex: float = REGION_BUDGET_FLEX) -> np.ndarray | None:
+    """Units of each intervention per region, from one sparse LP over all regions.
+
+    Variables are the (regions x interventions) unit counts. The objective
+    maximizes cases prevented weighted by each region's relative density;
+    constraints are the total budget, each region's spend staying within
+    ``flex`` of its density share, and every intervention taking 20-45% of
+    its region's spend. Returns None if the solver fails.
+    """
+    n = len(shares)
+    A_ub, b_ub = _allocation_constraints(shares, budget, flex, COSTS)
+    c = -np.outer(relative_density(shares), CASES_PREVENTED).ravel()
+
+    result = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=(0, None), method="highs")
+    if not result.success:
+        return None
+    return result.x.reshape(n, len(COSTS))
+
+
+def solve_plan(density: np.ndarray, funding: np.ndarray, flex: float = REGION_BUDGET_FLEX) -> np.ndarray | None:
+    """Units per (period, region, intervention) from one sparse LP over all periods.
+
+    ``density`` is the forecast mosquito density per (period, region) and
+    ``funding`` the money released at the start of each period. Spending
+    can be held back for later periods but not brought forward (cumulative
+    spend never exceeds cumulative funding), and each period spends at least
+    ``PERIOD_MIN_SHARE`` of its own funding. Within a period, regions stay
+    within ``flex`` of their forecast-density share of that period's spend
+    and interventions within 20-45% of their region's spend. The objective
+    is cases prevented weighted by relative forecast density, so money goes
+    to the regions and months with the most mosquitoes. Returns None if the
+    solver fails.
+    """
+    n_periods, n_regions = density.shape
+    k = len(COSTS)
+    n_groups = n_periods * n_regions
+    n_units = n_groups * k
+    shares = (density / density.sum(axis=1, keepdims=True)).ravel()
+
+    # Variables: units (period, region, intervention), then one spend total per period
+    group_spend = sparse.kron(sparse.eye(n_groups), COSTS[None, :], format="csr")
+    period_of_group = np.repeat(np.arange(n_periods), n_regions)
+    period_total = sparse.csr_matrix(
+        (shares, (np.arange(n_groups), period_of_group)), shape=(n_groups, n_periods)
+    )
+    no_periods = sparse.csr_matrix((n_units * 2, n_periods))
+    no_units = sparse.csr_matrix((n_periods, n_units))
+
+    A_ub = sparse.vstack([
+        sparse.hstack([_diversification_rows(n_groups, COSTS), no_periods]),
+        sparse.hstack([group_spend, -(1 + flex) * period_total]),
+        sparse.hstack([-group_spend, (1 - flex) * period_total]),
+        sparse.hstack([no_units, sparse.csr_matrix(np.tril(np.ones((n_periods, n_periods))))]),
+        sparse.hstack([no_units, -sparse.eye(n_periods)]),
+    ], format="csr")
+    b_ub = np.concatenate([
+        np.zeros(2 * n_units + 2 * n_groups),
+        np.cumsum(funding),
+        -PERIOD_MIN_SHARE * funding,
+    ])
+    # Period totals are the sum of their regions' spend
+    A_eq = sparse.hstack([
+        sparse.kron(sparse.eye(n_periods), np.tile(COSTS, n_regions)[None, :]),
+        -sparse.eye(n_periods),
+    ], format="csr")
+
+    relative = density / density.mean()
+    c = np.concatenate([-np.multiply.outer(relative, CASES_PREVENTED).ravel(), np.zeros(n_periods)])
+    result = linprog(
+        c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=np.zeros(n_periods), bounds=(0, None), method="highs"
+    )
+    if not result.success:
+        return None
+    return result.x[:n_units].reshape(n_periods, n_regions, k)
+
+
+def sample_cases_per_dollar(n_scenarios: int, seed: int = 0) -> np.ndarray:
+    """Cases prevented per dollar for each intervention, (scenarios x interventions).
+
+    Efficacy and unit cost each get independent lognormal noise with mean 1.
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n_scenarios, len(COSTS))
+    efficacy = CASES_PREVENTED * np.exp(EFFICACY_SIGMA * rng.standard_normal(shape) - EFFICACY_SIGMA ** 2 / 2)
+    cost = COSTS * np.exp(COST_SIGMA * rng.standard_normal(shape) - COST_SIGMA ** 2 / 2)
+    return efficacy / cost
+
+
+def robust_allocation(
+    shares: np.ndarray,
+    budget: float,
+    flex: float,
+    n_scenarios: int,
+    seed: int,
+    objective: str,
+    alpha: float,
+) -> tuple[np.ndarray | None, np.ndarray]:
+    """Dollars per region and intervention under sampled efficacy and cost.
+
+    ``expected`` maximizes the mean outcome over the scenarios; ``cvar``
+    maximizes the mean of the worst ``alpha`` share of scenarios
+    (Rockafellar-Uryasev). Scenarios vary per intervention, so each
+    scenario's outcome only depends on the density-weighted dollars per
+    intervention: three auxiliary variables keep the scenario rows at four
+    nonzeros regardless of the number of regions. Returns (dollars or None
+    if the solver fails, scenarios).
+    """
+    n, k = len(shares), len(COSTS)
+    n_vars = n * k
+    scenarios = sample_cases_per_dollar(n_scenarios, seed)
+    A_base, b_base = _allocation_constraints(shares, budget, flex, np.ones(k))
+
+    # totals_k = sum over regions of relative density * dollars on intervention k
+    A_eq = sparse.hstack([
+        sparse.kron(relative_density(shares), sparse.eye(k)),
+        -sparse.eye(k),
+    ], format="csr")
+
+    if objective == "expected":
+        c = np.concatenate([np.zeros(n_vars), -scenarios.mean(axis=0)])
+        A_ub = sparse.hstack([A_base, sparse.csr_matrix((A_base.shape[0], k))], format="csr")
+        result = linprog(
+            c, A_ub=A_ub, b_ub=b_base, A_eq=A_eq, b_eq=np.zeros(k), bounds=(0, None), method="highs"
+        )
+    elif objective == "cvar":
+        # Extra variables: threshold t (free) and per-scenario shortfall u_s >= 0;
+        # maximize t - mean(u) / alpha subject to u_s >= t - outcome_s
+        c = np.concatenate([np.zeros(n_vars + k), [-1.0], np.full(n_scenarios, 1.0 / (alpha * n_scenarios))])
+        A_ub = sparse.vstack([
+            sparse.hstack([A_base, sparse.csr_matrix((A_base.shape[0], k + 1 + n_scenarios))]),
+            sparse.hstack([
+                sparse.csr_matrix((n_scenarios, n_vars)),
+                -scenarios,
+                np.ones((n_scenarios, 1)),
+                -sparse.eye(n_scenarios),
+            ]),
+        ], format="csr")
+        A_eq = sparse.hstack([A_eq, sparse.csr_matrix((k, 1 + n_scenarios))], format="csr")
+        bounds = [(0, None)] * (n_vars + k) + [(None, None)] + [(0, None)] * n_scenarios
+        result = linprog(
+            c,
+            A_ub=A_ub,
+            b_ub=np.concatenate([b_base, np.zeros(n_scenarios)]),
+            A_eq=A_eq,
+            b_eq=np.zeros(k),
+            bounds=bounds,
+            method="highs",
+        )
+    else:
+        raise ValueError(f"Unknown robust objective: {objective}")
+
+    if not result.success:
+        return None, scenarios
+    return result.x[:n_vars].reshape(n, k), scenarios
+
+
+def scenario_outcomes(units: np.ndarray, scenarios: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Cases prevented by an allocation in every scenario, as one matrix product.
+
+    ``weights`` scales each region's outcome the way the robust LP does
+    (relative density), so the figures describe the optimized quantity.
+    """
+    return scenarios @ (weights @ (units * COSTS))
+
+
+def knapsack_allocation(region_budgets: np.ndarray) -> np.ndarray:
+    """Units per region when each region's budget is fixed, without an LP solver.
+
+    With only a budget row and per-intervention box bounds, each region is a
+    bounded fractional knapsack: give every intervention its minimum share,
+    then fill the rest in order of cases prevented per dollar, each up to
+    its maximum share. All regions are filled at once.
+    """
+    region_budgets = np.asarray(region_budgets, dtype=float)
+    order = np.argsort(-(CASES_PREVENTED / COSTS))
+    floor = MIN_ALLOCATION_PCT * region_budgets
+    room = (MAX_ALLOCATION_PCT - MIN_ALLOCATION_PCT) * region_budgets
+    remaining = region_budgets - len(COSTS) * floor
+
+    # Budget already taken by the better interventions when each one's turn comes
+    taken_before = room[:, None] * np.arange(len(COSTS))[None, :]
+    extra = np.clip(remaining[:, None] - taken_before, 0, room[:, None])
+
+    dollars = np.empty((len(region_budgets), len(COSTS)))
+    dollars[:, order] = floor[:, None] + extra
+    return dollars / COSTS
+
+
+def proportional_allocation(region_budgets: np.ndarray) -> np.ndarray:
+    """Split each region's budget in proportion to cases prevented per dollar."""
+    efficiency = CASES_PREVENTED / COSTS
+    return np.outer(region_budgets, efficiency / efficiency.sum()) / COSTS
+
 
 class OptimizerService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
-    async def _get_region_weights(self, region_ids: list[int]) -> dict[int, float]:
+    async def _get_region_densities(self, region_ids: list[int]) -> dict[int, float]:
+        """All-time average mosquito density per region."""
         query = (
             select(
                 SurveillanceData.region_id,
@@ -45,14 +318,29 @@ class OptimizerService:
             .group_by(SurveillanceData.region_id)
         )
         result = await self.db.execute(query)
-        rows = result.all()
+        return {row.region_id: float(row.avg_density) for row in result.all()}
+
+    async def _get_latest_dates(self, region_ids: list[int]) -> dict[int, date]:
+        """Date of the most recent surveillance reading per region."""
+        query = (
+            select(SurveillanceData.region_id, func.max(SurveillanceData.date).label("latest"))
+            .where(SurveillanceData.region_id.in_(region_ids))
+            .group_by(SurveillanceData.region_id)
+        )
+        result = await self.db.execute(query)
+        return {row.region_id: row.latest for row in result.all()}
 
-        total = sum(row.avg_density for row in rows) or 1.0
-        return {row.region_id: row.avg_density / total for row in rows}
+    async def _get_region_weights(self, region_ids: list[int]) -> dict[int, float]:
+        densities = await self._get_region_densities(region_ids)
+        total = sum(densities.values()) or 1.0
+        return {region_id: density / total for region_id, density in densities.items()}
 
     async def optimize(self, request: OptimizationRequest) -> OptimizationResponse:
-        # Get region names
-        name_query = select(Region.id, Region.name).where(Region.id.in_(request.region_ids))
+        return await optimize_flights.do(request.model_dump_json(), lambda: self._optimize(request))
+
+    async def _load_regions(self, requested: list[int]) -> tuple[list[int], dict[int, str], np.ndarray]:
+        """Valid region IDs (deduplicated, in request order), their names and density shares."""
+        name_query = select(Region.id, Region.name).where(Region.id.in_(requested))
         name_result = await self.db.execute(name_query)
         names = {row.id: row.name for row in name_result.all()}
 
@@ -60,86 +348,217 @@ class OptimizerService:
             raise ValueError("No valid regions found")
 
         # Get density-based weights for budget allocation
-        weights = await self._get_region_weights(request.region_ids)
-
-        allocations = []
-        total_cost = 0.0
-        total_prevented = 0.0
-
-        for region_id in request.region_ids:
-            if region_id not in names:
-                continue
-
-            region_budget = request.budget_usd * weights.get(region_id, 1.0 / len(request.region_ids))
-
-            # Linear programming: maximize cases prevented
-            # Variables: [itn_units, irs_units, larvicide_units]
-            # Objective: minimize negative cases_prevented (to maximize)
-            c = [
-                -CASES_PREVENTED_PER_ITN,
-                -CASES_PREVENTED_PER_IRS,
-                -CASES_PREVENTED_PER_LARVICIDE,
-            ]
-
-            # Budget constraint: cost <= region_budget
-            A_ub = [[COST_PER_ITN, COST_PER_IRS, COST_PER_LARVICIDE]]
-            b_ub = [region_budget]
-
-            # Diversified allocation bounds (WHO integrated vector management)
-            min_itn = MIN_ALLOCATION_PCT * region_budget / COST_PER_ITN
-            max_itn = MAX_ALLOCATION_PCT * region_budget / COST_PER_ITN
-            min_irs = MIN_ALLOCATION_PCT * region_budget / COST_PER_IRS
-            max_irs = MAX_ALLOCATION_PCT * region_budget / COST_PER_IRS
-            min_larv = MIN_ALLOCATION_PCT * region_budget / COST_PER_LARVICIDE
-            max_larv = MAX_ALLOCATION_PCT * region_budget / COST_PER_LARVICIDE
-
-            bounds = [
-                (min_itn, max_itn),
-                (min_irs, max_irs),
-                (min_larv, max_larv),
-            ]
-
-            result = linprog(c, A_ub=A_ub, b_ub=b_ub, bounds=bounds, method="highs")
-
-            if result.success:
-                itn = int(result.x[0])
-                irs = int(result.x[1])
-                larvicide = int(result.x[2])
-            else:
-                # Fallback: proportional allocation based on efficiency
-                eff_itn = CASES_PREVENTED_PER_ITN / COST_PER_ITN
-                eff_irs = CASES_PREVENTED_PER_IRS / COST_PER_IRS
-                eff_larv = CASES_PREVENTED_PER_LARVICIDE / COST_PER_LARVICIDE
-                total_eff = eff_itn + eff_irs + eff_larv
-
-                itn = int((eff_itn / total_eff) * region_budget / COST_PER_ITN)
-                irs = int((eff_irs / total_eff) * region_budget / COST_PER_IRS)
-                larvicide = int((eff_larv / total_eff) * region_budget / COST_PER_LARVICIDE)
-
-            cost = itn * COST_PER_ITN + irs * COST_PER_IRS + larvicide * COST_PER_LARVICIDE
-            prevented = (
-                itn * CASES_PREVENTED_PER_ITN
-                + irs * CASES_PREVENTED_PER_IRS
-                + larvicide * CASES_PREVENTED_PER_LARVICIDE
+        weights = await self._get_region_weights(requested)
+
+        region_ids = [region_id for region_id in dict.fromkeys(requested) if region_id in names]
+        shares = np.array([weights.get(region_id, 1.0 / len(requested)) for region_id in region_ids])
+        return region_ids, names, shares
+
+    @staticmethod
+    def _solve_units(shares: np.ndarray, budget: float, rebalance_regions: bool) -> np.ndarray:
+        """Fractional units per region and intervention for ``budget``."""
+        if rebalance_regions:
+            units = solve_allocation(shares, budget, REGION_BUDGET_FLEX)
+        else:
+            # Fixed per-region budgets decouple into independent knapsacks
+            units = knapsack_allocation(shares * budget)
+        if units is None:
+            logger.warning("Allocation LP failed, using efficiency-proportional allocation")
+            units = proportional_allocation(shares * budget)
+        return units
+
+    async def _optimize(self, request: OptimizationRequest) -> OptimizationResponse:
+        region_ids, names, shares = await self._load_regions(request.region_ids)
+        risk = None
+        if request.objective == "point":
+            units = self._solve_units(shares, request.budget_usd, request.rebalance_regions)
+        else:
+            # Thousands of scenario rows: solve on the CPU pool, off the event loop
+            flex = REGION_BUDGET_FLEX if request.rebalance_regions else 0.0
+            dollars, scenarios = await cpu_pool.run(
+                robust_allocation, shares, request.budget_usd, flex,
+                request.scenarios, request.seed, request.objective, request.cvar_alpha,
             )
+            if dollars is None:
+                logger.warning("Robust allocation LP failed, using the point-estimate allocation")
+                units = self._solve_units(shares, request.budget_usd, request.rebalance_regions)
+            else:
+                units = dollars / COSTS
+        units = np.floor(units + 1e-6).astype(int)
+        if request.objective != "point":
+            risk = self._risk_summary(request, scenario_outcomes(units, scenarios, relative_density(shares)))
 
-            allocations.append(
-                RegionAllocation(
-                    region_id=region_id,
-                    region_name=names[region_id],
-                    itn_units=itn,
-                    irs_units=irs,
-                    larvicide_units=larvicide,
-                    cost=round(cost, 2),
-                    cases_prevented=round(prevented, 2),
-                )
+        costs = units @ COSTS
+        prevented = units @ CASES_PREVENTED
+        allocations = [
+            RegionAllocation(
+                region_id=region_id,
+                region_name=names[region_id],
+                itn_units=int(units[i, 0]),
+                irs_units=int(units[i, 1]),
+                larvicide_units=int(units[i, 2]),
+                cost=round(float(costs[i]), 2),
+                cases_prevented=round(float(prevented[i]), 2),
             )
-            total_cost += cost
-            total_prevented += prevented
+            for i, region_id in enumerate(region_ids)
+        ]
 
         return OptimizationResponse(
             total_budget=request.budget_usd,
-            total_cost=round(total_cost, 2),
-            total_cases_prevented=round(total_prevented, 2),
+            total_cost=round(float(costs.sum()), 2),
+            total_cases_prevented=round(float(prevented.sum()), 2),
+            weighted_cases_prevented=round(float(relative_density(shares) @ prevented), 2),
             allocations=allocations,
+            risk=risk,
+        )
+
+    @staticmethod
+    def _risk_summary(request: OptimizationRequest, outcomes: np.ndarray) -> RiskSummary:
+        tail = np.sort(outcomes)[: max(1, int(np.ceil(request.cvar_alpha * len(outcomes))))]
+        return RiskSummary(
+            objective=request.objective,
+            scenarios=len(outcomes),
+            cvar_alpha=request.cvar_alpha,
+            expected_cases_prevented=round(float(outcomes.mean()), 2),
+            cvar_cases_prevented=round(float(tail.mean()), 2),
+            percentiles={
+                f"p{q}": round(float(v), 2)
+                for q, v in zip(RISK_PERCENTILES, np.percentile(outcomes, RISK_PERCENTILES))
+            },
+        )
+
+    async def sweep(self, request: OptimizationSweepRequest) -> OptimizationSweepResponse:
+        """Cases prevented across a range of budgets, from one data load and one solve.
+
+        Every constraint scales with the budget, so the optimal fractional
+        allocation for budget B is the allocation for the largest budget
+        scaled by B / max; only rounding to whole units differs per point.
+        """
+        region_ids, _, shares = await self._load_regions(request.region_ids)
+        budgets = np.linspace(request.budget_min, request.budget_max, request.steps)
+        base = self._solve_units(shares, request.budget_max, request.rebalance_regions)
+
+        # (budgets, regions, interventions), rounded down to whole units
+        units = np.floor(base[None, :, :] * (budgets / request.budget_max)[:, None, None] + 1e-6)
+        costs = (units @ COSTS).sum(axis=1)
+        prevented = (units @ CASES_PREVENTED).sum(axis=1)
+
+        points = []
+        for i, budget in enumerate(budgets):
+            marginal = None
+            if i > 0 and budget > budgets[i - 1]:
+                marginal = round(float((prevented[i] - prevented[i - 1]) / (budget - budgets[i - 1])), 6)
+            points.append(
+                SweepPoint(
+                    budget=round(float(budget), 2),
+                    total_cost=round(float(costs[i]), 2),
+                    total_cases_prevented=round(float(prevented[i]), 2),
+                    marginal_cases_per_usd=marginal,
+                )
+            )
+        return OptimizationSweepResponse(region_ids=region_ids, points=points)
+
+    async def plan(self, request: PlanRequest) -> PlanResponse:
+        return await optimize_flights.do(("plan", request.model_dump_json()), lambda: self._plan(request))
+
+    async def _plan(self, request: PlanRequest) -> PlanResponse:
+        region_ids, names, _ = await self._load_regions(request.region_ids)
+        days = request.periods * PLAN_PERIOD_DAYS
+
+        # Each region's forecast starts the day after its latest reading. Periods
+        # follow the most recent region's calendar, so regions with older data
+        # need a longer forecast to reach it
+        latest = await self._get_latest_dates(region_ids)
+        if latest:
+            start = max(latest.values()) + timedelta(days=1)
+            horizon = days + (max(latest.values()) - min(latest.values())).days
+        else:
+            start, horizon = date.today(), days
+        # Past the max horizon the lookup key matches no stored run; a region
+        # too far behind to reach the calendar keeps its historical average
+        horizon = min(horizon, max(days, settings.forecast_max_horizon))
+
+        # Reuse forecasts already fitted for the regions' current data; fill the
+        # gaps with the fast Fourier model rather than the requested one
+        forecast_service = ForecastService(self.db)
+        forecasts = await forecast_service.lookup_forecasts(region_ids, horizon, request.model)
+        source = {region_id: request.model for region_id in forecasts}
+        missing = [region_id for region_id in region_ids if region_id not in forecasts]
+        refit: list[int] = []
+        if missing:
+            if request.model != "fourier":
+                logger.warning("No stored %s forecast for regions %s, fitting Fourier", request.model, missing)
+            async for result in forecast_service.generate_batch(missing, horizon, "fourier"):
+                if isinstance(result, RegionForecast):
+                    forecasts[result.region_id] = result
+                    source[result.region_id] = "fourier"
+                    if request.model != "fourier":
+                        refit.append(result.region_id)
+        averages = await self._get_region_densities(region_ids)
+
+        # (periods, regions) mean forecast density over the shared calendar;
+        # regions without a forecast covering it keep their historical average
+        calendar = [start + timedelta(days=i) for i in range(days)]
+        calendar_days = np.array(calendar, dtype="datetime64[D]")
+        sources = {request.model: 0, "fourier": 0, "historical": 0}
+        density = np.empty((request.periods, len(region_ids)))
+        for j, region_id in enumerate(region_ids):
+            predicted = None
+            if region_id in forecasts:
+                series = forecasts[region_id].series
+                first = int(np.searchsorted(series.dates, calendar_days[0]))
+                if np.array_equal(series.dates[first:first + days], calendar_days):
+                    predicted = series.predicted[first:first + days]
+            if predicted is not None:
+                density[:, j] = predicted.reshape(request.periods, PLAN_PERIOD_DAYS).mean(axis=1)
+                sources[source[region_id]] += 1
+            else:
+                density[:, j] = averages.get(region_id, 0.0)
+                sources["historical"] += 1
+        # Avoid zero-density periods dividing by zero in the shares
+        density = np.maximum(density, 1e-6)
+
+        weights = np.array(request.period_weights or [1.0] * request.periods, dtype=float)
+        funding = request.budget_usd * weights / weights.sum()
+        units = await cpu_pool.run(solve_plan, density, funding, REGION_BUDGET_FLEX)
+        if units is None:
+            logger.warning("Plan LP failed, using the per-period density split")
+            units = np.stack([
+                knapsack_allocation(funding[p] * density[p] / density[p].sum()) for p in range(request.periods)
+            ])
+        units = np.floor(units + 1e-6).astype(int)
+
+        costs = units @ COSTS
+        prevented = units @ CASES_PREVENTED
+        periods = [
+            PlanPeriod(
+                period=p + 1,
+                start_date=calendar[p * PLAN_PERIOD_DAYS],
+                end_date=calendar[(p + 1) * PLAN_PERIOD_DAYS - 1],
+                funding=round(float(funding[p]), 2),
+                cost=round(float(costs[p].sum()), 2),
+                cases_prevented=round(float(prevented[p].sum()), 2),
+                allocations=[
+                    RegionAllocation(
+                        region_id=region_id,
+                        region_name=names[region_id],
+                        itn_units=int(units[p, j, 0]),
+                        irs_units=int(units[p, j, 1]),
+                        larvicide_units=int(units[p, j, 2]),
+                        cost=round(float(costs[p, j]), 2),
+                        cases_prevented=round(float(prevented[p, j]), 2),
+                    )
+                    for j, region_id in enumerate(region_ids)
+                ],
+            )
+            for p in range(request.periods)
+        ]
+        return PlanResponse(
+            total_budget=request.budget_usd,
+            total_cost=round(float(costs.sum()), 2),
+            total_cases_prevented=round(float(prevented.sum()), 2),
+            forecast_model=request.model,
+            forecast_sources=sources,
+            refit_regions=sorted(refit),
+            periods=periods,
         )
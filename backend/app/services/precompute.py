@@ -0,0 +1,204 @@
+"""Scheduled warm-up of forecasts and read-side caches.
+
+Run once from the command line with ``python -m app.services.precompute``,
+or daily inside the API by setting ``PRECOMPUTE_TIME``.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, time, timedelta
+from functools import partial
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.models.database import async_session
+from app.schemas.forecast import BatchForecastError
+from app.services.forecast_service import ForecastService, is_degraded
+from app.services.nlp_service import warm_pipeline
+from app.services.region_service import RegionService
+
+logger = logging.getLogger(__name__)
+
+IDLE = "idle"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+
+def parse_run_time(value: str) -> time:
+    """Parse an ``HH:MM`` local time of day."""
+    try:
+        hour, minute = value.split(":")
+        return time(int(hour), int(minute))
+    except ValueError:
+        raise ValueError(f"Invalid precompute time {value!r}, expected HH:MM")
+
+
+def next_run_after(now: datetime, at: time) -> datetime:
+    candidate = datetime.combine(now.date(), at)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+class PrecomputeJob:
+    """Forecasts every region for each configured model and warms the caches.
+
+    Fits go through ``ForecastService.generate_batch`` with a concurrency
+    cap, so the results land in the forecast cache and the forecasts table
+    and a warm-up running during office hours leaves room for live requests.
+    Each step (the GeoJSON cache, each model's batch, the NLP pipeline) has
+    its own session and outcome in ``status["steps"]``, so one failing step
+    does not skip the others. A region that only a fallback model could fit
+    counts towards ``forecasts_degraded`` rather than ``forecasts_done``,
+    since such results are neither cached nor stored. Only one run is
+    active at a time. The GeoJSON step only rebuilds the cached
+    FeatureCollection; region properties such as the risk score are served
+    as stored, not recomputed.
+    """
+
+    def __init__(self, models: list[str], days: int, concurrency: int):
+        self.models = models
+        self.days = days
+        self.concurrency = concurrency
+        self.next_run_at: datetime | None = None
+        self._lock = asyncio.Lock()
+        self._status = self._new_status(IDLE)
+
+    def _new_status(self, state: str) -> dict:
+        return {
+            "state": state,
+            "started_at": None,
+            "finished_at": None,
+            "models": self.models,
+            "days": self.days,
+            "regions_total": 0,
+            "forecasts_total": 0,
+            "forecasts_done": 0,
+            "forecasts_failed": 0,
+            "forecasts_degraded": 0,
+            "geojson_warmed": False,
+            "nlp_warmed": False,
+            "steps": {},
+            "error": None,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def status(self) -> dict:
+        return {
+            **self._status,
+            "next_run_at": self.next_run_at.isoformat() if self.next_run_at else None,
+        }
+
+    async def run(self) -> dict:
+        if self.running:
+            raise RuntimeError("Precompute is already running")
+
+        async with self._lock:
+            status = self._status = self._new_status(RUNNING)
+            status["started_at"] = datetime.utcnow().isoformat()
+            logger.info("Precompute started: models=%s days=%d", ",".join(self.models), self.days)
+            try:
+                async with async_session() as session:
+                    status["regions_total"] = len(await ForecastService(session)._get_region_names())
+                status["forecasts_total"] = status["regions_total"] * len(self.models)
+
+                await self._run_step("geojson_cache", self._warm_geojson)
+                for model_type in self.models:
+                    await self._run_step(f"forecast:{model_type}", partial(self._warm_forecasts, model_type))
+                await self._run_step("nlp", self._warm_nlp)
+
+                failed = [name for name, step in status["steps"].items() if step["state"] == FAILED]
+                if failed:
+                    status["state"] = FAILED
+                    status["error"] = f"Steps failed: {', '.join(failed)}"
+                else:
+                    status["state"] = FINISHED
+            except Exception as e:
+                logger.error("Precompute failed: %s", e)
+                status["state"] = FAILED
+                status["error"] = str(e)[:300]
+            finally:
+                status["finished_at"] = datetime.utcnow().isoformat()
+
+        logger.info(
+            "Precompute %s: %d forecasts, %d failed, %d degraded",
+            status["state"], status["forecasts_done"], status["forecasts_failed"], status["forecasts_degraded"],
+        )
+        return self.status()
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable[None]]) -> None:
+        outcome = self._status["steps"][name] = {"state": RUNNING, "error": None}
+        try:
+            await step()
+            outcome["state"] = FINISHED
+        except Exception as e:
+            logger.error("Precompute step %s failed: %s", name, e)
+            outcome["state"] = FAILED
+            outcome["error"] = str(e)[:300]
+
+    async def _warm_geojson(self) -> None:
+        async with async_session() as session:
+            await RegionService(session).refresh_geojson()
+        self._status["geojson_warmed"] = True
+
+    async def _warm_forecasts(self, model_type: str) -> None:
+        status = self._status
+        step = status["steps"][f"forecast:{model_type}"]
+        step["degraded"] = 0
+        async with async_session() as session:
+            service = ForecastService(session)
+            async for result in service.generate_batch(None, self.days, model_type, concurrency=self.concurrency):
+                if isinstance(result, BatchForecastError):
+                    status["forecasts_failed"] += 1
+                elif is_degraded(model_type, result):
+                    status["forecasts_degraded"] += 1
+                    step["degraded"] += 1
+                else:
+                    status["forecasts_done"] += 1
+        if step["degraded"]:
+            logger.warning(
+                "Precompute %s: %d regions fell back to another model and were not stored",
+                model_type, step["degraded"],
+            )
+
+    async def _warm_nlp(self) -> None:
+        # Loading the summarizer takes tens of seconds; keep it off the loop
+        self._status["nlp_warmed"] = await asyncio.to_thread(warm_pipeline)
+
+    async def run_daily(self, at: time) -> None:
+        while True:
+            self.next_run_at = next_run_after(datetime.now(), at)
+            await asyncio.sleep((self.next_run_at - datetime.now()).total_seconds())
+            if self.running:
+                logger.warning("Skipping scheduled precompute, previous run still active")
+                continue
+            await self.run()
+
+
+precompute_job = PrecomputeJob(
+    models=[m.strip() for m in settings.precompute_models.split(",") if m.strip()],
+    days=settings.precompute_days,
+    concurrency=settings.precompute_concurrency,
+)
+
+
+async def main() -> None:
+    from app.services.r_worker_pool import r_worker_pool
+    from app.services.worker_pool import cpu_pool
+
+    try:
+        status = await precompute_job.run()
+    finally:
+        await r_worker_pool.shutdown()
+        cpu_pool.shutdown()
+    if status["state"] != FINISHED:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=getattr(logging, settings.log_level.upper()))
+    asyncio.run(main())
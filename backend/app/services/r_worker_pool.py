@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import os
+import shlex
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Replies for long horizons (and multi-series jobs) are far larger than
+# asyncio's default 64 KiB line limit
+MAX_REPLY_BYTES = 32 * 1024 * 1024
+
+
+class RWorkerError(RuntimeError):
+    """Raised when an R worker cannot be started or stops responding."""
+
+
+class RWorker:
+    """One long-lived R process speaking newline-delimited JSON over stdio."""
+
+    def __init__(self, command: list[str]):
+        self.command = command
+        self.process: asyncio.subprocess.Process | None = None
+        self.jobs_served = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self) -> None:
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                limit=MAX_REPLY_BYTES,
+            )
+        except FileNotFoundError:
+            raise RWorkerError(f"{self.command[0]} not found. R is not installed or not in PATH.")
+        except OSError as e:
+            raise RWorkerError(f"Failed to start R worker: {e}")
+        self.jobs_served = 0
+
+    async def request(self, payload: dict, timeout: float) -> dict:
+        if not self.alive:
+            raise RWorkerError("R worker is not running")
+        try:
+            self.process.stdin.write(json.dumps(payload).encode() + b"\n")
+            await self.process.stdin.drain()
+            line = await asyncio.wait_for(self.process.stdout.readline(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise RWorkerError(f"R worker timed out after {timeout}s")
+        except (ConnectionError, OSError, ValueError) as e:
+            raise RWorkerError(f"R worker connection failed: {e}")
+
+        if not line:
+            raise RWorkerError("R worker exited unexpectedly")
+        try:
+            reply = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise RWorkerError(f"Failed to parse R output: {e}")
+        self.jobs_served += 1
+        return reply
+
+    async def ping(self, timeout: float) -> bool:
+        try:
+            return (await self.request({"ping": True}, timeout)).get("pong") is True
+        except RWorkerError:
+            return False
+
+    async def stop(self) -> None:
+        if not self.alive:
+            return
+        self.process.kill()
+        await self.process.wait()
+
+
+class RWorkerPool:
+    """Fixed-size pool of warm R workers.
+
+    Workers load their libraries once at startup and then serve jobs for
+    the lifetime of the API. At most ``size`` jobs run at once; further
+    callers wait for a free worker. A worker that times out, dies or
+    returns garbage is killed and replaced before it is handed out again.
+    """
+
+    def __init__(self, command: list[str], size: int, health_timeout: float = 10.0):
+        self.command = command
+        self.size = size
+        self.health_timeout = health_timeout
+        self.restarts = 0
+        self._workers: list[RWorker] = []
+        self._idle: asyncio.Queue[RWorker] | None = None
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def started(self) -> bool:
+        return self._idle is not None
+
+    async def start(self) -> None:
+        async with self._start_lock:
+            if self.started:
+                return
+            workers = [RWorker(self.command) for _ in range(self.size)]
+            try:
+                for worker in workers:
+                    await worker.start()
+            except RWorkerError:
+                for worker in workers:
+                    await worker.stop()
+                raise
+
+            self._workers = workers
+            self._idle = asyncio.Queue()
+            for worker in workers:
+                self._idle.put_nowait(worker)
+            logger.info("Started %d R workers: %s", self.size, " ".join(self.command))
+
+    async def _restart(self, worker: RWorker) -> None:
+        await worker.stop()
+        self.restarts += 1
+        await worker.start()
+
+    async def submit(self, payload: dict, timeout: float) -> dict:
+        if not self.started:
+            await self.start()
+
+        worker = await self._idle.get()
+        try:
+            if not worker.alive:
+                logger.warning("R worker died while idle, restarting")
+                await self._restart(worker)
+            return await worker.request(payload, timeout)
+        except asyncio.CancelledError:
+            # Abandoned mid-job: its late reply would be read by the next caller
+            if worker.alive:
+                worker.process.kill()
+            raise
+        except RWorkerError:
+            # The worker may be stuck mid-job or out of sync with the protocol
+            try:
+                await self._restart(worker)
+            except RWorkerError as e:
+                logger.error("Could not restart R worker: %s", e)
+            raise
+        finally:
+            self._idle.put_nowait(worker)
+
+    async def health_check(self) -> int:
+        """Ping every idle worker, restarting the unresponsive ones.
+
+        Returns the number of workers that had to be restarted.
+        """
+        if not self.started:
+            return 0
+
+        restarted = 0
+        for _ in range(self._idle.qsize()):
+            worker = self._idle.get_nowait()
+            try:
+                if not await worker.ping(self.health_timeout):
+                    logger.warning("R worker failed health check, restarting")
+                    await self._restart(worker)
+                    restarted += 1
+            except RWorkerError as e:
+                logger.error("Could not restart R worker: %s", e)
+            finally:
+                self._idle.put_nowait(worker)
+        return restarted
+
+    async def run_health_checks(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.health_check()
+
+    def stats(self) -> dict:
+        return {
+            "started": self.started,
+            "size": self.size,
+            "idle": self._idle.qsize() if self.started else 0,
+            "alive": sum(1 for w in self._workers if w.alive),
+            "restarts": self.restarts,
+        }
+
+    async def shutdown(self) -> None:
+        for worker in self._workers:
+            await worker.stop()
+        self._workers = []
+        self._idle = None
+
+
+def _worker_command() -> list[str]:
+    if settings.r_worker_command:
+        return shlex.split(settings.r_worker_command)
+    return ["Rscript", os.path.join(settings.r_script_path, "arima_worker.R")]
+
+
+r_worker_pool = RWorkerPool(command=_worker_command(), size=settings.r_workers)
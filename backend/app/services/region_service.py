@@ -1,8 +1,10 @@
 import json
+import time
 
 from sqlalchemy import func, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.models.region import Region
 from app.models.surveillance import SurveillanceData
 from app.schemas.region import (
@@ -12,12 +14,29 @@ from app.schemas.region import (
     RegionProperties,
 )
 
+# (built_at, collection): geometries and region properties change rarely
+_geojson_cache: tuple[float, RegionGeoJSON] | None = None
+
+
+def clear_geojson_cache() -> None:
+    global _geojson_cache
+    _geojson_cache = None
+
 
 class RegionService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     async def get_all_geojson(self) -> RegionGeoJSON:
+        if _geojson_cache is not None:
+            built_at, collection = _geojson_cache
+            if time.monotonic() - built_at < settings.geojson_cache_ttl:
+                return collection
+        return await self.refresh_geojson()
+
+    async def refresh_geojson(self) -> RegionGeoJSON:
+        """Rebuild the region FeatureCollection and replace the cached copy."""
+        global _geojson_cache
         query = select(
             Region.id,
             Region.name,
@@ -45,7 +64,9 @@ class RegionService:
                 )
             )
 
-        return RegionGeoJSON(features=features)
+        collection = RegionGeoJSON(features=features)
+        _geojson_cache = (time.monotonic(), collection)
+        return collection
 
     async def get_region_detail(self, region_id: int) -> RegionDetail | None:
         query = select(Region).where(Region.id == region_id)
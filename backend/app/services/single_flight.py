@@ -0,0 +1,49 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent identical calls into one in-flight computation.
+
+    The first caller for a key runs the computation; callers arriving while
+    it is in flight await the same result (or exception). Nothing is kept
+    once it finishes, so this only removes duplicate concurrent work and
+    never serves stale results.
+
+    The computation runs in the first caller's context (e.g. its DB session)
+    and is cancelled with it. Waiting callers then retry, and one of them
+    runs the computation itself.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0
+        self._calls: dict[Hashable, asyncio.Future] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            task = self._calls.get(key)
+            if task is None:
+                task = asyncio.ensure_future(fn())
+                self._calls[key] = task
+                task.add_done_callback(lambda done, key=key: self._forget(key, done))
+                return await task
+
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if task.cancelled() and not asyncio.current_task().cancelling():
+                    # The first caller went away, not us: take over the work
+                    continue
+                raise
+
+    def in_flight(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,100 @@
+"""How much history each model is fitted on, and at what resolution.
+
+Without a cap, fit time grows with the surveillance table. Each model gets a
+lookback window (``FORECAST_LOOKBACK_DAYS``), and requests for more than
+``FORECAST_WEEKLY_AFTER_DAYS`` days are fitted on weekly means and
+interpolated back to daily points. Windowing and aggregation happen in the
+history query; the few missing days or weeks left afterwards are
+interpolated.
+"""
+
+import math
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.forecast_series import ForecastSeries
+
+DAILY = "daily"
+WEEKLY = "weekly"
+
+# Day numbers are shifted so weekly buckets start on Mondays (1970-01-01 was a Thursday)
+WEEK_SHIFT = 3
+
+
+@dataclass(frozen=True)
+class TrainingWindow:
+    lookback_days: int | None = None
+    weekly: bool = False
+
+    @property
+    def resolution(self) -> str:
+        return WEEKLY if self.weekly else DAILY
+
+    def cutoff(self, latest: date | None) -> date | None:
+        """First date fitted on for a region whose data runs through ``latest``."""
+        if self.lookback_days is None or latest is None:
+            return None
+        return latest - timedelta(days=self.lookback_days - 1)
+
+    def fit_steps(self, days: int) -> int:
+        """Forecast steps to fit for ``days`` daily points."""
+        if not self.weekly:
+            return days
+        # One extra week so the last days interpolate rather than extrapolate
+        return math.ceil(days / 7) + 1
+
+    def to_daily(
+        self, history: pd.DataFrame, latest: date, series: ForecastSeries, days: int
+    ) -> ForecastSeries:
+        """Daily forecast for the ``days`` after ``latest`` from a fit on ``history``."""
+        if not self.weekly:
+            return series
+        return expand_weekly(pd.to_datetime(history["ds"].iloc[-1]).date(), latest, series, days)
+
+
+def fit_resolution(days: int) -> str:
+    """Resolution a request for ``days`` daily points is fitted at."""
+    weekly_after = settings.forecast_weekly_after_days
+    return WEEKLY if 0 < weekly_after < days else DAILY
+
+
+def training_window(model_type: str, resolution: str) -> TrainingWindow:
+    lookback = settings.forecast_lookback_days.get(model_type)
+    return TrainingWindow(
+        lookback_days=lookback if lookback and lookback > 0 else None,
+        weekly=resolution == WEEKLY,
+    )
+
+
+def week_start(bucket: np.ndarray) -> pd.DatetimeIndex:
+    return pd.to_datetime(np.asarray(bucket, dtype=np.int64) * 7 - WEEK_SHIFT, unit="D")
+
+
+def fill_gaps(df: pd.DataFrame, weekly: bool) -> pd.DataFrame:
+    """Reindex to one row per day (or week) and interpolate missing values."""
+    if len(df) < 2:
+        return df
+    series = df.set_index("ds")["y"].asfreq("7D" if weekly else "D")
+    if series.isna().any():
+        series = series.interpolate()
+    return series.rename("y").reset_index()
+
+
+def expand_weekly(last_week: date, latest: date, series: ForecastSeries, days: int) -> ForecastSeries:
+    """Interpolate weekly forecast steps to daily values.
+
+    Step ``i`` is the mean of the week starting ``last_week + 7 * i`` and is
+    placed mid-week; days before the first step take its value.
+    """
+    centers = (last_week - latest).days + 7 * np.arange(1, len(series) + 1) + 3.0
+    offsets = np.arange(1, days + 1, dtype=float)
+    return ForecastSeries.after(
+        latest,
+        np.interp(offsets, centers, series.predicted),
+        np.interp(offsets, centers, series.lower),
+        np.interp(offsets, centers, series.upper),
+    )
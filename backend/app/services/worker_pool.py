@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPoolFullError(RuntimeError):
+    """Raised when the pool already has its maximum number of jobs queued."""
+
+
+class WorkerTimeoutError(RuntimeError):
+    """Raised when a job does not finish within the per-job timeout."""
+
+
+class CPUWorkerPool:
+    """Bounded pool for CPU-bound model fitting, kept off the event loop.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait behind them; further submissions are rejected immediately. A job
+    that exceeds ``timeout`` seconds is abandoned by the caller, but it keeps
+    counting against capacity until its worker actually finishes, so slow
+    fits cannot pile up unbounded work behind the API.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, timeout: float, use_processes: bool = True):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.use_processes = use_processes
+        self.timeouts = 0
+        self.rejected = 0
+        self._executor: Executor | None = None
+        self._in_flight = 0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                # spawn, not fork: the API process runs an event loop and DB driver threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="cpu-worker"
+                )
+        return self._executor
+
+    def _release(self, _future: Any = None) -> None:
+        self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._in_flight >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise WorkerPoolFullError(
+                f"Forecast workers are busy ({self._in_flight} jobs in flight), try again shortly"
+            )
+
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            future = loop.run_in_executor(self._get_executor(), fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            name = getattr(fn, "__qualname__", repr(fn))
+            logger.warning("%s exceeded the %ss job timeout", name, self.timeout)
+            raise WorkerTimeoutError(f"{name} timed out after {self.timeout}s")
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+cpu_pool = CPUWorkerPool(
+    max_workers=settings.cpu_workers or os.cpu_count() or 1,
+    max_queue=settings.cpu_queue_depth,
+    timeout=settings.cpu_job_timeout,
+    use_processes=settings.cpu_pool_processes,
+)
@@ -25,6 +25,64 @@ def event_loop():
     loop.close()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def cpu_pool_threads():
+    """Run model fits on threads in tests so patched fit methods stay visible."""
+    from app.services.worker_pool import cpu_pool
+
+    cpu_pool.shutdown()
+    cpu_pool.use_processes = False
+    yield
+    cpu_pool.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def reset_r_circuit():
+    from app.services.arima_service import r_circuit
+
+    r_circuit.reset()
+    yield
+    r_circuit.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_arima_state():
+    from app.services.arima_service import arima_orders, arima_states
+
+    arima_orders.clear()
+    arima_states.clear()
+    yield
+    arima_orders.clear()
+    arima_states.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_forecast_cache():
+    from app.services.forecast_cache import forecast_cache
+
+    forecast_cache.clear()
+    yield
+    forecast_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_geojson_cache():
+    from app.services.region_service import clear_geojson_cache
+
+    clear_geojson_cache()
+    yield
+    clear_geojson_cache()
+
+
+@pytest.fixture(autouse=True)
+def clear_forecast_jobs():
+    from app.services.forecast_jobs import forecast_jobs
+
+    forecast_jobs.clear()
+    yield
+    forecast_jobs.clear()
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_engine():
     engine_kwargs = {}
@@ -1,21 +1,20 @@
 from datetime import date
 from unittest.mock import patch, AsyncMock
 
+import msgpack
 import pytest
 
-from app.schemas.forecast import ForecastPoint, ForecastResponse
+from app.services.forecast_series import ForecastSeries, RegionForecast
 
 
 @pytest.mark.asyncio
 async def test_get_forecast_success(client):
-    mock_response = ForecastResponse(
+    mock_response = RegionForecast(
         region_id=1,
         region_name="Dar es Salaam",
         model_type="prophet",
         forecast_days=30,
-        points=[
-            ForecastPoint(date=date(2024, 7, 1), predicted_density=120.5, lower_ci=100.0, upper_ci=140.0),
-        ],
+        series=ForecastSeries.of([date(2024, 7, 1)], [120.5], [100.0], [140.0]),
     )
 
     with patch("app.api.routes.forecast.ForecastService") as MockService:
@@ -50,3 +49,198 @@ async def test_get_forecast_server_error(client):
         response = await client.get("/api/v1/forecast/1")
 
     assert response.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_get_forecast_workers_busy(client):
+    from app.services.worker_pool import WorkerPoolFullError
+
+    with patch("app.api.routes.forecast.ForecastService") as MockService:
+        instance = MockService.return_value
+        instance.generate_forecast = AsyncMock(side_effect=WorkerPoolFullError("busy"))
+
+        response = await client.get("/api/v1/forecast/1")
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+async def test_batch_forecast_streams_ndjson(client):
+    import json
+
+    from app.schemas.forecast import BatchForecastError
+
+    async def fake_batch(region_ids, days, model_type):
+        yield RegionForecast(
+            region_id=1,
+            region_name="Dar es Salaam",
+            model_type="prophet",
+            forecast_days=7,
+            series=ForecastSeries.of([date(2024, 7, 1)], [120.5], [100.0], [140.0]),
+        )
+        yield BatchForecastError(region_id=999, detail="Region 999 not found")
+
+    with patch("app.api.routes.forecast.ForecastService") as MockService:
+        MockService.return_value.generate_batch = fake_batch
+
+        response = await client.post(
+            "/api/v1/forecast/batch",
+            json={"region_ids": [1, 999], "days": 7, "model": "prophet"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["region_name"] == "Dar es Salaam"
+    assert lines[0]["points"][0]["date"] == "2024-07-01"
+    assert lines[1] == {"region_id": 999, "detail": "Region 999 not found"}
+
+
+@pytest.mark.asyncio
+async def test_batch_forecast_validation_error(client):
+    response = await client.post(
+        "/api/v1/forecast/batch",
+        json={"region_ids": "some", "days": 7},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_forecast_fourier_model(client, seeded_db):
+    response = await client.get("/api/v1/forecast/1?days=7&model=fourier")
+    assert response.status_code == 200
+    assert response.json()["model_type"] == "fourier"
+
+
+def _single_point_response():
+    return RegionForecast(
+        region_id=1,
+        region_name="Dar es Salaam",
+        model_type="prophet",
+        forecast_days=7,
+        series=ForecastSeries.of(
+            [date(2024, 7, 1), date(2024, 7, 2)], [120.5, 121.0], [100.0, 101.0], [140.0, 141.0]
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_forecast_columnar(client):
+    # The columns come straight from the arrays; no point objects are built
+    with patch("app.api.routes.forecast.ForecastService") as MockService, \
+            patch.object(ForecastSeries, "to_points", side_effect=AssertionError("points built")):
+        MockService.return_value.generate_forecast = AsyncMock(return_value=_single_point_response())
+
+        response = await client.get("/api/v1/forecast/1?days=7&format=columnar")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert "points" not in data
+    assert data["dates"] == ["2024-07-01", "2024-07-02"]
+    assert data["predicted"] == [120.5, 121.0]
+    assert data["lower"] == [100.0, 101.0]
+    assert data["upper"] == [140.0, 141.0]
+
+
+@pytest.mark.asyncio
+async def test_get_forecast_msgpack(client):
+    with patch("app.api.routes.forecast.ForecastService") as MockService:
+        MockService.return_value.generate_forecast = AsyncMock(return_value=_single_point_response())
+
+        response = await client.get("/api/v1/forecast/1?format=msgpack")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    data = msgpack.unpackb(response.content)
+    assert data["predicted"] == [120.5, 121.0]
+
+
+@pytest.mark.asyncio
+async def test_batch_forecast_columnar(client):
+    import json
+
+    from app.schemas.forecast import BatchForecastError
+
+    async def fake_batch(region_ids, days, model_type):
+        yield _single_point_response()
+        yield BatchForecastError(region_id=999, detail="Region 999 not found")
+
+    with patch("app.api.routes.forecast.ForecastService") as MockService:
+        MockService.return_value.generate_batch = fake_batch
+
+        response = await client.post(
+            "/api/v1/forecast/batch",
+            json={"region_ids": [1, 999], "days": 7, "format": "columnar"},
+        )
+
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["dates"] == ["2024-07-01", "2024-07-02"]
+    assert lines[1] == {"region_id": 999, "detail": "Region 999 not found"}
+
+
+@pytest.mark.asyncio
+async def test_forecast_job_submit_and_poll(client, db_engine, seeded_db):
+    import asyncio
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    with patch("app.services.forecast_jobs.async_session", session_factory):
+        response = await client.post("/api/v1/forecast/jobs", json={"region_ids": [1], "days": 7, "model": "fourier"})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["state"] in ("queued", "running")
+        assert job["results"] is None
+
+        for _ in range(200):
+            job = (await client.get(f"/api/v1/forecast/jobs/{job['job_id']}")).json()
+            if job["state"] not in ("queued", "running"):
+                break
+            await asyncio.sleep(0.01)
+
+    assert job["state"] == "finished"
+    assert job["regions_done"] == 1
+    assert len(job["results"][0]["points"]) == 7
+
+
+@pytest.mark.asyncio
+async def test_forecast_job_not_found(client):
+    response = await client.get("/api/v1/forecast/jobs/unknown")
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_stream_forecasts_sse(client):
+    import json
+
+    from app.schemas.forecast import BatchForecastError
+
+    async def fake_batch(region_ids, days, model_type):
+        assert region_ids == [1, 999]
+        yield _single_point_response()
+        yield BatchForecastError(region_id=999, detail="Region 999 not found")
+
+    with patch("app.api.routes.forecast.ForecastService") as MockService:
+        MockService.return_value.generate_batch = fake_batch
+
+        response = await client.get("/api/v1/forecast/stream?regions=1,999&days=7")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+
+    assert [name for name, _ in events] == ["forecast", "error", "summary"]
+    assert events[0][1]["predicted"] == [120.5, 121.0]
+    assert events[1][1]["region_id"] == 999
+    assert events[2][1]["regions_done"] == 1
+    assert events[2][1]["regions_failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_forecasts_rejects_bad_regions(client):
+    response = await client.get("/api/v1/forecast/stream?regions=1,two")
+    assert response.status_code == 422
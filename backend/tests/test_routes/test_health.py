@@ -9,3 +9,13 @@ async def test_health_check(client):
     assert data["status"] == "healthy"
     assert "database" in data
     assert data["version"] == "1.0.0"
+
+
+@pytest.mark.asyncio
+async def test_r_health_reports_circuit_state(client):
+    response = await client.get("/api/v1/health/r")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["circuit"]["state"] == "closed"
+    assert "workers" in data
+
@@ -11,6 +11,7 @@ async def test_optimize_success(client):
         total_budget=50000,
         total_cost=49500,
         total_cases_prevented=500,
+        weighted_cases_prevented=560,
         allocations=[
             RegionAllocation(
                 region_id=1, region_name="Dar es Salaam",
@@ -51,3 +52,45 @@ async def test_optimize_empty_regions(client):
         json={"budget_usd": 50000, "region_ids": []},
     )
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_optimize_sweep(client, seeded_db):
+    response = await client.post(
+        "/api/v1/optimize/sweep",
+        json={"budget_min": 1000, "budget_max": 5000, "steps": 3, "region_ids": [1, 2]},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["budget"] for p in data["points"]] == [1000, 3000, 5000]
+    assert data["points"][2]["marginal_cases_per_usd"] > 0
+
+
+@pytest.mark.asyncio
+async def test_optimize_sweep_rejects_inverted_range(client):
+    response = await client.post(
+        "/api/v1/optimize/sweep",
+        json={"budget_min": 5000, "budget_max": 1000, "region_ids": [1]},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_optimize_plan(client, seeded_db):
+    response = await client.post(
+        "/api/v1/optimize/plan",
+        json={"budget_usd": 60000, "region_ids": [1, 2], "periods": 2, "model": "fourier"},
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [p["period"] for p in data["periods"]] == [1, 2]
+    assert data["total_cost"] <= 60000
+
+
+@pytest.mark.asyncio
+async def test_optimize_plan_rejects_mismatched_weights(client):
+    response = await client.post(
+        "/api/v1/optimize/plan",
+        json={"budget_usd": 60000, "region_ids": [1], "periods": 3, "period_weights": [1, 2]},
+    )
+    assert response.status_code == 422
@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_precompute_status(client):
+    response = await client.get("/api/v1/precompute/status")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["state"] in ("idle", "running", "finished", "failed")
+    assert "forecasts_done" in data
+
+
+@pytest.mark.asyncio
+async def test_precompute_trigger_conflict(client):
+    from app.services.precompute import precompute_job
+
+    async with precompute_job._lock:
+        response = await client.post("/api/v1/precompute/run")
+    assert response.status_code == 409
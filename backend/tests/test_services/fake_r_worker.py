@@ -0,0 +1,52 @@
+"""Stand-in for arima_worker.R that speaks the same NDJSON protocol.
+
+Used by the R worker pool tests where R is not installed. Forecasts are a
+flat line at the last observed value.
+"""
+
+import json
+import sys
+from datetime import date, timedelta
+
+
+def forecast(job):
+    last_date = date.fromisoformat(job["dates"][-1][:10])
+    last_value = float(job["values"][-1])
+    return [
+        {
+            "date": (last_date + timedelta(days=i + 1)).isoformat(),
+            "forecast": last_value,
+            "lower": last_value - 10,
+            "upper": last_value + 10,
+        }
+        for i in range(int(job["horizon"]))
+    ]
+
+
+for line in sys.stdin:
+    if not line.strip():
+        continue
+    job = json.loads(line)
+    if job.get("exit"):
+        sys.exit(1)
+    if job.get("ping"):
+        reply = {"pong": True}
+    elif "sleep" in job:
+        import time
+
+        time.sleep(job["sleep"])
+        reply = {"slept": job["sleep"]}
+    elif "series" in job:
+        reply = {"forecasts": {}, "errors": {}}
+        for key, series in job["series"].items():
+            try:
+                reply["forecasts"][key] = forecast({**series, "horizon": job["horizon"]})
+            except Exception as e:
+                reply["errors"][key] = str(e)
+    else:
+        try:
+            reply = {"forecasts": forecast(job)}
+        except Exception as e:
+            reply = {"error": str(e)}
+    sys.stdout.write(json.dumps(reply) + "\n")
+    sys.stdout.flush()
@@ -29,72 +29,92 @@ def make_r_output(horizon=30, start_date=date(2023, 4, 11)):
 
 @pytest.mark.asyncio
 async def test_arima_forecast_success():
-    mock_process = AsyncMock()
-    mock_process.returncode = 0
-    mock_process.communicate = AsyncMock(return_value=(make_r_output(), b""))
-
-    with patch("asyncio.create_subprocess_exec", return_value=mock_process):
+    with patch(
+        "app.services.arima_service.r_worker_pool.submit",
+        AsyncMock(return_value=json.loads(make_r_output())),
+    ) as mock_submit:
         service = ARIMAService()
         df = make_test_df()
-        points = await service.forecast(df, 30)
+        series = await service.forecast(df, 30)
 
-    assert len(points) == 30
-    assert points[0].predicted_density >= 0
-    assert points[0].lower_ci >= 0
-    assert points[0].upper_ci >= 0
+    assert len(series) == 30
+    assert series.predicted[0] >= 0
+    assert series.lower[0] >= 0
+    assert series.upper[0] >= 0
+    job = mock_submit.call_args.args[0]
+    assert job["horizon"] == 30
+    assert len(job["values"]) == 100
 
 
 @pytest.mark.asyncio
 async def test_arima_forecast_r_failure_falls_back():
     """When R ARIMA fails, forecast() should fall back to Python statsmodels."""
-    mock_process = AsyncMock()
-    mock_process.returncode = 1
-    mock_process.communicate = AsyncMock(return_value=(b"", b"Error in auto.arima"))
-
-    with patch("asyncio.create_subprocess_exec", return_value=mock_process):
+    with patch(
+        "app.services.arima_service.r_worker_pool.submit",
+        AsyncMock(return_value={"error": "Error in auto.arima"}),
+    ):
         service = ARIMAService()
         df = make_test_df()
-        points = await service.forecast(df, 30)
+        series = await service.forecast(df, 30)
 
     # Should succeed via Python fallback
-    assert len(points) == 30
-    assert points[0].predicted_density >= 0
+    assert len(series) == 30
+    assert series.predicted[0] >= 0
 
 
 @pytest.mark.asyncio
 async def test_arima_forecast_timeout_falls_back():
-    """When R ARIMA times out, forecast() should fall back to Python statsmodels."""
-    import asyncio
-
-    mock_process = AsyncMock()
-    mock_process.communicate = AsyncMock(side_effect=asyncio.TimeoutError)
+    """When the R worker times out, forecast() should fall back to Python statsmodels."""
+    from app.services.r_worker_pool import RWorkerError
 
-    with patch("asyncio.create_subprocess_exec", return_value=mock_process):
+    with patch(
+        "app.services.arima_service.r_worker_pool.submit",
+        AsyncMock(side_effect=RWorkerError("R worker timed out after 1s")),
+    ):
         service = ARIMAService()
         service.timeout = 1
         df = make_test_df()
-        points = await service.forecast(df, 30)
+        series = await service.forecast(df, 30)
 
     # Should succeed via Python fallback
-    assert len(points) == 30
-    assert points[0].predicted_density >= 0
+    assert len(series) == 30
+    assert series.predicted[0] >= 0
 
 
 @pytest.mark.asyncio
-async def test_arima_forecast_invalid_json_falls_back():
-    """When R returns invalid JSON, forecast() should fall back to Python statsmodels."""
-    mock_process = AsyncMock()
-    mock_process.returncode = 0
-    mock_process.communicate = AsyncMock(return_value=(b"not json", b""))
-
-    with patch("asyncio.create_subprocess_exec", return_value=mock_process):
+async def test_arima_forecast_invalid_output_falls_back():
+    """When R returns output without forecasts, forecast() should fall back to Python statsmodels."""
+    with patch(
+        "app.services.arima_service.r_worker_pool.submit",
+        AsyncMock(return_value={"unexpected": True}),
+    ):
         service = ARIMAService()
         df = make_test_df()
-        points = await service.forecast(df, 30)
+        series = await service.forecast(df, 30)
 
     # Should succeed via Python fallback
-    assert len(points) == 30
-    assert points[0].predicted_density >= 0
+    assert len(series) == 30
+    assert series.predicted[0] >= 0
+
+
+@pytest.mark.asyncio
+async def test_arima_forecast_via_worker_script():
+    """End to end through a warm worker process speaking the R worker protocol."""
+    import os
+    import sys
+
+    from app.services.r_worker_pool import RWorkerPool
+
+    fake_worker = os.path.join(os.path.dirname(__file__), "fake_r_worker.py")
+    pool = RWorkerPool([sys.executable, fake_worker], size=1)
+    try:
+        with patch("app.services.arima_service.r_worker_pool", pool):
+            series = await ARIMAService().forecast(make_test_df(), 7)
+    finally:
+        await pool.shutdown()
+
+    assert len(series) == 7
+    assert series.predicted[0] == round(50 + 99 * 0.1, 2)
 
 
 @pytest.mark.asyncio
@@ -102,10 +122,290 @@ async def test_arima_python_forecast_directly():
     """Test the Python statsmodels ARIMA forecast directly."""
     service = ARIMAService()
     df = make_test_df()
-    points = await service._python_forecast(df, 30)
+    series = await service._python_forecast(df, 30)
+
+    assert len(series) == 30
+    assert (series.predicted >= 0).all()
+    assert (series.lower >= 0).all()
+    assert (series.upper >= 0).all()
+
+
+@pytest.mark.asyncio
+async def test_arima_circuit_skips_r_after_repeated_failures():
+    """Once R has failed repeatedly, requests go straight to statsmodels."""
+    from app.services.arima_service import r_circuit
+    from app.services.r_worker_pool import RWorkerError
+
+    mock_submit = AsyncMock(side_effect=RWorkerError("Rscript not found"))
+    with patch("app.services.arima_service.r_worker_pool.submit", mock_submit), \
+         patch.object(ARIMAService, "_python_forecast", AsyncMock(return_value=[])):
+        service = ARIMAService()
+        for _ in range(r_circuit.failure_threshold + 2):
+            await service.forecast(make_test_df(), 7)
+
+    assert mock_submit.call_count == r_circuit.failure_threshold
+    assert r_circuit.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_arima_series_error_does_not_trip_circuit():
+    """R rejecting one series is not an infrastructure failure."""
+    from app.services.arima_service import r_circuit
+
+    with patch(
+        "app.services.arima_service.r_worker_pool.submit",
+        AsyncMock(return_value={"error": "non-finite value"}),
+    ), patch.object(ARIMAService, "_python_forecast", AsyncMock(return_value=[])):
+        service = ARIMAService()
+        for _ in range(r_circuit.failure_threshold + 1):
+            await service.forecast(make_test_df(), 7)
+
+    assert r_circuit.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_arima_half_open_trial_with_series_error_closes_circuit():
+    """A series-level error in the trial call proves R is reachable."""
+    from app.services.arima_service import r_circuit
+
+    for _ in range(r_circuit.failure_threshold):
+        r_circuit.record_failure()
+    r_circuit._opened_at -= r_circuit.cooldown
+    assert r_circuit.state == "half_open"
+
+    with patch.object(ARIMAService, "_r_forecast", AsyncMock(side_effect=RuntimeError("R ARIMA failed: bad series"))), \
+         patch.object(ARIMAService, "_python_forecast", AsyncMock(return_value=[])):
+        await ARIMAService().forecast(make_test_df(), 7)
+
+    assert r_circuit.state == "closed"
+    assert r_circuit.allow()
+
+
+@pytest.mark.asyncio
+async def test_arima_cancelled_call_does_not_count_as_failure():
+    """Cancellation (client gone, hybrid deadline) neither trips nor wedges the circuit."""
+    import asyncio
+
+    from app.services.arima_service import r_circuit
+
+    with patch.object(ARIMAService, "_r_forecast", AsyncMock(side_effect=asyncio.CancelledError)):
+        for _ in range(r_circuit.failure_threshold):
+            with pytest.raises(asyncio.CancelledError):
+                await ARIMAService().forecast(make_test_df(), 7)
+    assert r_circuit.state == "closed"
+    assert r_circuit.stats()["total_failures"] == 0
+
+    for _ in range(r_circuit.failure_threshold):
+        r_circuit.record_failure()
+    r_circuit._opened_at -= r_circuit.cooldown
+    with patch.object(ARIMAService, "_r_forecast", AsyncMock(side_effect=asyncio.CancelledError)):
+        with pytest.raises(asyncio.CancelledError):
+            await ARIMAService().forecast(make_test_df(), 7)
+    assert r_circuit.state == "half_open"
+    assert r_circuit.allow()
+
+
+@pytest.mark.asyncio
+async def test_arima_forecast_many_uses_one_job_per_worker():
+    """forecast_many should batch series into one R job per worker."""
+    import os
+    import sys
+
+    from app.services.r_worker_pool import RWorkerPool
+
+    fake_worker = os.path.join(os.path.dirname(__file__), "fake_r_worker.py")
+    pool = RWorkerPool([sys.executable, fake_worker], size=2)
+    histories = {region_id: make_test_df() for region_id in range(1, 7)}
+    try:
+        with patch("app.services.arima_service.r_worker_pool", pool), \
+             patch.object(pool, "submit", wraps=pool.submit) as spy:
+            results = await ARIMAService().forecast_many(histories, 7)
+    finally:
+        await pool.shutdown()
+
+    assert spy.call_count == 2
+    assert set(results) == set(histories)
+    assert all(len(series) == 7 for series in results.values())
+
+
+@pytest.mark.asyncio
+async def test_arima_forecast_many_falls_back_per_series():
+    """Series R could not fit, and whole failed batches, use statsmodels."""
+    from app.services.forecast_series import ForecastSeries
+
+    r_points = json.loads(make_r_output(horizon=7))["forecasts"]
+    fallback = ForecastSeries.of([date(2023, 4, 11)], [1.0], [0.0], [2.0])
+    reply = {"forecasts": {"1": r_points}, "errors": {"2": "non-finite value"}}
+
+    with patch("app.services.arima_service.r_worker_pool.submit", AsyncMock(return_value=reply)), \
+         patch("app.services.arima_service.r_worker_pool.size", 1), \
+         patch.object(ARIMAService, "_python_forecast", AsyncMock(return_value=fallback)) as mock_python:
+        results = await ARIMAService().forecast_many({1: make_test_df(), 2: make_test_df()}, 7)
+
+    assert len(results[1]) == 7
+    assert results[2] == fallback
+    assert mock_python.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_arima_forecast_many_keeps_fits_when_one_fallback_fails():
+    """One series failing in statsmodels does not discard the others."""
+    from app.services.arima_service import r_circuit
+    from app.services.forecast_series import ForecastSeries
+
+    for _ in range(r_circuit.failure_threshold):
+        r_circuit.record_failure()
+    fitted = ForecastSeries.of([date(2023, 4, 11)], [1.0], [0.0], [2.0])
+
+    async def python_forecast(df, days, key=None):
+        if key == 2:
+            raise ValueError("LU decomposition error")
+        return fitted
+
+    with patch.object(ARIMAService, "_python_forecast", side_effect=python_forecast):
+        results = await ARIMAService().forecast_many({1: make_test_df(), 2: make_test_df(), 3: make_test_df()}, 7)
+
+    assert results == {1: fitted, 3: fitted}
+
+
+def make_noisy_df(n=200, seed=0):
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2023-01-01", periods=n, freq="D")
+    values = 100 + np.cumsum(rng.normal(size=n)) * 0.5 + 20 * np.sin(np.arange(n) / 30)
+    return pd.DataFrame({"ds": dates, "y": values})
+
+
+def test_statsmodels_arima_extend_matches_refilter():
+    """Folding in new days with the cached state equals filtering the full series."""
+    import numpy as np
+    from statsmodels.tsa.arima.model import ARIMA
+
+    df = make_noisy_df(203)
+    _, state = ARIMAService._fit_statsmodels_arima(df.iloc[:200], 7)
+
+    with patch("statsmodels.tsa.arima.model.ARIMA.fit", side_effect=AssertionError("refit")):
+        series, new_state = ARIMAService._fit_statsmodels_arima(df, 7, state)
+
+    assert new_state.anchor == 202
+    assert np.array_equal(new_state.params, state.params)
+    expected = ARIMA(df["y"].values, order=state.order).filter(state.params).forecast(7)
+    assert series.predicted.tolist() == [max(0, round(float(v), 2)) for v in expected]
+
+
+def test_statsmodels_arima_extend_with_sliding_window():
+    """Dropping the oldest days from the training window doesn't force a refit."""
+    df = make_noisy_df(205)
+    _, state = ARIMAService._fit_statsmodels_arima(df.iloc[:200], 7)
+
+    window = df.iloc[5:].reset_index(drop=True)
+    with patch("statsmodels.tsa.arima.model.ARIMA.fit", side_effect=AssertionError("refit")):
+        _, new_state = ARIMAService._fit_statsmodels_arima(window, 7, state)
+
+    assert new_state.anchor == 199
+    assert new_state.anchor_date == df["ds"].iloc[-1]
+
+
+def test_statsmodels_arima_refits_on_drift_or_rewritten_history():
+    df = make_noisy_df(200)
+    _, state = ARIMAService._fit_statsmodels_arima(df, 7)
+
+    shifted = pd.concat([df, pd.DataFrame({"ds": [df["ds"].iloc[-1] + pd.Timedelta(days=1)], "y": [5000.0]})])
+    _, drifted = ARIMAService._fit_statsmodels_arima(shifted.reset_index(drop=True), 7, state)
+    assert drifted.fitted_at > state.fitted_at
+
+    rewritten = df.copy()
+    rewritten.loc[199, "y"] += 1.0
+    _, refitted = ARIMAService._fit_statsmodels_arima(rewritten, 7, state)
+    assert refitted.fitted_at > state.fitted_at
+
+
+@pytest.mark.asyncio
+async def test_python_forecast_reuses_state_per_region():
+    from app.services.arima_service import arima_states
+
+    service = ARIMAService()
+    df = make_noisy_df(201)
+    await service._python_forecast(df.iloc[:200], 7, key=1)
+    fitted_at = arima_states[1].fitted_at
+    await service._python_forecast(df, 7, key=1)
+    assert arima_states[1].fitted_at == fitted_at
+    assert arima_states[1].anchor == 200
+
+    with patch("app.services.arima_service.settings.arima_refit_hours", 0):
+        await service._python_forecast(df, 7, key=1)
+    assert arima_states[1].fitted_at > fitted_at
+
+
+@pytest.mark.asyncio
+async def test_select_order_picks_lowest_aic():
+    """The AIC search picks d by KPSS and the (p, q) with the lowest AIC."""
+    import numpy as np
+
+    service = ARIMAService()
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "ds": pd.date_range("2023-01-01", periods=200, freq="D"),
+        "y": 100 + np.cumsum(rng.normal(size=200)),
+    })
+    with patch("app.services.arima_service.settings.arima_max_p", 1), \
+         patch("app.services.arima_service.settings.arima_max_q", 1), \
+         patch.object(ARIMAService, "_fit_order_candidate", wraps=ARIMAService._fit_order_candidate) as spy:
+        choice = await service.select_order(df)
+
+    assert spy.call_count == 4
+    assert choice.order[1] == 1  # a random walk needs one difference
+    aics = [ARIMAService._fit_order_candidate(df["y"].values, c.args[1])[1] for c in spy.call_args_list]
+    assert choice.aic == min(aics)
+    assert len(choice.params) > 0
+
+
+@pytest.mark.asyncio
+async def test_order_search_runs_once_per_region():
+    from datetime import datetime
+
+    from app.services.arima_service import OrderChoice, arima_orders
+
+    choice = OrderChoice(order=(1, 1, 1), params=[0.1, 0.1, 1.0], aic=100.0, selected_at=datetime.utcnow())
+    service = ARIMAService()
+    df = make_noisy_df(200)
+    with patch.object(ARIMAService, "select_order", AsyncMock(return_value=choice)) as mock_search:
+        await service._python_forecast(df, 7, key=3)
+        await service._python_forecast(df, 14, key=3)
+
+    assert mock_search.call_count == 1
+    assert arima_orders.get(3) == choice
+    assert arima_orders.take_unsaved() == {3: choice}
+
+
+@pytest.mark.asyncio
+async def test_order_search_stays_within_pool_capacity():
+    """A batch of order searches never overruns the pool or records a partial grid."""
+    from app.services.arima_service import arima_orders, r_circuit
+    from app.services.worker_pool import cpu_pool
+
+    for _ in range(r_circuit.failure_threshold):
+        r_circuit.record_failure()
+    histories = {key: make_noisy_df(120, seed=key) for key in range(1, 7)}
+    rejected = cpu_pool.rejected
+    with patch.object(cpu_pool, "max_workers", 2), patch.object(cpu_pool, "max_queue", 0), \
+         patch("app.services.arima_service.settings.arima_max_p", 1), \
+         patch("app.services.arima_service.settings.arima_max_q", 1):
+        results = await ARIMAService().forecast_many(histories, 7)
+
+    assert set(results) == set(histories)
+    assert cpu_pool.rejected == rejected
+    assert all(arima_orders.get(key) is not None for key in histories)
+
+
+@pytest.mark.asyncio
+async def test_rejected_order_search_is_not_recorded():
+    from app.services.arima_service import arima_orders
+    from app.services.worker_pool import WorkerPoolFullError
+
+    with patch("app.services.arima_service.cpu_pool.run", AsyncMock(side_effect=WorkerPoolFullError("busy"))):
+        with pytest.raises(WorkerPoolFullError):
+            await ARIMAService()._python_forecast(make_noisy_df(), 7, key=5)
 
-    assert len(points) == 30
-    for p in points:
-        assert p.predicted_density >= 0
-        assert p.lower_ci >= 0
-        assert p.upper_ci >= 0
+    assert arima_orders.get(5) is None
@@ -0,0 +1,70 @@
+"""Tests for the rolling-origin forecast backtest."""
+
+import json
+from datetime import date
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.backtest import main, rolling_origins, run_backtest, score
+from app.services.forecast_series import ForecastSeries
+
+
+def test_rolling_origins_spaced_by_horizon():
+    assert rolling_origins(90, 14, 3) == [48, 62, 76]
+    # Origins that leave too little training data are dropped
+    assert rolling_origins(40, 14, 3) == [12, 26]
+
+
+def test_score():
+    predicted = np.array([10.0, 20.0, 30.0, 40.0])
+    series = ForecastSeries.after(date(2023, 12, 31), predicted, predicted - 5, predicted + 5)
+    result = score(np.array([12.0, 20.0, 40.0, 0.0]), series)
+
+    assert result["mae"] == pytest.approx((2 + 0 + 10 + 40) / 4)
+    assert result["mape"] == pytest.approx((2 / 12 + 0 + 10 / 40) / 3 * 100)
+    assert result["coverage"] == 0.5
+
+
+@pytest.mark.asyncio
+async def test_run_backtest_reports_each_engine(seeded_db):
+    from app.services.forecast_service import ForecastService
+
+    histories = await ForecastService(seeded_db)._get_historical_data_many([1, 2])
+    with patch.object(ForecastService, "_prophet_forecast", side_effect=RuntimeError("prophet fit failed")):
+        report = await run_backtest(histories, ["fourier", "statistical", "prophet"], horizon=14, folds=2)
+
+    assert len(report["runs"]) == 2 * 2 * 3
+    fourier = report["engines"]["fourier"]
+    assert fourier["folds"] == 4 and fourier["failed"] == 0
+    assert fourier["mae"] >= 0 and 0 <= fourier["coverage"] <= 1
+    assert fourier["fit_s_p95"] >= fourier["fit_s_median"] > 0
+    assert fourier["peak_mb_max"] > 0
+    # A failing engine's folds are recorded as failures, not raised
+    prophet = report["engines"]["prophet"]
+    assert prophet["failed"] == 4 and prophet["folds"] == 0
+    assert {run["error"] for run in report["runs"] if run["engine"] == "prophet"} == {"prophet fit failed"}
+
+
+@pytest.mark.asyncio
+async def test_run_backtest_rejects_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown engine"):
+        await run_backtest({}, ["neural"])
+
+
+@pytest.mark.asyncio
+async def test_backtest_cli_writes_results(seeded_db, db_engine, tmp_path):
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    output = tmp_path / "backtest.json"
+
+    with patch("app.services.backtest.async_session", session_factory), \
+         patch("app.services.backtest.cpu_pool.shutdown"):
+        await main(["--models", "statistical", "--horizon", "7", "--folds", "2",
+                    "--regions", "1,3", "--output", str(output), "--no-memory"])
+
+    report = json.loads(output.read_text())
+    assert report["regions"] == 2
+    assert report["engines"]["statistical"]["folds"] == 4
+    assert "peak_mb" not in report["runs"][0]
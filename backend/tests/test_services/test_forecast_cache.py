@@ -0,0 +1,68 @@
+from datetime import date
+
+import numpy as np
+
+from app.services.forecast_cache import ENTRY_OVERHEAD_BYTES, POINT_SIZE_BYTES, ForecastCache
+from app.services.forecast_series import ForecastSeries, RegionForecast
+
+WATERMARK = (date(2024, 3, 30), 90)
+
+
+def make_response(region_id=1, days=7):
+    return RegionForecast(
+        region_id=region_id,
+        region_name="Dar es Salaam",
+        model_type="prophet",
+        forecast_days=days,
+        series=ForecastSeries.after(
+            date(2024, 3, 31), np.full(days, 100.0), np.full(days, 80.0), np.full(days, 120.0)
+        ),
+    )
+
+
+def test_cache_hit_and_miss():
+    cache = ForecastCache(max_entries=10, max_bytes=10**6)
+    assert cache.get(1, "prophet", 7, "daily", WATERMARK) is None
+
+    response = make_response()
+    cache.put(1, "prophet", 7, "daily", WATERMARK, response)
+
+    assert cache.get(1, "prophet", 7, "daily", WATERMARK) is response
+    assert cache.get(1, "arima", 7, "daily", WATERMARK) is None
+    assert cache.get(1, "prophet", 7, "weekly", WATERMARK) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
+
+
+def test_cache_new_watermark_invalidates_region():
+    cache = ForecastCache(max_entries=10, max_bytes=10**6)
+    cache.put(1, "prophet", 7, "daily", WATERMARK, make_response())
+    cache.put(2, "prophet", 7, "daily", WATERMARK, make_response(region_id=2))
+
+    new_watermark = (date(2024, 3, 31), 91)
+    assert cache.get(1, "prophet", 7, "daily", new_watermark) is None
+    # Older entry for the same region is dropped, other regions are untouched
+    assert cache.stats()["entries"] == 1
+    assert cache.get(2, "prophet", 7, "daily", WATERMARK) is not None
+
+
+def test_cache_lru_eviction_by_entry_count():
+    cache = ForecastCache(max_entries=2, max_bytes=10**6)
+    cache.put(1, "prophet", 7, "daily", WATERMARK, make_response(1))
+    cache.put(2, "prophet", 7, "daily", WATERMARK, make_response(2))
+    cache.get(1, "prophet", 7, "daily", WATERMARK)  # region 1 becomes most recently used
+    cache.put(3, "prophet", 7, "daily", WATERMARK, make_response(3))
+
+    assert cache.get(1, "prophet", 7, "daily", WATERMARK) is not None
+    assert cache.get(2, "prophet", 7, "daily", WATERMARK) is None
+    assert cache.get(3, "prophet", 7, "daily", WATERMARK) is not None
+
+
+def test_cache_memory_bound():
+    entry_size = ENTRY_OVERHEAD_BYTES + POINT_SIZE_BYTES * 7
+    cache = ForecastCache(max_entries=100, max_bytes=entry_size * 2)
+    for region_id in range(1, 5):
+        cache.put(region_id, "prophet", 7, "daily", WATERMARK, make_response(region_id))
+
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["bytes"] <= cache.max_bytes
@@ -0,0 +1,78 @@
+"""Tests for background forecast jobs."""
+
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.services.forecast_jobs import ForecastJobStore, JobQueueFullError
+from app.services.forecast_service import ForecastService
+
+
+async def _wait_for(store, job_id):
+    for _ in range(200):
+        job = store.get(job_id)
+        if not job.active:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_in_background(seeded_db, db_engine):
+    from tests.test_services.test_forecast_service import _slow_series
+
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    store = ForecastJobStore(workers=1, max_active=5, ttl=60)
+    with patch("app.services.forecast_jobs.async_session", session_factory), \
+         patch.object(ForecastService, "_prophet_forecast", side_effect=_slow_series(0)):
+        job = store.submit([1, 2, 999], 7, "prophet")
+        assert job.state in ("queued", "running")
+        job = await _wait_for(store, job.id)
+
+    status = job.status()
+    assert status.state == "finished"
+    assert (status.regions_done, status.regions_failed) == (2, 1)
+    assert {r.region_id for r in status.results} == {1, 2, 999}
+    assert job.status(include_results=False).results is None
+
+
+@pytest.mark.asyncio
+async def test_job_failure_is_reported():
+    store = ForecastJobStore(workers=1, max_active=5, ttl=60)
+    with patch("app.services.forecast_jobs.async_session", side_effect=RuntimeError("db down")):
+        job = store.submit(None, 7, "prophet")
+        job = await _wait_for(store, job.id)
+
+    assert job.state == "failed"
+    assert job.error == "db down"
+
+
+@pytest.mark.asyncio
+async def test_finished_jobs_expire_after_ttl():
+    store = ForecastJobStore(workers=1, max_active=5, ttl=60)
+    with patch("app.services.forecast_jobs.async_session", side_effect=RuntimeError("db down")):
+        job = await _wait_for(store, store.submit(None, 7, "prophet").id)
+
+    store.purge_expired(now=datetime.utcnow() + timedelta(seconds=30))
+    assert store.get(job.id) is not None
+    store.purge_expired(now=job.finished_at + timedelta(seconds=61))
+    assert job.id not in store._jobs
+
+
+@pytest.mark.asyncio
+async def test_submit_rejects_when_queue_full():
+    store = ForecastJobStore(workers=1, max_active=1, ttl=60)
+    started = asyncio.Event()
+
+    async def blocked_session():
+        started.set()
+        await asyncio.sleep(10)
+
+    with patch("app.services.forecast_jobs.async_session", side_effect=blocked_session):
+        store.submit(None, 7, "prophet")
+        with pytest.raises(JobQueueFullError):
+            store.submit(None, 7, "prophet")
+    store.clear()
@@ -1,11 +1,13 @@
 from datetime import date, timedelta
 from unittest.mock import patch, MagicMock, AsyncMock
 
+import numpy as np
 import pandas as pd
 import pytest
 
+from app.core.config import settings
+from app.services.forecast_series import ForecastSeries, RegionForecast
 from app.services.forecast_service import ForecastService
-from app.schemas.forecast import ForecastPoint, ForecastResponse
 
 
 @pytest.mark.asyncio
@@ -19,6 +21,51 @@ async def test_get_historical_data(seeded_db):
     assert len(df) == 90
 
 
+@pytest.mark.asyncio
+async def test_get_historical_data_lookback_window(seeded_db):
+    from app.services.training_window import TrainingWindow
+
+    service = ForecastService(seeded_db)
+    df = await service._get_historical_data(1, TrainingWindow(lookback_days=30), date(2024, 3, 30))
+
+    assert len(df) == 30
+    assert df["ds"].iloc[0] == pd.Timestamp("2024-03-01")
+
+
+@pytest.mark.asyncio
+async def test_get_historical_data_weekly(seeded_db):
+    """Weekly windows average each Monday-to-Sunday week in SQL."""
+    from app.services.training_window import TrainingWindow
+
+    service = ForecastService(seeded_db)
+    df = await service._get_historical_data(1, TrainingWindow(weekly=True))
+
+    assert len(df) == 13
+    assert (df["ds"].dt.dayofweek == 0).all()
+    assert df["ds"].iloc[0] == pd.Timestamp("2024-01-01")
+    # 50 + 0.82 * 100 + (i % 30) * 2 for days 0..6
+    assert df["y"].iloc[0] == pytest.approx(138.0)
+
+
+@pytest.mark.asyncio
+async def test_get_historical_data_fills_gaps(seeded_db):
+    from sqlalchemy import delete
+
+    from app.models.surveillance import SurveillanceData
+
+    await seeded_db.execute(
+        delete(SurveillanceData).where(SurveillanceData.region_id == 1, SurveillanceData.date == date(2024, 1, 11))
+    )
+    await seeded_db.commit()
+
+    service = ForecastService(seeded_db)
+    df = await service._get_historical_data(1)
+
+    assert len(df) == 90
+    filled = df.loc[df["ds"] == pd.Timestamp("2024-01-11"), "y"].item()
+    assert filled == pytest.approx((df["y"].iloc[9] + df["y"].iloc[11]) / 2)
+
+
 @pytest.mark.asyncio
 async def test_get_historical_data_insufficient(seeded_db):
     service = ForecastService(seeded_db)
@@ -50,59 +97,56 @@ def test_prophet_forecast_or_fallback():
 
     service = ForecastService.__new__(ForecastService)
     try:
-        points = service._prophet_forecast(df, 30)
+        series = service._prophet_forecast(df, 30)
     except ImportError:
         # Prophet not installed — verify statistical fallback works instead
-        points = service._statistical_fallback(df, 30)
+        series = service._statistical_fallback(df, 30)
 
-    assert len(points) == 30
-    for p in points:
-        assert p.predicted_density >= 0
-        assert p.lower_ci >= 0
-        assert p.upper_ci >= 0
+    assert len(series) == 30
+    assert (series.predicted >= 0).all()
+    assert (series.lower >= 0).all()
+    assert (series.upper >= 0).all()
 
 
 def test_hybrid_forecast():
     """Test hybrid combining of Prophet and ARIMA results."""
-    from app.schemas.forecast import ForecastPoint
-
-    prophet_points = [
-        ForecastPoint(date=date(2024, 6, 1) + timedelta(days=i), predicted_density=100.0, lower_ci=80.0, upper_ci=120.0)
-        for i in range(5)
-    ]
-    arima_points = [
-        ForecastPoint(date=date(2024, 6, 1) + timedelta(days=i), predicted_density=90.0, lower_ci=70.0, upper_ci=110.0)
-        for i in range(5)
-    ]
+    prophet = ForecastSeries.after(date(2024, 5, 31), [100.0] * 5, [80.0] * 5, [120.0] * 5)
+    arima = ForecastSeries.after(date(2024, 5, 31), [90.0] * 5, [70.0] * 5, [110.0] * 5)
 
     service = ForecastService.__new__(ForecastService)
-    combined = service._hybrid_forecast(prophet_points, arima_points)
+    combined = service._hybrid_forecast(prophet, arima)
 
     assert len(combined) == 5
-    assert combined[0].predicted_density == 95.0  # (100+90)/2
-    assert combined[0].lower_ci == 70.0  # min(80, 70)
-    assert combined[0].upper_ci == 120.0  # max(120, 110)
+    assert combined.dates[0] == np.datetime64("2024-06-01")
+    assert combined.predicted[0] == 95.0  # (100+90)/2
+    assert combined.lower[0] == 70.0  # min(80, 70)
+    assert combined.upper[0] == 120.0  # max(120, 110)
+
+
+def _slow_series(delay):
+    def fit(df, days):
+        import time
+
+        time.sleep(delay)
+        last = pd.to_datetime(df["ds"].iloc[-1]).date()
+        return ForecastSeries.after(last, [100.0] * days, [80.0] * days, [120.0] * days)
+    return fit
 
 
 @pytest.mark.asyncio
 async def test_generate_forecast_prophet(seeded_db):
-    """generate_forecast with prophet model should return valid ForecastResponse."""
+    """generate_forecast with prophet model should return a valid RegionForecast."""
     service = ForecastService(seeded_db)
 
-    mock_points = [
-        ForecastPoint(date=date(2024, 4, 1) + timedelta(days=i), predicted_density=100.0, lower_ci=80.0, upper_ci=120.0)
-        for i in range(7)
-    ]
-
-    with patch.object(service, "_prophet_forecast", return_value=mock_points):
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)):
         result = await service.generate_forecast(1, days=7, model_type="prophet")
 
-    assert isinstance(result, ForecastResponse)
+    assert isinstance(result, RegionForecast)
     assert result.region_id == 1
     assert result.region_name == "Dar es Salaam"
     assert result.model_type == "prophet"
     assert result.forecast_days == 7
-    assert len(result.points) == 7
+    assert len(result.series) == 7
 
 
 @pytest.mark.asyncio
@@ -128,15 +172,457 @@ async def test_generate_forecast_hybrid_arima_fallback(seeded_db):
     """hybrid model should fallback to prophet-only when ARIMA fails."""
     service = ForecastService(seeded_db)
 
-    mock_points = [
-        ForecastPoint(date=date(2024, 4, 1) + timedelta(days=i), predicted_density=100.0, lower_ci=80.0, upper_ci=120.0)
-        for i in range(7)
-    ]
-
-    with patch.object(service, "_prophet_forecast", return_value=mock_points), \
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)), \
          patch.object(service, "_arima_forecast", side_effect=RuntimeError("R unavailable")):
         result = await service.generate_forecast(1, days=7, model_type="hybrid")
 
     # Should fallback to prophet
     assert result.model_type == "prophet"
-    assert len(result.points) == 7
+    assert len(result.series) == 7
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_partial_hybrid_not_kept(seeded_db):
+    """An ARIMA-only hybrid result is neither cached nor stored, so the next request refits both."""
+    from sqlalchemy import func, select
+
+    from app.models.forecast import Forecast
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=ImportError("prophet not installed")), \
+         patch.object(service, "_arima_forecast", side_effect=lambda df, days, region_id=None: _slow_series(0)(df, days)) as mock_arima:
+        first = await service.generate_forecast(1, days=7, model_type="hybrid")
+        await service.generate_forecast(1, days=7, model_type="hybrid")
+
+    assert first.model_type == "arima"
+    assert mock_arima.call_count == 2
+    stored = (await seeded_db.execute(select(func.count(Forecast.id)))).scalar_one()
+    assert stored == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_served_from_cache(seeded_db):
+    """A repeat request on unchanged data should not refit the model."""
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)) as mock_fit:
+        first = await service.generate_forecast(1, days=7, model_type="prophet")
+        second = await service.generate_forecast(1, days=7, model_type="prophet")
+
+    assert mock_fit.call_count == 1
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_cache_invalidated_by_new_data(seeded_db):
+    """New surveillance rows for a region should force a refit."""
+    from app.models.surveillance import SurveillanceData
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)) as mock_fit:
+        await service.generate_forecast(1, days=7, model_type="prophet")
+        seeded_db.add(SurveillanceData(region_id=1, date=date(2024, 3, 31), mosquito_density=150.0))
+        await seeded_db.commit()
+        await service.generate_forecast(1, days=7, model_type="prophet")
+
+    assert mock_fit.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_batch(seeded_db):
+    """generate_batch should yield one result per requested region."""
+    from app.schemas.forecast import BatchForecastError
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)):
+        results = [r async for r in service.generate_batch([1, 2, 999], days=7, model_type="prophet")]
+
+    by_region = {r.region_id: r for r in results}
+    assert set(by_region) == {1, 2, 999}
+    assert isinstance(by_region[999], BatchForecastError)
+    assert by_region[1].region_name == "Dar es Salaam"
+    assert by_region[2].model_type == "prophet"
+    assert len(by_region[2].series) == 7
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_pool_full_not_masked(seeded_db):
+    """A saturated worker pool should surface instead of silently falling back."""
+    from app.services.worker_pool import WorkerPoolFullError
+
+    service = ForecastService(seeded_db)
+    with patch("app.services.forecast_service.cpu_pool.run", side_effect=WorkerPoolFullError("busy")):
+        with pytest.raises(WorkerPoolFullError):
+            await service.generate_forecast(1, days=7, model_type="prophet")
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_hybrid_runs_models_concurrently(seeded_db):
+    """Each hybrid fit waits for the other to start, so this only finishes if they overlap."""
+    import asyncio
+
+    service = ForecastService(seeded_db)
+    loop = asyncio.get_running_loop()
+    prophet_started, arima_started = asyncio.Event(), asyncio.Event()
+
+    def prophet_fit(df, days):
+        # Runs on a pool thread: hand the events over to the loop
+        loop.call_soon_threadsafe(prophet_started.set)
+        asyncio.run_coroutine_threadsafe(asyncio.wait_for(arima_started.wait(), 2), loop).result()
+        return _slow_series(0)(df, days)
+
+    async def arima_fit(df, days, region_id=None):
+        arima_started.set()
+        await asyncio.wait_for(prophet_started.wait(), 2)
+        return _slow_series(0)(df, days)
+
+    with patch.object(service, "_prophet_forecast", side_effect=prophet_fit), \
+         patch.object(service, "_arima_forecast", side_effect=arima_fit):
+        result = await service.generate_forecast(1, days=7, model_type="hybrid")
+
+    assert result.model_type == "hybrid"
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_hybrid_stays_within_pool_capacity(seeded_db):
+    """Each hybrid region holds two pool jobs, so a batch never overruns a queue-less pool."""
+    from app.services.worker_pool import cpu_pool
+
+    fit = _slow_series(0.05)
+
+    async def arima_forecast(df, days, region_id=None):
+        return await cpu_pool.run(fit, df, days)
+
+    service = ForecastService(seeded_db)
+    rejected = cpu_pool.rejected
+    with patch.object(cpu_pool, "max_workers", 2), patch.object(cpu_pool, "max_queue", 0), \
+         patch.object(service, "_prophet_forecast", side_effect=fit), \
+         patch.object(service, "_arima_forecast", side_effect=arima_forecast):
+        results = [r async for r in service.generate_batch([1, 2, 3], days=7, model_type="hybrid")]
+
+    assert cpu_pool.rejected == rejected
+    assert {r.model_type for r in results} == {"hybrid"}
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_hybrid_deadline_uses_finished_model(seeded_db):
+    """A model that misses the hybrid deadline is dropped and model_type says which one answered."""
+    import asyncio
+
+    service = ForecastService(seeded_db)
+
+    async def stuck_arima(df, days, region_id=None):
+        await asyncio.sleep(10)
+
+    with patch("app.services.forecast_service.settings.hybrid_timeout", 0.2), \
+         patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)), \
+         patch.object(service, "_arima_forecast", side_effect=stuck_arima):
+        result = await service.generate_forecast(1, days=7, model_type="hybrid")
+
+    assert result.model_type == "prophet"
+    assert len(result.series) == 7
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_persisted_and_reused(seeded_db):
+    """A fitted forecast is stored and served from the table after a restart (empty cache)."""
+    from sqlalchemy import select
+
+    from app.models.forecast import Forecast
+    from app.services.forecast_cache import forecast_cache
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)) as mock_fit:
+        first = await service.generate_forecast(1, days=7, model_type="prophet")
+        forecast_cache.clear()
+        second = await service.generate_forecast(1, days=7, model_type="prophet")
+
+    assert mock_fit.call_count == 1
+    assert second == first
+
+    rows = (await seeded_db.execute(select(Forecast).where(Forecast.region_id == 1))).scalars().all()
+    assert len(rows) == settings.forecast_max_horizon
+    assert {(r.requested_model, r.horizon, r.data_through, r.data_rows) for r in rows} == {
+        ("prophet", settings.forecast_max_horizon, date(2024, 3, 30), 90)
+    }
+
+
+@pytest.mark.asyncio
+async def test_stored_forecast_ignored_after_new_data(seeded_db):
+    """A stored run fitted on older data is refitted and replaced."""
+    from sqlalchemy import func, select
+
+    from app.models.forecast import Forecast
+    from app.models.surveillance import SurveillanceData
+    from app.services.forecast_cache import forecast_cache
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)) as mock_fit:
+        await service.generate_forecast(1, days=7, model_type="prophet")
+        seeded_db.add(SurveillanceData(region_id=1, date=date(2024, 3, 31), mosquito_density=150.0))
+        await seeded_db.commit()
+        forecast_cache.clear()
+        await service.generate_forecast(1, days=7, model_type="prophet")
+        forecast_cache.clear()
+        reloaded = await service.generate_forecast(1, days=30, model_type="prophet")
+
+    assert mock_fit.call_count == 2  # the third request was served from the stored run
+    assert len(reloaded.series) == 30
+    count = (await seeded_db.execute(select(func.count(Forecast.id)))).scalar_one()
+    assert count == settings.forecast_max_horizon  # the old run was replaced
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_uses_stored_forecasts(seeded_db):
+    """Batch runs store their fits and reuse stored runs."""
+    from app.services.forecast_cache import forecast_cache
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)) as mock_fit:
+        [r async for r in service.generate_batch([1, 2], days=7, model_type="prophet")]
+        forecast_cache.clear()
+        results = [r async for r in service.generate_batch([1, 2, 3], days=7, model_type="prophet")]
+
+    assert mock_fit.call_count == 3
+    assert {r.region_id for r in results} == {1, 2, 3}
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_stores_finished_regions_on_disconnect(seeded_db):
+    """Regions fitted before the consumer goes away are stored; the rest are cancelled."""
+    from sqlalchemy import select
+
+    from app.models.forecast import Forecast
+
+    fast, slow = _slow_series(0), _slow_series(0.5)
+
+    def fit(df, days):
+        # Region 1 (Dar es Salaam) has the highest densities in the seed data
+        return fast(df, days) if df["y"].mean() > 150 else slow(df, days)
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=fit):
+        stream = service.generate_batch([1, 2, 3], days=7, model_type="prophet")
+        first = await stream.__anext__()
+        await stream.aclose()
+
+    assert first.region_id == 1
+    stored = (await seeded_db.execute(select(Forecast.region_id).distinct())).scalars().all()
+    assert stored == [1]
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_arima_uses_forecast_many(seeded_db):
+    """ARIMA batches are fitted with one forecast_many call, not one job per region."""
+    fit = _slow_series(0)
+    service = ForecastService(seeded_db)
+    with patch("app.services.forecast_service.ARIMAService.forecast_many",
+               AsyncMock(side_effect=lambda histories, days, concurrency: {r: fit(h, days) for r, h in histories.items()})) as mock_many, \
+         patch.object(service, "_arima_forecast") as mock_single:
+        results = [r async for r in service.generate_batch([1, 2, 3], days=7, model_type="arima")]
+
+    assert mock_many.call_count == 1
+    assert mock_single.call_count == 0
+    assert {r.model_type for r in results} == {"arima"}
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_arima_fallback_respects_concurrency(seeded_db):
+    """Without R, forecast_many's statsmodels fits stay under the batch's concurrency cap."""
+    import asyncio
+
+    from app.services.arima_service import ARIMAService, r_circuit
+    from app.services.worker_pool import cpu_pool
+
+    for _ in range(r_circuit.failure_threshold):
+        r_circuit.record_failure()
+    fit = _slow_series(0)
+    running = peak = 0
+
+    async def python_forecast(df, days, key=None):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        return fit(df, days)
+
+    service = ForecastService(seeded_db)
+    with patch.object(cpu_pool, "max_workers", 4), \
+         patch.object(ARIMAService, "_python_forecast", side_effect=python_forecast) as mock_python:
+        results = [r async for r in service.generate_batch([1, 2, 3], days=7, model_type="arima", concurrency=1)]
+
+    assert mock_python.call_count == 3
+    assert peak == 1
+    assert {r.model_type for r in results} == {"arima"}
+
+
+@pytest.mark.asyncio
+async def test_generate_batch_arima_refits_only_failed_regions(seeded_db):
+    """A region forecast_many could not fit is refitted alone; the others keep their batch fit."""
+    from app.services.arima_service import ARIMAService, r_circuit
+
+    for _ in range(r_circuit.failure_threshold):
+        r_circuit.record_failure()
+    fit = _slow_series(0)
+
+    async def python_forecast(df, days, key=None):
+        if key == 2:
+            raise ValueError("LU decomposition error")
+        return fit(df, days)
+
+    service = ForecastService(seeded_db)
+    with patch.object(ARIMAService, "_python_forecast", side_effect=python_forecast) as mock_python:
+        results = [r async for r in service.generate_batch([1, 2, 3], days=7, model_type="arima")]
+
+    # Three batch fits plus one retry for region 2, which then falls back to Fourier
+    assert mock_python.call_count == 4
+    assert {r.region_id: r.model_type for r in results} == {1: "arima", 2: "fourier", 3: "arima"}
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_coalesces_concurrent_requests(seeded_db):
+    """Identical concurrent requests should share a single fit."""
+    import asyncio
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0.1)) as mock_fit:
+        results = await asyncio.gather(
+            *[service.generate_forecast(1, days=7, model_type="prophet") for _ in range(5)]
+        )
+
+    assert mock_fit.call_count == 1
+    assert all(r == results[0] for r in results)
+
+
+@pytest.mark.asyncio
+async def test_shorter_horizons_sliced_from_one_fit(seeded_db):
+    """Requests for different horizons share one max-horizon fit, in memory and in the table."""
+    from app.services.forecast_cache import forecast_cache
+
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=_slow_series(0)) as mock_fit:
+        week = await service.generate_forecast(1, days=7, model_type="prophet")
+        month = await service.generate_forecast(1, days=30, model_type="prophet")
+        forecast_cache.clear()
+        batch = [r async for r in service.generate_batch([1], days=90, model_type="prophet")]
+
+    assert mock_fit.call_count == 1
+    assert mock_fit.call_args.args[1] == settings.forecast_max_horizon
+    assert (week.forecast_days, len(week.series)) == (7, 7)
+    assert (month.forecast_days, len(month.series)) == (30, 30)
+    assert month.series.head(7) == week.series
+    assert (batch[0].forecast_days, len(batch[0].series)) == (90, 90)
+
+
+@pytest.mark.asyncio
+async def test_weekly_resolution_for_long_horizons(seeded_db):
+    """Requests above the weekly threshold fit weekly means; shorter ones stay daily."""
+    service = ForecastService(seeded_db)
+    with patch("app.services.training_window.settings.forecast_weekly_after_days", 100), \
+         patch.object(service, "_fallback", wraps=service._fallback) as mock_fallback:
+        month = await service.generate_forecast(1, days=30, model_type="fourier")
+        df, steps = mock_fallback.call_args.args
+        assert (len(df), steps) == (90, 100)
+
+        long = await service.generate_forecast(1, days=200, model_type="fourier")
+        df, steps = mock_fallback.call_args.args
+        assert len(df) == 13
+        assert steps == settings.forecast_max_horizon // 7 + 2
+
+        # Each resolution is cached under its own key
+        await service.generate_forecast(1, days=60, model_type="fourier")
+        await service.generate_forecast(1, days=150, model_type="fourier")
+    assert mock_fallback.call_count == 2
+
+    assert month.model_type == long.model_type == "fourier"
+    assert month.series.dates.tolist() == [date(2024, 3, 31) + timedelta(days=i) for i in range(30)]
+    assert long.series.dates.tolist() == [date(2024, 3, 31) + timedelta(days=i) for i in range(200)]
+
+
+@pytest.mark.asyncio
+async def test_arima_order_persisted_and_reloaded(seeded_db):
+    """The selected ARIMA order is stored and reused after a restart instead of searching again."""
+    from datetime import datetime
+
+    from sqlalchemy import delete, select
+
+    from app.models.arima_order import ARIMAOrder
+    from app.models.forecast import Forecast
+    from app.services.arima_service import ARIMAService, OrderChoice, arima_orders, arima_states
+    from app.services.forecast_cache import forecast_cache
+
+    choice = OrderChoice(order=(1, 1, 1), params=[0.1, 0.1, 1.0], aic=100.0, selected_at=datetime.utcnow())
+    service = ForecastService(seeded_db)
+    with patch.object(ARIMAService, "_r_forecast", AsyncMock(side_effect=RuntimeError("no R"))), \
+         patch.object(ARIMAService, "select_order", AsyncMock(return_value=choice)) as mock_search:
+        await service.generate_forecast(1, days=7, model_type="arima")
+        arima_orders.clear()
+        arima_states.clear()
+        forecast_cache.clear()
+        await seeded_db.execute(delete(Forecast))
+        await service.generate_forecast(1, days=14, model_type="arima")
+
+    assert mock_search.call_count == 1
+    row = (await seeded_db.execute(select(ARIMAOrder).where(ARIMAOrder.region_id == 1))).scalar_one()
+    assert (row.p, row.d, row.q) == (1, 1, 1)
+    assert row.params == [0.1, 0.1, 1.0]
+    assert arima_orders.get(1).order == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_fourier(seeded_db):
+    service = ForecastService(seeded_db)
+    result = await service.generate_forecast(1, days=14, model_type="fourier")
+
+    assert result.model_type == "fourier"
+    assert len(result.series) == 14
+    assert result.series.dates[0] == np.datetime64("2024-03-31")
+
+
+@pytest.mark.asyncio
+async def test_generate_forecast_falls_back_to_fourier(seeded_db):
+    """A failed Prophet fit is served by the Fourier engine and not cached."""
+    service = ForecastService(seeded_db)
+    with patch.object(service, "_prophet_forecast", side_effect=RuntimeError("stan crashed")) as mock_fit:
+        first = await service.generate_forecast(1, days=7, model_type="prophet")
+        await service.generate_forecast(1, days=7, model_type="prophet")
+
+    assert first.model_type == "fourier"
+    assert mock_fit.call_count == 2
+
+
+def _loop_statistical_fallback(values, days, alpha=0.3):
+    """Reference per-day loop the vectorized fallback replaced."""
+    level = values[-1]
+    mean_val = float(np.mean(values))
+    std_val = float(np.std(values)) if len(values) > 1 else mean_val * 0.1
+    predicted = [level * (1 - alpha) ** (i + 1) + mean_val * (1 - (1 - alpha) ** (i + 1)) for i in range(days)]
+    return predicted, [p - 1.96 * std_val for p in predicted], [p + 1.96 * std_val for p in predicted]
+
+
+def test_statistical_fallback_batch_matches_loop():
+    from app.services.forecast_service import statistical_fallback_batch
+
+    rng = np.random.default_rng(0)
+    history = rng.uniform(10, 200, size=(16, 365))
+    mean, lower, upper = statistical_fallback_batch(history, 30)
+
+    assert mean.shape == lower.shape == upper.shape == (16, 30)
+    for row in range(16):
+        expected = _loop_statistical_fallback(history[row], 30)
+        np.testing.assert_allclose(mean[row], expected[0])
+        np.testing.assert_allclose(lower[row], expected[1])
+        np.testing.assert_allclose(upper[row], expected[2])
+
+
+def test_statistical_fallback_many_handles_ragged_histories():
+    from app.services.forecast_service import statistical_fallback_many
+
+    long = pd.DataFrame({"ds": pd.date_range("2024-01-01", periods=60), "y": np.linspace(10, 70, 60)})
+    short = pd.DataFrame({"ds": pd.date_range("2024-02-01", periods=20), "y": np.linspace(5, 25, 20)})
+    results = statistical_fallback_many({1: long, 2: short}, 7)
+
+    expected = _loop_statistical_fallback(short["y"].to_numpy(), 7)
+    assert results[2].dates[0] == np.datetime64("2024-02-21")
+    assert results[2].predicted[0] == round(expected[0][0], 2)
+    assert results[1].dates[0] == np.datetime64("2024-03-01")
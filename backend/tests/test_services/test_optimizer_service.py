@@ -76,3 +76,359 @@ def test_cost_constants():
     assert CASES_PREVENTED_PER_ITN == 0.12
     assert CASES_PREVENTED_PER_IRS == 0.45
     assert CASES_PREVENTED_PER_LARVICIDE == 0.20
+
+
+def test_solve_allocation_global_constraints():
+    """One LP over many districts respects the budget, flex band and diversification."""
+    import numpy as np
+
+    from app.services.optimizer_service import (
+        COSTS,
+        MAX_ALLOCATION_PCT,
+        MIN_ALLOCATION_PCT,
+        REGION_BUDGET_FLEX,
+        solve_allocation,
+    )
+
+    rng = np.random.default_rng(0)
+    shares = rng.uniform(0.5, 2.0, size=180)
+    shares /= shares.sum()
+    budget = 2_000_000.0
+
+    units = solve_allocation(shares, budget)
+
+    spend = units * COSTS
+    region_spend = spend.sum(axis=1)
+    assert region_spend.sum() <= budget * (1 + 1e-9)
+    assert np.all(region_spend >= (1 - REGION_BUDGET_FLEX) * shares * budget * (1 - 1e-9))
+    assert np.all(region_spend <= (1 + REGION_BUDGET_FLEX) * shares * budget * (1 + 1e-9))
+    fractions = spend / region_spend[:, None]
+    assert np.all(fractions >= MIN_ALLOCATION_PCT - 1e-9)
+    assert np.all(fractions <= MAX_ALLOCATION_PCT + 1e-9)
+    # Money moves towards the densest districts
+    assert region_spend[shares.argmax()] > shares.max() * budget
+
+
+@pytest.mark.asyncio
+async def test_optimize_single_solver_call(seeded_db):
+    from unittest.mock import patch
+
+    from app.services import optimizer_service
+
+    service = OptimizerService(seeded_db)
+    with patch.object(optimizer_service, "linprog", wraps=optimizer_service.linprog) as mock_linprog:
+        await service.optimize(OptimizationRequest(budget_usd=50000, region_ids=[1, 2, 3], rebalance_regions=True))
+
+    assert mock_linprog.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_optimize_rebalancing_raises_weighted_objective(seeded_db):
+    """Rebalancing never lowers the density-weighted cases prevented it maximizes."""
+    service = OptimizerService(seeded_db)
+    baseline = await service.optimize(OptimizationRequest(budget_usd=50000, region_ids=[1, 2, 3]))
+    rebalanced = await service.optimize(
+        OptimizationRequest(budget_usd=50000, region_ids=[1, 2, 3], rebalance_regions=True)
+    )
+
+    assert rebalanced.weighted_cases_prevented >= baseline.weighted_cases_prevented
+
+
+@pytest.mark.asyncio
+async def test_optimize_without_rebalancing_keeps_density_split(seeded_db):
+    service = OptimizerService(seeded_db)
+    weights = await service._get_region_weights([1, 2, 3])
+
+    result = await service.optimize(
+        OptimizationRequest(budget_usd=50000, region_ids=[1, 2, 3], rebalance_regions=False)
+    )
+
+    for alloc in result.allocations:
+        share = weights[alloc.region_id] * 50000
+        # Whole units only, so up to one unit of each intervention below the share
+        assert share - sum((COST_PER_ITN, COST_PER_IRS, COST_PER_LARVICIDE)) <= alloc.cost <= share + 1e-6
+
+
+def test_knapsack_allocation_matches_linprog():
+    """The closed-form allocation equals the LP optimum for fixed region budgets."""
+    import numpy as np
+    from scipy.optimize import linprog
+
+    from app.services.optimizer_service import (
+        CASES_PREVENTED,
+        COSTS,
+        MAX_ALLOCATION_PCT,
+        MIN_ALLOCATION_PCT,
+        knapsack_allocation,
+        solve_allocation,
+    )
+
+    budgets = np.array([100.0, 12_345.0, 50_000.0, 1_000_000.0])
+    units = knapsack_allocation(budgets)
+
+    for budget, row in zip(budgets, units):
+        bounds = [(MIN_ALLOCATION_PCT * budget / cost, MAX_ALLOCATION_PCT * budget / cost) for cost in COSTS]
+        expected = linprog(-CASES_PREVENTED, A_ub=[COSTS], b_ub=[budget], bounds=bounds, method="highs")
+        assert row @ CASES_PREVENTED == pytest.approx(-expected.fun, rel=1e-9)
+        assert np.allclose(row, expected.x, rtol=1e-7)
+
+    shares = budgets / budgets.sum()
+    assert np.allclose(units, solve_allocation(shares, budgets.sum(), flex=0.0), rtol=1e-6)
+
+
+@pytest.mark.asyncio
+async def test_optimize_fixed_split_skips_solver(seeded_db):
+    from unittest.mock import patch
+
+    from app.services import optimizer_service
+
+    service = OptimizerService(seeded_db)
+    with patch.object(optimizer_service, "linprog") as mock_linprog:
+        result = await service.optimize(
+            OptimizationRequest(budget_usd=50000, region_ids=[1, 2, 3], rebalance_regions=False)
+        )
+
+    assert mock_linprog.call_count == 0
+    assert len(result.allocations) == 3
+
+
+@pytest.mark.asyncio
+async def test_sweep_matches_individual_optimizations(seeded_db):
+    """Each sweep point equals a separate /optimize call at that budget."""
+    from unittest.mock import patch
+
+    from app.schemas.optimize import OptimizationSweepRequest
+    from app.services import optimizer_service
+
+    service = OptimizerService(seeded_db)
+    request = OptimizationSweepRequest(
+        budget_min=10000, budget_max=50000, steps=5, region_ids=[1, 2, 3], rebalance_regions=True
+    )
+    with patch.object(optimizer_service, "linprog", wraps=optimizer_service.linprog) as mock_linprog:
+        sweep = await service.sweep(request)
+
+    assert mock_linprog.call_count == 1
+    assert [p.budget for p in sweep.points] == [10000, 20000, 30000, 40000, 50000]
+    assert sweep.points[0].marginal_cases_per_usd is None
+    for point in sweep.points:
+        single = await service._optimize(
+            OptimizationRequest(budget_usd=point.budget, region_ids=[1, 2, 3], rebalance_regions=True)
+        )
+        assert point.total_cases_prevented == pytest.approx(single.total_cases_prevented, abs=1.0)
+        assert point.total_cost <= point.budget
+    prevented = [p.total_cases_prevented for p in sweep.points]
+    assert prevented == sorted(prevented)
+
+
+def test_robust_allocation_cvar_trades_mean_for_tail():
+    """The CVaR plan has the better worst-case tail, the expected plan the better mean."""
+    import numpy as np
+
+    from app.services.optimizer_service import (
+        COSTS,
+        MAX_ALLOCATION_PCT,
+        MIN_ALLOCATION_PCT,
+        relative_density,
+        robust_allocation,
+        scenario_outcomes,
+    )
+
+    shares = np.array([0.5, 0.3, 0.2])
+    budget = 100_000.0
+    plans = {}
+    for objective in ("expected", "cvar"):
+        dollars, scenarios = robust_allocation(shares, budget, 0.25, 2000, 7, objective, 0.1)
+        assert dollars.sum() <= budget * (1 + 1e-9)
+        fractions = dollars / dollars.sum(axis=1, keepdims=True)
+        assert np.all((fractions >= MIN_ALLOCATION_PCT - 1e-9) & (fractions <= MAX_ALLOCATION_PCT + 1e-9))
+        plans[objective] = scenario_outcomes(dollars / COSTS, scenarios, relative_density(shares))
+
+    def cvar(outcomes):
+        return np.sort(outcomes)[:200].mean()
+
+    assert plans["cvar"].mean() <= plans["expected"].mean() + 1e-6
+    assert cvar(plans["cvar"]) >= cvar(plans["expected"]) - 1e-6
+
+
+def test_robust_risk_summary_matches_lp_objective():
+    """The reported expected and CVaR figures are the values the robust LP optimized."""
+    from unittest.mock import patch
+
+    import numpy as np
+
+    from app.services import optimizer_service
+    from app.services.optimizer_service import COSTS, relative_density, robust_allocation, scenario_outcomes
+
+    shares = np.array([0.5, 0.3, 0.2])
+    linprog = optimizer_service.linprog
+    solved = []
+
+    def capture(*args, **kwargs):
+        solved.append(linprog(*args, **kwargs))
+        return solved[-1]
+
+    for objective in ("expected", "cvar"):
+        request = OptimizationRequest(
+            budget_usd=100_000, region_ids=[1, 2, 3], objective=objective, scenarios=2000, cvar_alpha=0.1
+        )
+        with patch.object(optimizer_service, "linprog", side_effect=capture):
+            dollars, scenarios = robust_allocation(shares, 100_000.0, 0.25, 2000, 7, objective, 0.1)
+        outcomes = scenario_outcomes(dollars / COSTS, scenarios, relative_density(shares))
+        risk = OptimizerService._risk_summary(request, outcomes)
+        reported = risk.expected_cases_prevented if objective == "expected" else risk.cvar_cases_prevented
+        assert reported == pytest.approx(-solved[-1].fun, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_optimize_cvar_reports_risk(seeded_db):
+    service = OptimizerService(seeded_db)
+    result = await service.optimize(
+        OptimizationRequest(budget_usd=50000, region_ids=[1, 2, 3], objective="cvar", scenarios=500)
+    )
+
+    assert result.total_cost <= 50000
+    risk = result.risk
+    assert risk.objective == "cvar" and risk.scenarios == 500
+    percentiles = [risk.percentiles[key] for key in ("p5", "p25", "p50", "p75", "p95")]
+    assert percentiles == sorted(percentiles)
+    assert risk.cvar_cases_prevented <= risk.percentiles["p5"] + 1e-6
+    assert risk.cvar_cases_prevented < risk.expected_cases_prevented
+
+    point = await service.optimize(OptimizationRequest(budget_usd=50000, region_ids=[1, 2, 3]))
+    assert point.risk is None
+
+
+def test_solve_plan_constraints_at_scale():
+    """12 months x 200 districts in one solve, respecting funding and diversification."""
+    import numpy as np
+
+    from app.services.optimizer_service import (
+        COSTS,
+        MAX_ALLOCATION_PCT,
+        MIN_ALLOCATION_PCT,
+        PERIOD_MIN_SHARE,
+        solve_plan,
+    )
+
+    rng = np.random.default_rng(1)
+    # Rising season: later months have more mosquitoes everywhere
+    density = rng.uniform(50, 150, size=(12, 200)) * np.linspace(0.5, 2.0, 12)[:, None]
+    funding = np.full(12, 100_000.0)
+
+    units = solve_plan(density, funding)
+
+    spend = units * COSTS
+    period_spend = spend.sum(axis=(1, 2))
+    assert np.all(np.cumsum(period_spend) <= np.cumsum(funding) * (1 + 1e-9))
+    assert np.all(period_spend >= PERIOD_MIN_SHARE * funding * (1 - 1e-9))
+    region_spend = spend.sum(axis=2)
+    active = region_spend > 1e-6
+    fractions = spend[active] / region_spend[active][:, None]
+    assert np.all((fractions >= MIN_ALLOCATION_PCT - 1e-9) & (fractions <= MAX_ALLOCATION_PCT + 1e-9))
+    # Money is held back for the high-density months
+    assert period_spend[-1] > funding[-1]
+    assert period_spend[0] == pytest.approx(PERIOD_MIN_SHARE * funding[0])
+
+
+@pytest.mark.asyncio
+async def test_plan_reuses_stored_forecasts(seeded_db):
+    """The plan uses forecasts already fitted and fills gaps with the Fourier model, without refitting."""
+    from unittest.mock import patch
+
+    from app.schemas.optimize import PlanRequest
+    from app.services.forecast_service import ForecastService
+    from tests.test_services.test_forecast_service import _slow_series
+
+    with patch.object(ForecastService, "_prophet_forecast", side_effect=_slow_series(0)):
+        await ForecastService(seeded_db).generate_forecast(1, days=30, model_type="prophet")
+
+    service = OptimizerService(seeded_db)
+    with patch.object(ForecastService, "_prophet_forecast", side_effect=AssertionError("refit")):
+        result = await service.plan(PlanRequest(budget_usd=90000, region_ids=[1, 2, 3], periods=3, model="prophet"))
+
+    assert result.forecast_sources == {"prophet": 1, "fourier": 2, "historical": 0}
+    assert result.refit_regions == [2, 3]
+    assert len(result.periods) == 3
+    assert all(len(period.allocations) == 3 for period in result.periods)
+    assert result.total_cost <= 90000
+    assert sum(period.cost for period in result.periods) == pytest.approx(result.total_cost, abs=0.05)
+    assert (result.periods[1].start_date - result.periods[0].start_date).days == 30
+
+
+@pytest.mark.asyncio
+async def test_plan_aligns_staggered_forecasts_by_date(seeded_db):
+    """Regions whose data ends on different days are planned on one shared calendar."""
+    from datetime import date, timedelta
+    from unittest.mock import patch
+
+    import numpy as np
+
+    from app.models.surveillance import SurveillanceData
+    from app.schemas.optimize import PlanRequest
+    from app.services import optimizer_service
+    from app.services.forecast_service import ForecastService
+
+    # Arusha reports 10 days past the others (whose data ends 2024-03-30)
+    for i in range(10):
+        seeded_db.add(SurveillanceData(region_id=3, date=date(2024, 3, 31) + timedelta(days=i), mosquito_density=90.0))
+    await seeded_db.commit()
+
+    solve_plan = optimizer_service.solve_plan
+    densities = []
+
+    def capture(density, funding, flex):
+        densities.append(density)
+        return solve_plan(density, funding, flex)
+
+    service = OptimizerService(seeded_db)
+    with patch.object(optimizer_service, "solve_plan", side_effect=capture):
+        result = await service.plan(PlanRequest(budget_usd=60000, region_ids=[1, 3], periods=2, model="fourier"))
+
+    start = date(2024, 4, 10)
+    assert result.periods[0].start_date == start
+    assert result.periods[1].end_date == start + timedelta(days=59)
+    assert result.forecast_sources["historical"] == 0
+
+    # Each column is its region's forecast over the same calendar days
+    forecasts = await ForecastService(seeded_db).lookup_forecasts([1, 3], 70, "fourier")
+    for j, region_id in enumerate([1, 3]):
+        series = forecasts[region_id].series
+        by_date = dict(zip(series.dates.tolist(), series.predicted.tolist()))
+        first_month = [by_date[start + timedelta(days=i)] for i in range(30)]
+        assert densities[0][0, j] == pytest.approx(np.mean(first_month))
+
+
+@pytest.mark.asyncio
+async def test_plan_looks_up_stored_forecasts_at_max_horizon(seeded_db):
+    """Staggered regions needing more than the max horizon still reuse the stored runs."""
+    from datetime import date, timedelta
+    from unittest.mock import AsyncMock, patch
+
+    from app.core.config import settings
+    from app.models.surveillance import SurveillanceData
+    from app.schemas.optimize import PlanRequest
+    from app.services.arima_service import ARIMAService
+    from app.services.forecast_service import ForecastService
+    from tests.test_services.test_forecast_service import _slow_series
+
+    # Arusha reports 15 days past Dar es Salaam: a 60-day plan would need 75 days
+    for i in range(15):
+        seeded_db.add(SurveillanceData(region_id=3, date=date(2024, 3, 31) + timedelta(days=i), mosquito_density=90.0))
+    await seeded_db.commit()
+
+    fit = _slow_series(0)
+    with patch.object(settings, "forecast_max_horizon", 70):
+        with patch.object(ARIMAService, "forecast_many", AsyncMock(
+            side_effect=lambda histories, days, concurrency: {r: fit(h, days) for r, h in histories.items()}
+        )):
+            stored = [r async for r in ForecastService(seeded_db).generate_batch([1, 3], 60, "arima")]
+        assert {r.forecast_days for r in stored} == {60}
+
+        with patch.object(ARIMAService, "forecast_many", AsyncMock(side_effect=AssertionError("refit"))):
+            result = await OptimizerService(seeded_db).plan(
+                PlanRequest(budget_usd=60000, region_ids=[1, 3], periods=2, model="arima")
+            )
+
+    # Dar es Salaam's 70-day run stops short of the shared calendar
+    assert result.forecast_sources == {"arima": 1, "fourier": 0, "historical": 1}
+    assert result.refit_regions == []
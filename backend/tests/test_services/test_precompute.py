@@ -0,0 +1,104 @@
+"""Tests for the forecast precompute / cache warm-up job."""
+
+from datetime import datetime, time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.services.forecast_service import ForecastService
+from app.services.precompute import PrecomputeJob, next_run_after, parse_run_time
+from app.services.region_service import RegionService
+
+
+def test_parse_run_time():
+    assert parse_run_time("05:30") == time(5, 30)
+    with pytest.raises(ValueError, match="HH:MM"):
+        parse_run_time("half past five")
+
+
+def test_next_run_after_rolls_to_tomorrow():
+    now = datetime(2024, 6, 1, 6, 0)
+    assert next_run_after(now, time(5, 30)) == datetime(2024, 6, 2, 5, 30)
+    assert next_run_after(now, time(7, 0)) == datetime(2024, 6, 1, 7, 0)
+
+
+@pytest.mark.asyncio
+async def test_precompute_run_warms_everything(seeded_db, db_engine):
+    """A run forecasts every region, stores the results and reports progress."""
+    from app.models.forecast import Forecast
+    from tests.test_services.test_forecast_service import _slow_series
+
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    job = PrecomputeJob(models=["prophet"], days=7, concurrency=2)
+
+    with patch("app.services.precompute.async_session", session_factory), \
+         patch("app.services.precompute.warm_pipeline", return_value=True), \
+         patch.object(RegionService, "refresh_geojson", AsyncMock()) as mock_geojson, \
+         patch.object(ForecastService, "_prophet_forecast", side_effect=_slow_series(0)):
+        status = await job.run()
+
+    assert status["state"] == "finished"
+    assert status["regions_total"] == 3
+    assert status["forecasts_done"] == 3
+    assert status["forecasts_failed"] == 0
+    assert status["forecasts_degraded"] == 0
+    assert status["geojson_warmed"] and status["nlp_warmed"]
+    assert set(status["steps"]) == {"geojson_cache", "forecast:prophet", "nlp"}
+    assert mock_geojson.await_count == 1
+
+    stored = (await seeded_db.execute(select(func.count(Forecast.id)))).scalar_one()
+    assert stored == 3 * settings.forecast_max_horizon
+
+
+@pytest.mark.asyncio
+async def test_precompute_counts_fallback_fits_as_degraded(seeded_db, db_engine):
+    """Regions only the Fourier fallback could fit are not reported as done."""
+    from app.models.forecast import Forecast
+
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    job = PrecomputeJob(models=["prophet"], days=7, concurrency=2)
+
+    with patch("app.services.precompute.async_session", session_factory), \
+         patch("app.services.precompute.warm_pipeline", return_value=True), \
+         patch.object(RegionService, "refresh_geojson", AsyncMock()), \
+         patch.object(ForecastService, "_prophet_forecast", side_effect=ImportError("No module named 'prophet'")):
+        status = await job.run()
+
+    assert status["forecasts_done"] == 0
+    assert status["forecasts_degraded"] == 3
+    assert status["forecasts_failed"] == 0
+    assert status["steps"]["forecast:prophet"]["degraded"] == 3
+
+    stored = (await seeded_db.execute(select(func.count(Forecast.id)))).scalar_one()
+    assert stored == 0
+
+
+@pytest.mark.asyncio
+async def test_precompute_failed_step_does_not_skip_others(seeded_db, db_engine):
+    """A GeoJSON failure is reported while forecasts and NLP still warm up."""
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    job = PrecomputeJob(models=["arima"], days=7, concurrency=2)
+
+    with patch("app.services.precompute.async_session", session_factory), \
+         patch("app.services.precompute.warm_pipeline", return_value=True), \
+         patch.object(RegionService, "refresh_geojson", AsyncMock(side_effect=RuntimeError("no such function: AsGeoJSON"))):
+        status = await job.run()
+
+    assert status["state"] == "failed"
+    assert status["error"] == "Steps failed: geojson_cache"
+    assert status["steps"]["geojson_cache"] == {"state": "failed", "error": "no such function: AsGeoJSON"}
+    assert status["steps"]["forecast:arima"]["state"] == "finished"
+    assert status["forecasts_done"] == 3
+    assert not status["geojson_warmed"]
+    assert status["nlp_warmed"]
+
+
+@pytest.mark.asyncio
+async def test_precompute_rejects_overlapping_runs():
+    job = PrecomputeJob(models=["prophet"], days=7, concurrency=1)
+    async with job._lock:
+        with pytest.raises(RuntimeError, match="already running"):
+            await job.run()
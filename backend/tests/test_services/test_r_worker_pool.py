@@ -0,0 +1,76 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+from app.services.r_worker_pool import RWorkerError, RWorkerPool
+
+FAKE_WORKER = [sys.executable, os.path.join(os.path.dirname(__file__), "fake_r_worker.py")]
+
+JOB = {"dates": ["2024-01-01", "2024-01-02"], "values": [50.0, 55.0], "horizon": 3}
+
+
+@pytest.mark.asyncio
+async def test_pool_serves_jobs_from_warm_workers():
+    pool = RWorkerPool(FAKE_WORKER, size=2)
+    try:
+        replies = await asyncio.gather(*[pool.submit(JOB, timeout=10) for _ in range(4)])
+        assert all(len(r["forecasts"]) == 3 for r in replies)
+        assert replies[0]["forecasts"][0]["date"] == "2024-01-03"
+        # Four jobs on two workers: no process was spawned per request
+        assert pool.stats()["alive"] == 2
+        assert pool.stats()["restarts"] == 0
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_restarts_dead_worker():
+    pool = RWorkerPool(FAKE_WORKER, size=1)
+    try:
+        with pytest.raises(RWorkerError, match="exited"):
+            await pool.submit({"exit": True}, timeout=10)
+
+        reply = await pool.submit(JOB, timeout=10)
+        assert len(reply["forecasts"]) == 3
+        assert pool.stats()["restarts"] == 1
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_timeout_replaces_stuck_worker():
+    pool = RWorkerPool(FAKE_WORKER, size=1)
+    try:
+        with pytest.raises(RWorkerError, match="timed out"):
+            await pool.submit({"sleep": 5}, timeout=0.2)
+
+        # The replacement must not see the stuck job's late reply
+        reply = await pool.submit(JOB, timeout=10)
+        assert "forecasts" in reply
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_health_check_restarts_killed_worker():
+    pool = RWorkerPool(FAKE_WORKER, size=2)
+    try:
+        await pool.start()
+        assert await pool.health_check() == 0
+
+        pool._workers[0].process.kill()
+        await pool._workers[0].process.wait()
+        assert await pool.health_check() == 1
+        assert pool.stats()["alive"] == 2
+    finally:
+        await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_missing_executable():
+    pool = RWorkerPool(["definitely-not-rscript"], size=1)
+    with pytest.raises(RWorkerError, match="not found"):
+        await pool.submit(JOB, timeout=10)
+    assert not pool.started
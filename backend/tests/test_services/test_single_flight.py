@@ -0,0 +1,77 @@
+"""Tests for SingleFlight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "result"
+
+    results = await asyncio.gather(*[flights.do("key", compute) for _ in range(10)])
+
+    assert results == ["result"] * 10
+    assert calls == 1
+    assert flights.coalesced == 9
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_do_not_coalesce():
+    flights = SingleFlight("test")
+
+    async def compute(value):
+        await asyncio.sleep(0.01)
+        return value
+
+    results = await asyncio.gather(flights.do("a", lambda: compute(1)), flights.do("b", lambda: compute(2)))
+    assert results == [1, 2]
+    assert flights.coalesced == 0
+
+
+@pytest.mark.asyncio
+async def test_exception_shared_and_not_remembered():
+    flights = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    outcomes = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+    assert all(isinstance(o, ValueError) for o in outcomes)
+
+    async def succeed():
+        return "ok"
+
+    assert await flights.do("key", succeed) == "ok"
+
+
+@pytest.mark.asyncio
+async def test_waiter_takes_over_when_first_caller_cancelled():
+    flights = SingleFlight("test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return calls
+
+    leader = asyncio.ensure_future(flights.do("key", compute))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flights.do("key", compute))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await follower == 2
+    assert leader.cancelled()
@@ -0,0 +1,66 @@
+import asyncio
+import math
+import threading
+import time
+
+import pytest
+
+from app.services.worker_pool import CPUWorkerPool, WorkerPoolFullError, WorkerTimeoutError
+
+
+def slow_square(x, delay=0.2):
+    time.sleep(delay)
+    return x * x
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result():
+    pool = CPUWorkerPool(max_workers=2, max_queue=2, timeout=5, use_processes=False)
+    try:
+        assert await pool.run(slow_square, 3, 0) == 9
+        assert pool.stats()["in_flight"] == 0
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_run_in_worker_process():
+    pool = CPUWorkerPool(max_workers=1, max_queue=0, timeout=60, use_processes=True)
+    try:
+        assert await pool.run(math.factorial, 10) == 3628800
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_queue_depth_limit_rejects():
+    pool = CPUWorkerPool(max_workers=1, max_queue=1, timeout=5, use_processes=False)
+    try:
+        running = [asyncio.ensure_future(pool.run(slow_square, i)) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(WorkerPoolFullError):
+            await pool.run(slow_square, 99)
+        assert await asyncio.gather(*running) == [0, 1]
+        assert pool.stats()["rejected"] == 1
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_job_timeout_keeps_capacity_until_worker_finishes():
+    pool = CPUWorkerPool(max_workers=1, max_queue=0, timeout=0.05, use_processes=False)
+    release = threading.Event()
+    try:
+        with pytest.raises(WorkerTimeoutError):
+            await pool.run(release.wait)
+        # The abandoned job still occupies the only worker
+        with pytest.raises(WorkerPoolFullError):
+            await pool.run(slow_square, 2, 0)
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert pool.stats()["in_flight"] == 0
+        assert pool.stats()["timeouts"] == 1
+    finally:
+        release.set()
+        pool.shutdown()
@@ -0,0 +1,8 @@
+-- 005: Tag stored forecasts with the run that produced them
+
+ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS requested_model VARCHAR(20);
+ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS horizon INTEGER;
+ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS data_through DATE;
+ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS data_rows INTEGER;
+
+CREATE INDEX IF NOT EXISTS idx_forecasts_run ON forecasts (region_id, requested_model, horizon);
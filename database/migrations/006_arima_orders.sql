@@ -0,0 +1,11 @@
+-- 006: Per-region ARIMA order chosen by AIC search
+
+CREATE TABLE IF NOT EXISTS arima_orders (
+    region_id INTEGER PRIMARY KEY REFERENCES regions(id) ON DELETE CASCADE,
+    p INTEGER NOT NULL,
+    d INTEGER NOT NULL,
+    q INTEGER NOT NULL,
+    aic FLOAT,
+    params JSON NOT NULL,
+    selected_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
@@ -0,0 +1,3 @@
+-- 007: Tag stored forecasts with the resolution (daily or weekly) they were fitted at
+
+ALTER TABLE forecasts ADD COLUMN IF NOT EXISTS resolution VARCHAR(10) NOT NULL DEFAULT 'daily';